@@ -0,0 +1,324 @@
+"""
+Versioned JSON read API: /api/v1/...
+
+Read-only endpoints for clients, contacts, services, tasks, notes and
+timesheets, for integrations that would otherwise scrape the HTML pages.
+
+Every list endpoint supports:
+- cursor pagination: results are ordered by id; pass the returned
+  next_cursor back as ?cursor= to get the following page (keyset, so deep
+  pages cost the same as the first one)
+- limit: page size (1-500, default 50)
+- sparse fieldsets: ?fields=id,legal_name,status selects only those columns
+  (SQLAlchemy load_only) and serializes only those fields
+
+Filters match the HTML list pages (crud.filter_clients_query /
+crud.filter_timesheets_query). Auth uses the same session cookie and
+permissions as the pages, but failures return JSON 401/403 instead of a
+redirect.
+"""
+import json
+import base64
+import logging
+from functools import lru_cache
+from datetime import date
+from typing import FrozenSet, List, Optional, Type
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy.orm import Session, load_only
+import models
+import schemas
+from auth import get_current_user, has_permission
+from crud import filter_clients_query, filter_timesheets_query
+from database import get_read_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1", tags=["api-v1"])
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class APIError(Exception):
+    """Raised inside handlers to return a JSON error response."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+    def to_response(self) -> JSONResponse:
+        return JSONResponse({"error": self.message}, status_code=self.status_code)
+
+
+# ============================================================================
+# Serialization
+# ============================================================================
+
+@lru_cache(maxsize=256)
+def _partial_model(schema: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """A copy of schema restricted to fields (cached per field set)."""
+    definitions = {
+        name: (info.annotation, info)
+        for name, info in schema.model_fields.items()
+        if name in fields
+    }
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+@lru_cache(maxsize=256)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def serialize_rows(schema: Type[BaseModel], fields: Optional[FrozenSet[str]], rows: list) -> bytes:
+    """Validate and dump a page of ORM rows to JSON in one pydantic call."""
+    model = schema if fields is None else _partial_model(schema, fields)
+    adapter = _list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """Parse ?fields=a,b,c against the schema's fields; id is always included."""
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise APIError(400, f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return frozenset(requested | {"id"})
+
+
+# ============================================================================
+# Cursor pagination
+# ============================================================================
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except Exception:
+        raise APIError(400, "Invalid cursor")
+
+
+def paginate(query, model, schema: Type[BaseModel], fields: Optional[str], cursor: Optional[str], limit: int) -> Response:
+    """Apply sparse fieldset + keyset pagination to query and build the response."""
+    selected = parse_fields(fields, schema)
+    if selected is not None:
+        # id is always selected as the primary key, so load_only only needs the rest
+        columns = [getattr(model, name) for name in selected if name != "id"]
+        if columns:
+            query = query.options(load_only(*columns))
+
+    after_id = decode_cursor(cursor)
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].id) if has_more else None
+
+    body = b"".join([
+        b'{"data":',
+        serialize_rows(schema, selected, rows),
+        b',"next_cursor":',
+        json.dumps(next_cursor).encode("utf-8"),
+        b',"limit":',
+        str(limit).encode("ascii"),
+        b"}",
+    ])
+    return Response(content=body, media_type="application/json")
+
+
+# ============================================================================
+# Auth
+# ============================================================================
+
+def authorize(request: Request, *permissions: str):
+    """Return the current user if they hold any of permissions, else raise APIError."""
+    current_user = get_current_user(request)
+    if not current_user:
+        raise APIError(401, "Unauthorized")
+    if permissions and not any(has_permission(current_user, p) for p in permissions):
+        raise APIError(403, "Forbidden")
+    return current_user
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise APIError(400, f"Invalid {name}: expected YYYY-MM-DD")
+
+
+# ============================================================================
+# Endpoints
+# ============================================================================
+
+@router.get("/clients")
+async def list_clients(
+    request: Request,
+    search: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    entity_type: Optional[str] = Query(None),
+    follow_up: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Clients, filtered like the /clients page."""
+    try:
+        authorize(request, "view_clients")
+        query = filter_clients_query(
+            db.query(models.Client),
+            search=search,
+            status_filter=status,
+            entity_type_filter=entity_type,
+            follow_up_filter=follow_up
+        )
+        return paginate(query, models.Client, schemas.Client, fields, cursor, limit)
+    except APIError as e:
+        return e.to_response()
+
+
+@router.get("/contacts")
+async def list_contacts(
+    request: Request,
+    client_id: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Contacts, optionally for one client."""
+    try:
+        authorize(request, "view_clients")
+        query = db.query(models.Contact)
+        if client_id:
+            query = query.filter(models.Contact.client_id == client_id)
+        return paginate(query, models.Contact, schemas.Contact, fields, cursor, limit)
+    except APIError as e:
+        return e.to_response()
+
+
+@router.get("/services")
+async def list_services(
+    request: Request,
+    client_id: Optional[int] = Query(None),
+    active: Optional[bool] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Services, optionally for one client and/or by active flag."""
+    try:
+        authorize(request, "view_services")
+        query = db.query(models.Service)
+        if client_id:
+            query = query.filter(models.Service.client_id == client_id)
+        if active is not None:
+            query = query.filter(models.Service.active == active)
+        return paginate(query, models.Service, schemas.Service, fields, cursor, limit)
+    except APIError as e:
+        return e.to_response()
+
+
+@router.get("/tasks")
+async def list_tasks(
+    request: Request,
+    client_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    due_before: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Tasks, optionally by client, status and due date (inclusive)."""
+    try:
+        authorize(request, "view_tasks")
+        query = db.query(models.Task)
+        if client_id:
+            query = query.filter(models.Task.client_id == client_id)
+        if status:
+            query = query.filter(models.Task.status == status)
+        due_before_parsed = _parse_date(due_before, "due_before")
+        if due_before_parsed:
+            query = query.filter(models.Task.due_date <= due_before_parsed)
+        return paginate(query, models.Task, schemas.Task, fields, cursor, limit)
+    except APIError as e:
+        return e.to_response()
+
+
+@router.get("/notes")
+async def list_notes(
+    request: Request,
+    client_id: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Notes, optionally for one client."""
+    try:
+        authorize(request, "view_notes")
+        query = db.query(models.Note)
+        if client_id:
+            query = query.filter(models.Note.client_id == client_id)
+        return paginate(query, models.Note, schemas.Note, fields, cursor, limit)
+    except APIError as e:
+        return e.to_response()
+
+
+@router.get("/timesheets")
+async def list_timesheets(
+    request: Request,
+    client_id: Optional[int] = Query(None),
+    staff_member: Optional[str] = Query(None),
+    date_from: Optional[str] = Query(None),
+    date_to: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Timesheet entries, filtered like the /timesheets page.
+
+    Users without view_all_timesheets only see their own entries.
+    """
+    try:
+        current_user = authorize(request, "view_all_timesheets", "view_own_timesheets")
+        if not has_permission(current_user, "view_all_timesheets"):
+            staff_member = current_user.name
+        query = filter_timesheets_query(
+            db.query(models.Timesheet),
+            client_id=client_id,
+            staff_member=staff_member,
+            date_from=_parse_date(date_from, "date_from"),
+            date_to=_parse_date(date_to, "date_to"),
+            search=search
+        )
+        return paginate(query, models.Timesheet, schemas.Timesheet, fields, cursor, limit)
+    except APIError as e:
+        return e.to_response()
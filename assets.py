@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Static asset pipeline.
+
+Build step (run at deploy time, see render.yaml):
+    python assets.py
+
+For every file in static/ this writes a content-hashed copy to static/dist/
+(e.g. style.css -> dist/style.3f2a1b9c0d4e.css) plus precompressed .gz and,
+when the brotli package is installed, .br siblings. A manifest.json maps the
+original names to the hashed ones.
+
+At runtime:
+- asset_url("style.css") (a Jinja global) returns the hashed URL, or the plain
+  /static/style.css URL when the build step has not been run (local dev)
+- StaticAssets serves hashed files with Cache-Control: immutable and picks the
+  .br/.gz sibling that matches the request's Accept-Encoding
+"""
+import os
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import mimetypes
+from typing import Dict, Optional
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from compression import acceptable_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "static"
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+STATIC_URL = "/static"
+
+# Hashed files never change, so browsers may cache them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Only text formats benefit from precompression
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".html", ".json", ".txt", ".map"}
+
+# Precompressed sibling suffix per Content-Encoding, in server preference order
+ENCODED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+_manifest: Optional[Dict[str, str]] = None
+
+
+# ============================================================================
+# Build Step
+# ============================================================================
+
+def _hash_file(path: str) -> str:
+    """Return the first 12 hex chars of the file's SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def build_assets(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """
+    Fingerprint and precompress every file in static_dir.
+
+    Rebuilds static_dir/dist from scratch and returns the manifest.
+    """
+    dist_path = os.path.join(static_dir, DIST_DIR)
+    shutil.rmtree(dist_path, ignore_errors=True)
+    os.makedirs(dist_path)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        # Never fingerprint our own output
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_path]
+        for filename in sorted(files):
+            source = os.path.join(root, filename)
+            rel_path = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            stem, ext = os.path.splitext(rel_path)
+            hashed_rel = f"{stem}.{_hash_file(source)}{ext}"
+            target = os.path.join(dist_path, hashed_rel)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+
+            if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                with open(source, "rb") as f:
+                    data = f.read()
+                # mtime=0 keeps the .gz output byte-identical across builds
+                with open(target + ".gz", "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + ".br", "wb") as f:
+                        f.write(brotli.compress(data, quality=11))
+
+            manifest[rel_path] = f"{DIST_DIR}/{hashed_rel}"
+            print(f"[ASSETS] {rel_path} -> {manifest[rel_path]}")
+
+    with open(os.path.join(dist_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if brotli is None:
+        print("[ASSETS] brotli not installed - wrote .gz files only")
+    print(f"[ASSETS] Wrote {len(manifest)} asset(s) to {dist_path}")
+    return manifest
+
+
+# ============================================================================
+# Runtime
+# ============================================================================
+
+def load_manifest(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """Load (once) the manifest written by build_assets; empty if not built."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), encoding="utf-8") as f:
+                _manifest = json.load(f)
+            logger.info(f"[ASSETS] Loaded manifest with {len(_manifest)} hashed asset(s)")
+        except FileNotFoundError:
+            _manifest = {}
+            logger.info("[ASSETS] No asset manifest found - serving unhashed static files")
+        except Exception as e:
+            _manifest = {}
+            logger.warning(f"[ASSETS] Could not read asset manifest: {e}")
+    return _manifest
+
+
+def asset_url(path: str) -> str:
+    """Jinja global: URL for a static file, using its hashed name when built."""
+    path = path.lstrip("/")
+    return f"{STATIC_URL}/{load_manifest().get(path, path)}"
+
+
+class StaticAssets(StaticFiles):
+    """
+    StaticFiles with content negotiation and immutable caching for hashed assets.
+
+    Files under dist/ are served from their .br or .gz sibling when the client
+    accepts that encoding. Unhashed files keep StaticFiles' default
+    ETag/Last-Modified revalidation.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        dist_root = os.path.join(os.path.realpath(str(self.directory)), DIST_DIR) + os.sep
+        if not os.path.realpath(full_path).startswith(dist_root):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        # Same q-value negotiation as CompressionMiddleware; fall through to the next if a sibling is missing
+        for encoding in acceptable_encodings(accept_encoding, tuple(ENCODED_SUFFIXES)):
+            suffix = ENCODED_SUFFIXES[encoding]
+            try:
+                encoded_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            headers["Content-Encoding"] = encoding
+            return FileResponse(
+                full_path + suffix,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                method=scope["method"],
+                stat_result=encoded_stat,
+            )
+
+        return FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            method=scope["method"],
+            stat_result=stat_result,
+        )
+
+
+if __name__ == "__main__":
+    build_assets()
+    sys.exit(0)
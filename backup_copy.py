@@ -0,0 +1,776 @@
+#!/usr/bin/env python3
+"""
+Parallel COPY-based backup and restore (no pg_dump required).
+
+Backs up every table defined in models.py with COPY ... TO STDOUT, one
+table per connection on a thread pool, gzip-compressing each stream as it
+arrives. All workers share one exported snapshot (pg_export_snapshot), so
+the tables are consistent with each other, like pg_dump --jobs.
+
+Restore runs COPY ... FROM STDIN in foreign-key order (parents before
+children, deletes children first) inside a single transaction, then resets
+the id sequences. The ordering is what keeps foreign keys satisfied - the
+constraints in models.py are not DEFERRABLE. Either every table is restored
+or none is.
+
+Incremental backups (--incremental): each backup records a watermark (the
+database clock at snapshot time). The next run exports only rows whose
+updated_at is at or after the previous watermark (minus
+WATERMARK_OVERLAP_SECONDS, to catch transactions that were still open),
+plus the list of live id ranges per table so deletes can be replayed.
+A full backup is taken instead when there is no previous backup, when the
+last full one is older than FULL_BACKUP_INTERVAL_DAYS, or when the chain
+reaches MAX_INCREMENTAL_CHAIN. Restoring an incremental backup replays its
+full base and every incremental after it, in one transaction.
+
+Layout of a backup directory:
+
+    copy_YYYYMMDD_HHMMSS/
+        manifest.json       kind, parent, watermark, table order, columns,
+                            row counts, sha256 (+ id ranges if incremental)
+        <table>.copy.gz     PostgreSQL COPY text format
+
+Finished backups are recorded in backup_index.json next to them; use
+`python backup_storage.py prune` to enforce retention budgets (pruning
+never splits an incremental chain).
+
+SQLite fallback: when the URL is sqlite:/// (local development, or no
+DATABASE_URL at all) the same files are written and read through
+SQLAlchemy Core, encoding rows in COPY text format. A SQLite backup can be
+restored into PostgreSQL and vice versa.
+
+Usage:
+    python backup_copy.py backup [--out DIR] [--jobs 4] [--incremental] [--database-url URL]
+    python backup_copy.py restore DIR [--clean] [--database-url URL]
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import bisect
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+from sqlalchemy import (
+    Boolean, Date, DateTime, Float, Integer, Numeric,
+    create_engine, delete, func, insert, inspect, or_, select, text
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import Base
+import models  # noqa: F401 - registers the tables on Base
+from backup_storage import record_backup
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "copy-text.gz"
+MANIFEST_VERSION = 2
+
+DEFAULT_JOBS = int(os.getenv("BACKUP_JOBS", "4"))
+COMPRESSLEVEL = int(os.getenv("BACKUP_COMPRESSLEVEL", "6"))
+
+# Incremental chain policy
+FULL_BACKUP_INTERVAL_DAYS = int(os.getenv("FULL_BACKUP_INTERVAL_DAYS", "7"))
+MAX_INCREMENTAL_CHAIN = int(os.getenv("MAX_INCREMENTAL_CHAIN", "30"))
+WATERMARK_OVERLAP_SECONDS = int(os.getenv("WATERMARK_OVERLAP_SECONDS", "300"))
+WATERMARK_COLUMN = "updated_at"
+
+# Rows per INSERT batch / read batch on the SQLite path
+SQLITE_BATCH_SIZE = 5000
+
+# Gaps-and-islands: contiguous id runs, so a mostly-dense table is a handful of ranges
+ID_RANGES_SQL = (
+    "SELECT MIN(id), MAX(id) FROM "
+    "(SELECT id, id - ROW_NUMBER() OVER (ORDER BY id) AS grp FROM {table}) runs "
+    "GROUP BY grp ORDER BY 1"
+)
+
+
+def log(message):
+    """Print timestamped log message"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+
+def resolve_database_url(database_url=None):
+    """DATABASE_URL from the argument or environment, defaulting to the local SQLite file."""
+    url = database_url or os.getenv("DATABASE_URL") or "sqlite:///./crm.db"
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def is_sqlite(url):
+    return url.startswith("sqlite")
+
+
+def _libpq_url(url):
+    """psycopg wants a plain libpq URL, not a SQLAlchemy driver URL."""
+    return url.replace("postgresql+psycopg://", "postgresql://", 1)
+
+
+def model_tables():
+    """Tables from models.py, parents before children."""
+    return list(Base.metadata.sorted_tables)
+
+
+# ============================================================================
+# COPY text format (used directly on the SQLite path)
+# ============================================================================
+
+_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_ESCAPE_RE = re.compile(r"[\\\t\n\r]")
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", "v": "\v"}
+_UNESCAPE_RE = re.compile(r"\\(.)")
+
+
+def encode_copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group(0)], str(value))
+
+
+def encode_copy_row(values):
+    return "\t".join(encode_copy_value(v) for v in values) + "\n"
+
+
+def decode_copy_line(line):
+    """Split one COPY text line into raw strings (None for NULL)."""
+    return [
+        None if field == "\\N" else _UNESCAPE_RE.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), field)
+        for field in line.rstrip("\n").split("\t")
+    ]
+
+
+def _parse_datetime(value):
+    # PostgreSQL writes '2024-01-02 03:04:05.123+00'; fromisoformat wants +00:00
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value)
+
+
+def _converter(column):
+    """Function turning a COPY text field back into the column's Python type."""
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return lambda v: v in ("t", "true", "1", "True")
+    if isinstance(column_type, Integer):
+        return int
+    if isinstance(column_type, (Float, Numeric)):
+        return float
+    if isinstance(column_type, DateTime):
+        return _parse_datetime
+    if isinstance(column_type, Date):
+        return lambda v: date.fromisoformat(v[:10])
+    return lambda v: v
+
+
+# ============================================================================
+# Backup chain
+# ============================================================================
+
+def _read_manifest(backup_dir):
+    with open(Path(backup_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_manifest(backup_dir):
+    manifest = _read_manifest(backup_dir)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"Not a COPY backup: format={manifest.get('format')!r}")
+    return manifest
+
+
+def find_latest_backup(root):
+    """Newest complete backup directory under root, or None."""
+    candidates = sorted(
+        (p for p in Path(root).glob("copy_*") if p.is_dir() and (p / MANIFEST_NAME).exists()),
+        key=lambda p: p.name
+    )
+    for path in reversed(candidates):
+        try:
+            _load_manifest(path)
+            return path
+        except Exception:
+            continue
+    return None
+
+
+def backup_chain(backup_dir):
+    """[(dir, manifest), ...] from the full base to backup_dir."""
+    chain = []
+    path = Path(backup_dir)
+    while True:
+        manifest = _load_manifest(path)
+        chain.append((path, manifest))
+        if manifest.get("kind", "full") == "full":
+            break
+        path = path.parent / manifest["parent"]
+    chain.reverse()
+    return chain
+
+
+def plan_backup(root, url):
+    """
+    Decide between a full and an incremental backup.
+
+    Returns (parent_dir, parent_manifest, chain_length) for an incremental
+    backup, or None for a full one.
+    """
+    latest = find_latest_backup(root)
+    if latest is None:
+        log("No previous backup found - taking a full backup")
+        return None
+    try:
+        chain = backup_chain(latest)
+    except Exception as e:
+        log(f"⚠️  Backup chain ending at {latest.name} is broken ({e}) - taking a full backup")
+        return None
+
+    base_dir, base = chain[0]
+    parent_dir, parent = chain[-1]
+    if parent.get("dialect") != ("sqlite" if is_sqlite(url) else "postgresql") or not parent.get("watermark"):
+        log("Previous backup is from another database - taking a full backup")
+        return None
+    base_age = datetime.now() - datetime.fromisoformat(base["backup_timestamp"])
+    if base_age >= timedelta(days=FULL_BACKUP_INTERVAL_DAYS):
+        log(f"Last full backup {base_dir.name} is {base_age.days} day(s) old - taking a full backup")
+        return None
+    if len(chain) > MAX_INCREMENTAL_CHAIN:
+        log(f"Chain from {base_dir.name} has {len(chain) - 1} incremental(s) - taking a full backup")
+        return None
+    return parent_dir, parent, len(chain)
+
+
+def _since(watermark):
+    """Lower bound for changed rows, given the previous backup's watermark."""
+    return _parse_datetime(watermark) - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+
+
+# ============================================================================
+# Backup
+# ============================================================================
+
+class _HashingWriter:
+    """File wrapper that hashes and counts the compressed bytes written."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+class _TableWriter:
+    """gzip output for one table, counting rows as COPY data passes through."""
+
+    def __init__(self, path):
+        self.path = path
+        self.row_count = 0
+        self._raw = open(path, "wb")
+        self._hashing = _HashingWriter(self._raw)
+        self._gz = gzip.GzipFile(filename="", mode="wb", fileobj=self._hashing,
+                                 compresslevel=COMPRESSLEVEL, mtime=0)
+
+    def write(self, data):
+        # COPY text format escapes embedded newlines, so each b"\n" ends a row
+        self.row_count += data.count(b"\n")
+        self._gz.write(data)
+
+    def close(self):
+        self._gz.close()
+        self._raw.close()
+
+    def manifest_entry(self, columns, mode="full", id_ranges=None):
+        entry = {
+            "file": self.path.name,
+            "columns": columns,
+            "mode": mode,
+            "row_count": self.row_count,
+            "sha256": self._hashing.sha256.hexdigest(),
+            "bytes": self._hashing.size,
+        }
+        if id_ranges is not None:
+            entry["id_ranges"] = id_ranges
+        return entry
+
+
+def _present_columns(table, existing):
+    """Model columns that exist in the database (tolerates schema drift)."""
+    return [c.name for c in table.columns if c.name in existing]
+
+
+def _backup_table_postgres(url, snapshot, table, out_dir, since=None):
+    import psycopg
+    from psycopg import sql
+
+    with psycopg.connect(_libpq_url(url)) as conn:
+        conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        conn.read_only = True
+        with conn.cursor() as cur:
+            # Must be the first statement of the transaction
+            cur.execute(sql.SQL("SET TRANSACTION SNAPSHOT {}").format(sql.Literal(snapshot)))
+            cur.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = %s",
+                (table.name,)
+            )
+            columns = _present_columns(table, {row[0] for row in cur.fetchall()})
+            column_list = sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+
+            mode = "full"
+            id_ranges = None
+            if since is None:
+                copy_sql = sql.SQL("COPY {} ({}) TO STDOUT").format(sql.Identifier(table.name), column_list)
+            else:
+                if WATERMARK_COLUMN in columns:
+                    mode = "changed"
+                    copy_sql = sql.SQL("COPY (SELECT {} FROM {} WHERE {} >= {} OR {} IS NULL) TO STDOUT").format(
+                        column_list, sql.Identifier(table.name),
+                        sql.Identifier(WATERMARK_COLUMN), sql.Literal(since), sql.Identifier(WATERMARK_COLUMN)
+                    )
+                else:
+                    copy_sql = sql.SQL("COPY {} ({}) TO STDOUT").format(sql.Identifier(table.name), column_list)
+                cur.execute(sql.SQL(ID_RANGES_SQL).format(table=sql.Identifier(table.name)))
+                id_ranges = [[lo, hi] for lo, hi in cur.fetchall()]
+
+            writer = _TableWriter(out_dir / f"{table.name}.copy.gz")
+            try:
+                with cur.copy(copy_sql) as copy:
+                    for data in copy:
+                        writer.write(bytes(data))
+            finally:
+                writer.close()
+        conn.rollback()
+    return writer.manifest_entry(columns, mode, id_ranges)
+
+
+def _backup_table_sqlite(engine, table, out_dir, since=None):
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    columns = _present_columns(table, existing)
+    query = select(*(table.c[name] for name in columns)).order_by(*table.primary_key.columns)
+
+    mode = "full"
+    id_ranges = None
+    writer = _TableWriter(out_dir / f"{table.name}.copy.gz")
+    try:
+        with engine.connect() as conn:
+            if since is not None:
+                if WATERMARK_COLUMN in columns:
+                    mode = "changed"
+                    watermark_col = table.c[WATERMARK_COLUMN]
+                    query = query.where(or_(watermark_col >= since, watermark_col.is_(None)))
+                id_ranges = [[lo, hi] for lo, hi in conn.execute(text(ID_RANGES_SQL.format(table=table.name)))]
+            result = conn.execution_options(stream_results=True).execute(query)
+            for rows in result.partitions(SQLITE_BATCH_SIZE):
+                writer.write("".join(encode_copy_row(row) for row in rows).encode("utf-8"))
+    finally:
+        writer.close()
+    return writer.manifest_entry(columns, mode, id_ranges)
+
+
+def _write_manifest(out_dir, manifest):
+    tmp_path = out_dir / f"{MANIFEST_NAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, out_dir / MANIFEST_NAME)
+
+
+def backup(database_url=None, out_dir=None, jobs=DEFAULT_JOBS, incremental=False):
+    """
+    Back up every model table into out_dir (default copy_<timestamp>).
+
+    With incremental=True, previous backups are looked up next to out_dir
+    and only rows changed since the newest one are exported (see
+    plan_backup for when a full backup is taken instead).
+
+    Returns the manifest dict. Raises on failure, leaving only a .partial
+    directory behind.
+    """
+    url = resolve_database_url(database_url)
+    tables = model_tables()
+    out_dir = Path(out_dir or f"copy_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    plan = plan_backup(out_dir.parent, url) if incremental else None
+    since = _since(plan[1]["watermark"]) if plan else None
+
+    partial_dir = out_dir.with_name(out_dir.name + ".partial")
+    partial_dir.mkdir(parents=True, exist_ok=False)
+
+    started = datetime.now()
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "kind": "incremental" if plan else "full",
+        "parent": plan[0].name if plan else None,
+        "chain_length": plan[2] if plan else 0,
+        "since": since.isoformat() if since else None,
+        "dialect": "sqlite" if is_sqlite(url) else "postgresql",
+        "backup_timestamp": started.isoformat(),
+        "table_order": [t.name for t in tables],
+        "tables": {},
+    }
+
+    log(f"Backing up {len(tables)} tables with {jobs} job(s) "
+        f"({manifest['dialect']}, {manifest['kind']}{' since ' + manifest['since'] if since else ''})")
+
+    if is_sqlite(url):
+        engine = create_engine(url, pool_size=jobs, connect_args={"check_same_thread": False})
+        try:
+            with engine.connect() as conn:
+                manifest["watermark"] = _parse_datetime(conn.execute(text("SELECT CURRENT_TIMESTAMP")).scalar()).isoformat()
+            existing_tables = set(inspect(engine).get_table_names())
+            work = [t for t in tables if t.name in existing_tables]
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {t.name: pool.submit(_backup_table_sqlite, engine, t, partial_dir, since) for t in work}
+                for name, future in futures.items():
+                    manifest["tables"][name] = future.result()
+        finally:
+            engine.dispose()
+    else:
+        import psycopg
+
+        # The coordinator holds the snapshot open until every worker has copied its table
+        with psycopg.connect(_libpq_url(url)) as coordinator:
+            coordinator.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+            coordinator.read_only = True
+            with coordinator.cursor() as cur:
+                cur.execute("SELECT pg_export_snapshot(), now()")
+                snapshot, watermark = cur.fetchone()
+                manifest["watermark"] = watermark.isoformat()
+                cur.execute(
+                    "SELECT table_name FROM information_schema.tables "
+                    "WHERE table_schema = 'public' AND table_type = 'BASE TABLE'"
+                )
+                existing_tables = {row[0] for row in cur.fetchall()}
+            work = [t for t in tables if t.name in existing_tables]
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                futures = {t.name: pool.submit(_backup_table_postgres, url, snapshot, t, partial_dir, since) for t in work}
+                for name, future in futures.items():
+                    manifest["tables"][name] = future.result()
+            coordinator.rollback()
+
+    for name, entry in manifest["tables"].items():
+        changed = " changed" if entry["mode"] == "changed" else ""
+        log(f"  ✅ {name}: {entry['row_count']}{changed} rows ({entry['bytes'] / 1024:.1f} KB)")
+
+    manifest["completed_timestamp"] = datetime.now().isoformat()
+    _write_manifest(partial_dir, manifest)
+    partial_dir.rename(out_dir)
+    record_backup(out_dir.parent, out_dir)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    total_rows = sum(t["row_count"] for t in manifest["tables"].values())
+    log(f"✅ {manifest['kind'].capitalize()} backup created: {out_dir} ({total_rows} rows in {elapsed:.1f}s)")
+    return manifest
+
+
+# ============================================================================
+# Restore
+# ============================================================================
+
+def _iter_file_chunks(path, expected_sha256, chunk_size=1024 * 1024):
+    """Yield decompressed chunks, verifying the file checksum up front."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(block)
+    if sha256.hexdigest() != expected_sha256:
+        raise ValueError(f"Checksum mismatch for {path.name}")
+    with gzip.open(path, "rb") as gz:
+        for chunk in iter(lambda: gz.read(chunk_size), b""):
+            yield chunk
+
+
+def _restore_order(manifest):
+    """Tables to restore, parents first (model order, then anything else in the backup)."""
+    order = [t.name for t in model_tables()]
+    return [n for n in order if n in manifest["tables"]] + [n for n in manifest["tables"] if n not in order]
+
+
+def _ids_outside(ids, id_ranges):
+    """ids (sorted) not covered by any [lo, hi] range."""
+    starts = [lo for lo, _ in id_ranges]
+    outside = []
+    for id_ in ids:
+        i = bisect.bisect_right(starts, id_) - 1
+        if i < 0 or id_ > id_ranges[i][1]:
+            outside.append(id_)
+    return outside
+
+
+def _postgres_columns(cur, name):
+    cur.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = 'public' AND table_name = %s",
+        (name,)
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def _copy_in_postgres(cur, target, columns, path, sha256):
+    from psycopg import sql
+
+    copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(target),
+        sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+    )
+    with cur.copy(copy_sql) as copy:
+        for chunk in _iter_file_chunks(path, sha256):
+            copy.write(chunk)
+
+
+def _apply_full_postgres(cur, backup_dir, manifest, clean):
+    from psycopg import sql
+
+    names = _restore_order(manifest)
+    if clean:
+        cur.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+            sql.SQL(", ").join(sql.Identifier(n) for n in names)
+        ))
+    for name in names:
+        entry = manifest["tables"][name]
+        existing = _postgres_columns(cur, name)
+        if not existing:
+            log(f"  ⚠️  {name}: table missing in target, skipped")
+            continue
+        missing = [c for c in entry["columns"] if c not in existing]
+        if missing:
+            # COPY needs every column in the file; refuse rather than mis-align data
+            raise ValueError(f"{name}: target is missing column(s) {', '.join(missing)}")
+        if not clean:
+            cur.execute(sql.SQL("SELECT EXISTS (SELECT 1 FROM {})").format(sql.Identifier(name)))
+            if cur.fetchone()[0]:
+                raise ValueError(f"{name} is not empty; use --clean to replace existing data")
+
+        _copy_in_postgres(cur, name, entry["columns"], Path(backup_dir) / entry["file"], entry["sha256"])
+        log(f"  ✅ {name}: {entry['row_count']} rows")
+
+
+def _apply_incremental_postgres(cur, backup_dir, manifest):
+    from psycopg import sql
+
+    names = [n for n in _restore_order(manifest) if _postgres_columns(cur, n)]
+
+    # Deletes first, children before parents
+    for name in reversed(names):
+        id_ranges = manifest["tables"][name].get("id_ranges")
+        if id_ranges is None:
+            continue
+        cur.execute(
+            sql.SQL(
+                "DELETE FROM {t} WHERE NOT EXISTS ("
+                "SELECT 1 FROM unnest(%s::int[], %s::int[]) AS r(lo, hi) WHERE {t}.id BETWEEN r.lo AND r.hi)"
+            ).format(t=sql.Identifier(name)),
+            ([lo for lo, _ in id_ranges], [hi for _, hi in id_ranges])
+        )
+        if cur.rowcount:
+            log(f"  🗑️  {name}: {cur.rowcount} deleted")
+
+    # Then upsert changed rows, parents before children
+    for name in names:
+        entry = manifest["tables"][name]
+        if not entry["row_count"]:
+            continue
+        staging = f"_restore_{name}"
+        columns = entry["columns"]
+        cur.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(
+            sql.Identifier(staging), sql.Identifier(name)
+        ))
+        _copy_in_postgres(cur, staging, columns, Path(backup_dir) / entry["file"], entry["sha256"])
+        column_list = sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+        cur.execute(sql.SQL(
+            "INSERT INTO {t} ({cols}) SELECT {cols} FROM {s} "
+            "ON CONFLICT (id) DO UPDATE SET {updates}"
+        ).format(
+            t=sql.Identifier(name),
+            cols=column_list,
+            s=sql.Identifier(staging),
+            updates=sql.SQL(", ").join(
+                sql.SQL("{c} = EXCLUDED.{c}").format(c=sql.Identifier(c)) for c in columns if c != "id"
+            )
+        ))
+        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(staging)))
+        log(f"  ✅ {name}: {entry['row_count']} changed rows")
+
+
+def _restore_postgres(url, chain, clean):
+    import psycopg
+    from psycopg import sql
+
+    with psycopg.connect(_libpq_url(url)) as conn:
+        with conn.cursor() as cur:
+            # No SET CONSTRAINTS ... DEFERRED: the FKs aren't DEFERRABLE, so _restore_order does the work
+            for backup_dir, manifest in chain:
+                log(f"Applying {manifest.get('kind', 'full')} backup {backup_dir.name}")
+                if manifest.get("kind", "full") == "full":
+                    _apply_full_postgres(cur, backup_dir, manifest, clean)
+                else:
+                    _apply_incremental_postgres(cur, backup_dir, manifest)
+
+            for name in _restore_order(chain[-1][1]):
+                if "id" in chain[-1][1]["tables"][name]["columns"]:
+                    # COPY bypasses the serial default; move the sequence past the restored ids
+                    cur.execute(sql.SQL(
+                        "SELECT setval(pg_get_serial_sequence({table}, 'id'), "
+                        "COALESCE((SELECT MAX(id) FROM {ident}), 1), "
+                        "(SELECT MAX(id) FROM {ident}) IS NOT NULL)"
+                    ).format(table=sql.Literal(name), ident=sql.Identifier(name)))
+        conn.commit()
+
+
+def _iter_sqlite_batches(backup_dir, entry, table):
+    """Decode a table file into batches of column dicts typed for table."""
+    columns = [c for c in entry["columns"] if c in table.c]
+    positions = [entry["columns"].index(c) for c in columns]
+    converters = [_converter(table.c[c]) for c in columns]
+
+    batch = []
+    pending = b""
+    for chunk in _iter_file_chunks(Path(backup_dir) / entry["file"], entry["sha256"]):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            raw = decode_copy_line(line.decode("utf-8"))
+            batch.append({
+                col: (None if raw[pos] is None else convert(raw[pos]))
+                for col, pos, convert in zip(columns, positions, converters)
+            })
+        if len(batch) >= SQLITE_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _apply_full_sqlite(conn, backup_dir, manifest, tables, clean):
+    names = [n for n in _restore_order(manifest) if n in tables]
+    skipped = [n for n in manifest["tables"] if n not in tables]
+    if skipped:
+        log(f"  ⚠️  Not in models.py, skipped: {', '.join(skipped)}")
+
+    if clean:
+        for name in reversed(names):
+            conn.execute(delete(tables[name]))
+    for name in names:
+        table = tables[name]
+        if not clean and conn.execute(select(func.count()).select_from(table)).scalar():
+            raise ValueError(f"{name} is not empty; use --clean to replace existing data")
+        for batch in _iter_sqlite_batches(backup_dir, manifest["tables"][name], table):
+            conn.execute(insert(table), batch)
+        log(f"  ✅ {name}: {manifest['tables'][name]['row_count']} rows")
+
+
+def _apply_incremental_sqlite(conn, backup_dir, manifest, tables):
+    names = [n for n in _restore_order(manifest) if n in tables]
+
+    for name in reversed(names):
+        id_ranges = manifest["tables"][name].get("id_ranges")
+        if id_ranges is None:
+            continue
+        table = tables[name]
+        ids = [row[0] for row in conn.execute(select(table.c.id).order_by(table.c.id))]
+        stale = _ids_outside(ids, id_ranges)
+        for i in range(0, len(stale), 500):
+            conn.execute(delete(table).where(table.c.id.in_(stale[i:i + 500])))
+        if stale:
+            log(f"  🗑️  {name}: {len(stale)} deleted")
+
+    for name in names:
+        table = tables[name]
+        entry = manifest["tables"][name]
+        if not entry["row_count"]:
+            continue
+        columns = [c for c in entry["columns"] if c in table.c]
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={c: stmt.excluded[c] for c in columns if c != "id"}
+        )
+        for batch in _iter_sqlite_batches(backup_dir, entry, table):
+            conn.execute(stmt, batch)
+        log(f"  ✅ {name}: {entry['row_count']} changed rows")
+
+
+def _restore_sqlite(url, chain, clean):
+    tables = {t.name: t for t in model_tables()}
+    engine = create_engine(url)
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+            for backup_dir, manifest in chain:
+                log(f"Applying {manifest.get('kind', 'full')} backup {backup_dir.name}")
+                if manifest.get("kind", "full") == "full":
+                    _apply_full_sqlite(conn, backup_dir, manifest, tables, clean)
+                else:
+                    _apply_incremental_sqlite(conn, backup_dir, manifest, tables)
+    finally:
+        engine.dispose()
+
+
+def restore(backup_dir, database_url=None, clean=False):
+    """
+    Restore a backup directory in one transaction.
+
+    An incremental backup is restored by replaying its full base and every
+    incremental up to and including backup_dir. Without clean, every
+    target table must be empty. With clean, existing rows are removed
+    first (TRUNCATE ... RESTART IDENTITY on PostgreSQL).
+    """
+    url = resolve_database_url(database_url)
+    chain = backup_chain(backup_dir)
+    started = datetime.now()
+    log(f"Restoring {backup_dir} ({len(chain)} backup(s) in chain, {'sqlite' if is_sqlite(url) else 'postgresql'})")
+
+    if is_sqlite(url):
+        _restore_sqlite(url, chain, clean)
+    else:
+        _restore_postgres(url, chain, clean)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    log(f"✅ Restore completed in {elapsed:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="COPY-based parallel backup and restore")
+    parser.add_argument("--database-url", default=None, help="Defaults to $DATABASE_URL, then sqlite:///./crm.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backup", help="Back up all model tables")
+    p.add_argument("--out", default=None, help="Output directory (default copy_<timestamp>)")
+    p.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Tables copied in parallel")
+    p.add_argument("--incremental", action="store_true",
+                   help="Export only rows changed since the newest backup next to --out")
+
+    p = sub.add_parser("restore", help="Restore a backup directory (and its chain)")
+    p.add_argument("backup_dir")
+    p.add_argument("--clean", action="store_true", help="Delete existing rows before restoring")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "backup":
+            backup(args.database_url, args.out, max(1, args.jobs), args.incremental)
+        else:
+            restore(args.backup_dir, args.database_url, args.clean)
+        return 0
+    except Exception as e:
+        log(f"❌ {args.command.capitalize()} failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
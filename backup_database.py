@@ -9,6 +9,7 @@ import subprocess
 import sys
 from datetime import datetime
 import requests
+from backup_storage import cleanup_backups, record_backup
 
 # Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -95,6 +96,8 @@ def backup_database():
                 size = os.path.getsize(backup_filename)
                 size_mb = size / (1024 * 1024)
                 log(f"Backup size: {size_mb:.2f} MB")
+                # pg_dump -F c output is already compressed; just index it for retention
+                record_backup(".", backup_filename, format="pg_dump-custom")
             
             # Optional: Upload to cloud storage or send webhook
             if BACKUP_WEBHOOK:
@@ -117,28 +120,8 @@ def backup_database():
         return False
 
 def cleanup_old_backups(days_to_keep=7):
-    """Remove backup files older than specified days"""
-    try:
-        import glob
-        from pathlib import Path
-        
-        backup_dir = Path(".")
-        backup_files = list(backup_dir.glob("backup_*.sql"))
-        
-        cutoff_date = datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60)
-        
-        deleted_count = 0
-        for backup_file in backup_files:
-            if backup_file.stat().st_mtime < cutoff_date:
-                backup_file.unlink()
-                deleted_count += 1
-                log(f"Deleted old backup: {backup_file.name}")
-        
-        if deleted_count > 0:
-            log(f"Cleaned up {deleted_count} old backup(s)")
-        
-    except Exception as e:
-        log(f"⚠️  Error during cleanup: {e}")
+    """Prune backups by age, total size and count (see backup_storage.prune)"""
+    cleanup_backups(".", days_to_keep=days_to_keep)
 
 if __name__ == "__main__":
     log("=" * 50)
@@ -3,12 +3,40 @@
 Database Backup Script for Render (Python-only version)
 Uses psycopg to backup PostgreSQL database without requiring pg_dump
 Runs hourly to backup PostgreSQL database
+
+Each backup is a directory:
+
+    backup_YYYYMMDD_HHMMSS/
+        manifest.json          tables, columns, row counts, checksums
+        <table>.ndjson.zst     one JSON array per row, in column order
+                               (.ndjson.gz when zstandard isn't installed)
+
+Rows are read through a named (server-side) cursor in batches of
+BACKUP_ITERSIZE and streamed into a backup_storage.ChunkedCompressor,
+which compresses fixed-size chunks on a process pool, so memory use stays
+flat no matter how large a table is and compression uses several cores.
+All tables are read in one REPEATABLE READ transaction, so the backup is
+a consistent snapshot. Each table is read under its own savepoint; a table
+that fails is rolled back to it and listed under the manifest's errors,
+and the remaining tables still come from the same snapshot.
+
+The directory is written as backup_...partial and renamed once the manifest
+is in place - a directory without .partial is always complete. Finished
+backups are recorded in backup_index.json and pruned by age, total size
+(BACKUP_MAX_BYTES) and count (BACKUP_MAX_COUNT); see backup_storage.py.
+
+Usage:
+    python backup_database_python.py                # backup + cleanup
+    python backup_database_python.py verify <dir>   # re-check checksums
 """
 
 import os
 import sys
-from datetime import datetime
 import json
+import hashlib
+from datetime import datetime, date, time
+from decimal import Decimal
+from pathlib import Path
 
 try:
     import psycopg
@@ -17,9 +45,20 @@ except ImportError:
     print("ERROR: psycopg not installed. Install with: pip install psycopg[binary]")
     sys.exit(1)
 
+from backup_storage import (
+    ChunkedCompressor, CODEC_EXTENSIONS, BACKUP_COMPRESS_WORKERS,
+    cleanup_backups, compression_pool, default_codec, open_decompressed, record_backup
+)
+
 # Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
 BACKUP_TOKEN = os.getenv("BACKUP_TOKEN", "change-me-in-production")
+BACKUP_DIR = os.getenv("BACKUP_DIR", ".")
+BACKUP_ITERSIZE = int(os.getenv("BACKUP_ITERSIZE", "5000"))
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "ndjson"
+MANIFEST_VERSION = 3
 
 def log(message):
     """Print timestamped log message"""
@@ -30,154 +69,231 @@ def get_table_names(conn):
     """Get list of all tables in the database"""
     with conn.cursor() as cur:
         cur.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public' 
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = 'public'
             AND table_type = 'BASE TABLE'
             ORDER BY table_name;
         """)
         return [row[0] for row in cur.fetchall()]
 
-def backup_table(conn, table_name):
-    """Backup a single table's data"""
+def get_table_columns(conn, table_name):
+    """Get (column_name, data_type) pairs for a table, in column order"""
     with conn.cursor() as cur:
-        # Get table structure
-        cur.execute(f"""
-            SELECT column_name, data_type, character_maximum_length
+        cur.execute("""
+            SELECT column_name, data_type
             FROM information_schema.columns
-            WHERE table_name = %s
+            WHERE table_schema = 'public'
+            AND table_name = %s
             ORDER BY ordinal_position;
         """, (table_name,))
-        columns = cur.fetchall()
-        
-        # Get all data
-        cur.execute(sql.SQL("SELECT * FROM {}").format(sql.Identifier(table_name)))
-        rows = cur.fetchall()
-        
-        return {
-            "table_name": table_name,
-            "columns": [col[0] for col in columns],
-            "column_types": {col[0]: col[1] for col in columns},
-            "row_count": len(rows),
-            "data": [[str(val) if val is not None else None for val in row] for row in rows]
-        }
+        return cur.fetchall()
+
+def _json_default(value):
+    """JSON encoder for the column types json can't handle natively"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+def backup_table(conn, table_name, out_path, itersize=BACKUP_ITERSIZE, executor=None, codec=None):
+    """
+    Stream one table into out_path as compressed NDJSON.
+
+    Returns the table's manifest entry. Only one batch of rows (plus the
+    chunks being compressed) is held in memory at a time.
+    """
+    columns = get_table_columns(conn, table_name)
+    column_names = [col[0] for col in columns]
+
+    content_sha256 = hashlib.sha256()
+    row_count = 0
+
+    select = sql.SQL("SELECT {} FROM {}").format(
+        sql.SQL(", ").join(sql.Identifier(name) for name in column_names),
+        sql.Identifier(table_name)
+    )
+
+    with open(out_path, "wb") as raw:
+        with ChunkedCompressor(raw, codec, executor) as compressor:
+            # Named cursor = server-side cursor; rows arrive itersize at a time
+            with conn.cursor(name=f"backup_{table_name}") as cur:
+                cur.itersize = itersize
+                cur.execute(select)
+                while True:
+                    rows = cur.fetchmany(itersize)
+                    if not rows:
+                        break
+                    chunk = "".join(
+                        json.dumps(row, default=_json_default, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for row in rows
+                    ).encode("utf-8")
+                    content_sha256.update(chunk)
+                    compressor.write(chunk)
+                    row_count += len(rows)
+
+    return {
+        "file": out_path.name,
+        "codec": compressor.codec,
+        "columns": column_names,
+        "column_types": {col[0]: col[1] for col in columns},
+        "row_count": row_count,
+        "sha256": compressor.sha256.hexdigest(),
+        "content_sha256": content_sha256.hexdigest(),
+        "bytes": compressor.size
+    }
+
+def _write_manifest(backup_path, manifest):
+    """Write manifest.json atomically"""
+    tmp_path = backup_path / f"{MANIFEST_NAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, backup_path / MANIFEST_NAME)
 
 def backup_database():
     """Create a backup of the PostgreSQL database"""
-    
+
     if not DATABASE_URL:
         log("ERROR: DATABASE_URL environment variable not set")
         return False
-    
+
     try:
         log(f"Connecting to database...")
-        
+
         # Connect to database
         conn = psycopg.connect(DATABASE_URL)
-        
+
         try:
+            # One read-only snapshot for every table
+            conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+            conn.read_only = True
+
             # Get all tables
             tables = get_table_names(conn)
             log(f"Found {len(tables)} tables: {', '.join(tables)}")
-            
+
             if not tables:
                 log("⚠️  No tables found in database")
                 return True
-            
-            # Backup each table
-            backup_data = {
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            backup_path = Path(BACKUP_DIR) / f"backup_{timestamp}"
+            partial_path = backup_path.with_name(backup_path.name + ".partial")
+            partial_path.mkdir(parents=True, exist_ok=True)
+
+            manifest = {
+                "format": MANIFEST_FORMAT,
+                "version": MANIFEST_VERSION,
                 "backup_timestamp": datetime.now().isoformat(),
                 "database_url": DATABASE_URL.split("@")[-1] if "@" in DATABASE_URL else "hidden",
-                "tables": {}
+                "tables": {},
+                "errors": {}
             }
-            
-            for table in tables:
-                log(f"Backing up table: {table}")
-                try:
-                    table_data = backup_table(conn, table)
-                    backup_data["tables"][table] = table_data
-                    log(f"  ✅ {table}: {table_data['row_count']} rows")
-                except Exception as e:
-                    log(f"  ❌ Error backing up {table}: {e}")
-                    backup_data["tables"][table] = {"error": str(e)}
-            
-            # Save backup to file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"backup_{timestamp}.json"
-            
-            with open(backup_filename, "w", encoding="utf-8") as f:
-                json.dump(backup_data, f, indent=2, ensure_ascii=False)
-            
-            # Get file size
-            size = os.path.getsize(backup_filename)
-            size_mb = size / (1024 * 1024)
-            
-            log(f"✅ Backup created: {backup_filename} ({size_mb:.2f} MB)")
-            
-            # Also create a compressed version if data is large
-            if size > 1024 * 1024:  # If larger than 1MB
-                try:
-                    import gzip
-                    compressed_filename = f"{backup_filename}.gz"
-                    with open(backup_filename, "rb") as f_in:
-                        with gzip.open(compressed_filename, "wb") as f_out:
-                            f_out.writelines(f_in)
-                    compressed_size = os.path.getsize(compressed_filename) / (1024 * 1024)
-                    log(f"✅ Compressed backup: {compressed_filename} ({compressed_size:.2f} MB)")
-                    # Optionally remove uncompressed version to save space
-                    # os.remove(backup_filename)
-                except ImportError:
-                    log("⚠️  gzip not available, skipping compression")
-            
-            return True
-            
+
+            codec = default_codec()
+            extension = CODEC_EXTENSIONS[codec]
+            executor = compression_pool(BACKUP_COMPRESS_WORKERS)
+            try:
+                for table in tables:
+                    log(f"Backing up table: {table}")
+                    try:
+                        # Savepoint per table: a failure rolls back to it, keeping the
+                        # snapshot transaction (rollback() would start a new snapshot)
+                        with conn.transaction():
+                            entry = backup_table(conn, table, partial_path / f"{table}.ndjson{extension}",
+                                                 executor=executor, codec=codec)
+                        manifest["tables"][table] = entry
+                        log(f"  ✅ {table}: {entry['row_count']} rows ({entry['bytes'] / (1024 * 1024):.2f} MB)")
+                    except Exception as e:
+                        log(f"  ❌ Error backing up {table}: {e}")
+                        manifest["errors"][table] = str(e)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+            conn.rollback()
+
+            manifest["completed_timestamp"] = datetime.now().isoformat()
+            _write_manifest(partial_path, manifest)
+            partial_path.rename(backup_path)
+            record_backup(BACKUP_DIR, backup_path)
+
+            total_rows = sum(t["row_count"] for t in manifest["tables"].values())
+            size_mb = sum(t["bytes"] for t in manifest["tables"].values()) / (1024 * 1024)
+            log(f"✅ Backup created: {backup_path} ({total_rows} rows, {size_mb:.2f} MB)")
+
+            return not manifest["errors"]
+
         finally:
             conn.close()
-            
+
     except Exception as e:
         log(f"❌ Error during backup: {str(e)}")
         import traceback
         log(traceback.format_exc())
         return False
 
+def verify_backup(backup_path):
+    """
+    Re-check every table file against the manifest (file checksum, content
+    checksum and row count). Streams each file, so memory stays flat.
+    """
+    backup_path = Path(backup_path)
+    with open(backup_path / MANIFEST_NAME, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    ok = True
+    for table, entry in manifest["tables"].items():
+        file_path = backup_path / entry["file"]
+        file_sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                file_sha256.update(block)
+
+        content_sha256 = hashlib.sha256()
+        row_count = 0
+        with open_decompressed(file_path) as stream:
+            for line in stream:
+                content_sha256.update(line)
+                row_count += 1
+
+        problems = []
+        if file_sha256.hexdigest() != entry["sha256"]:
+            problems.append("file checksum mismatch")
+        if content_sha256.hexdigest() != entry["content_sha256"]:
+            problems.append("content checksum mismatch")
+        if row_count != entry["row_count"]:
+            problems.append(f"{row_count} rows, manifest says {entry['row_count']}")
+
+        if problems:
+            ok = False
+            log(f"  ❌ {table}: {', '.join(problems)}")
+        else:
+            log(f"  ✅ {table}: {row_count} rows")
+
+    return ok
+
 def cleanup_old_backups(days_to_keep=7):
-    """Remove backup files older than specified days"""
-    try:
-        import glob
-        from pathlib import Path
-        
-        backup_dir = Path(".")
-        backup_files = list(backup_dir.glob("backup_*.json*"))
-        
-        cutoff_date = datetime.now().timestamp() - (days_to_keep * 24 * 60 * 60)
-        
-        deleted_count = 0
-        total_size_freed = 0
-        for backup_file in backup_files:
-            if backup_file.stat().st_mtime < cutoff_date:
-                size = backup_file.stat().st_size
-                backup_file.unlink()
-                deleted_count += 1
-                total_size_freed += size
-                log(f"Deleted old backup: {backup_file.name}")
-        
-        if deleted_count > 0:
-            size_mb = total_size_freed / (1024 * 1024)
-            log(f"Cleaned up {deleted_count} old backup(s), freed {size_mb:.2f} MB")
-        
-    except Exception as e:
-        log(f"⚠️  Error during cleanup: {e}")
+    """Prune backups by age, total size and count (see backup_storage.prune)"""
+    cleanup_backups(BACKUP_DIR, days_to_keep=days_to_keep)
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "verify":
+        log(f"Verifying backup: {sys.argv[2]}")
+        sys.exit(0 if verify_backup(sys.argv[2]) else 1)
+
     log("=" * 50)
     log("Starting database backup (Python version)...")
     log("=" * 50)
-    
+
     success = backup_database()
-    
+
     # Cleanup old backups (keep last 7 days)
     cleanup_old_backups(days_to_keep=7)
-    
+
     if success:
         log("=" * 50)
         log("✅ Backup process completed successfully")
@@ -188,5 +304,3 @@ if __name__ == "__main__":
         log("❌ Backup process failed")
         log("=" * 50)
         sys.exit(1)
-
-
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Backup storage: parallel chunked compression, an index of backups, and
+budget-based retention.
+
+Compression
+    ChunkedCompressor is a write-only file object that cuts the stream
+    into BACKUP_CHUNK_BYTES chunks and compresses them on a process pool.
+    Each chunk becomes an independent gzip member / zstd frame, written in
+    order; a multi-member gzip file is still a normal .gz file. zstd is
+    used when the zstandard package is installed, gzip otherwise. At most
+    2 x workers chunks are in flight, so memory stays bounded.
+
+Index
+    backup_index.json in the backup directory lists every backup with its
+    kind, parent (for incremental chains), size and timestamp. Listing and
+    pruning read only this file; nothing is re-stat'ed or re-opened. It is
+    rebuilt by scanning the directory if missing (or with `reindex`).
+    Every load-modify-save of the index (record_backup, prune, reindex)
+    holds an exclusive lock on backup_index.json.lock, so a backup
+    finishing while another process prunes doesn't drop either's update.
+
+Retention
+    prune() enforces a maximum age, total bytes and backup count. Backups
+    are removed a whole chain at a time (a full backup together with the
+    incrementals built on it), oldest first, and the newest chain is
+    always kept.
+
+Usage:
+    python backup_storage.py list [--dir DIR]
+    python backup_storage.py prune [--dir DIR] [--keep-days 7] [--max-bytes 5GB] [--max-count 50] [--dry-run]
+    python backup_storage.py reindex [--dir DIR]
+    python backup_storage.py compress FILE [--workers N]
+"""
+import os
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+INDEX_NAME = "backup_index.json"
+INDEX_VERSION = 1
+
+BACKUP_CHUNK_BYTES = int(os.getenv("BACKUP_CHUNK_BYTES", str(4 * 1024 * 1024)))
+BACKUP_COMPRESS_WORKERS = int(os.getenv("BACKUP_COMPRESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+GZIP_LEVEL = int(os.getenv("BACKUP_COMPRESSLEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("BACKUP_ZSTD_LEVEL", "3"))
+
+DEFAULT_KEEP_DAYS = int(os.getenv("BACKUP_KEEP_DAYS", "7"))
+
+CODEC_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def log(message):
+    """Print timestamped log message"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+
+def parse_size(value):
+    """'500MB', '5GB', '1024' -> bytes; None/''/'0' -> None (no limit)."""
+    if value is None:
+        return None
+    value = str(value).strip().upper()
+    if not value or value == "0":
+        return None
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    number = value.rstrip("BI")
+    multiplier = 1
+    if number and number[-1] in units:
+        multiplier = units[number[-1]]
+        number = number[:-1]
+    return int(float(number) * multiplier)
+
+
+BACKUP_MAX_BYTES = parse_size(os.getenv("BACKUP_MAX_BYTES"))
+BACKUP_MAX_COUNT = int(os.getenv("BACKUP_MAX_COUNT", "0")) or None
+
+
+# ============================================================================
+# Compression
+# ============================================================================
+
+def default_codec():
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def codec_for_path(path):
+    return "zstd" if str(path).endswith(".zst") else "gzip"
+
+
+def _compress_chunk(codec, data):
+    """Compress one chunk into a self-contained gzip member / zstd frame (runs in a worker process)."""
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ChunkedCompressor:
+    """
+    Write-only file object that compresses chunks on a process pool.
+
+    Tracks the sha256 and size of the compressed output so callers can put
+    them in a manifest without re-reading the file.
+    """
+
+    def __init__(self, fileobj, codec=None, executor=None, chunk_size=BACKUP_CHUNK_BYTES,
+                 max_pending=2 * BACKUP_COMPRESS_WORKERS):
+        self.fileobj = fileobj
+        self.codec = codec or default_codec()
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._max_pending = max(1, max_pending)
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            chunk = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            self._submit(chunk)
+        return len(data)
+
+    def _submit(self, chunk):
+        if self.executor is None:
+            self._emit(_compress_chunk(self.codec, chunk))
+            return
+        self._pending.append(self.executor.submit(_compress_chunk, self.codec, chunk))
+        while len(self._pending) >= self._max_pending:
+            self._emit(self._pending.popleft().result())
+
+    def _emit(self, compressed):
+        self.sha256.update(compressed)
+        self.size += len(compressed)
+        self.fileobj.write(compressed)
+
+    def close(self):
+        """Flush the last partial chunk and wait for all workers."""
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        while self._pending:
+            self._emit(self._pending.popleft().result())
+        self.fileobj.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for future in self._pending:
+                future.cancel()
+
+
+def compression_pool(workers=BACKUP_COMPRESS_WORKERS):
+    """
+    Process pool for ChunkedCompressor, or None to compress inline.
+
+    Workers are spawned, not forked: scheduled backups run inside the
+    multithreaded web process (scheduler.py), and a forked child would
+    inherit its held locks and pooled database connections.
+    """
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def open_decompressed(path):
+    """Binary read stream over a .gz (any number of members) or .zst file."""
+    if codec_for_path(path) == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+    return gzip.open(path, "rb")
+
+
+def compress_file(src, workers=BACKUP_COMPRESS_WORKERS, codec=None, remove_source=True):
+    """Compress src next to itself (src + .zst/.gz). Returns the new path."""
+    src = Path(src)
+    codec = codec or default_codec()
+    dst = src.with_name(src.name + CODEC_EXTENSIONS[codec])
+    executor = compression_pool(workers)
+    try:
+        with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+            with ChunkedCompressor(f_out, codec, executor, max_pending=2 * workers) as compressor:
+                for block in iter(lambda: f_in.read(BACKUP_CHUNK_BYTES), b""):
+                    compressor.write(block)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if remove_source:
+        src.unlink()
+    return dst
+
+
+# ============================================================================
+# Index
+# ============================================================================
+
+def _path_size(path):
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def _describe(path):
+    """Index entry for a backup on disk (reads its manifest if it has one)."""
+    entry = {
+        "name": path.name,
+        "kind": "full",
+        "parent": None,
+        "format": None,
+        "created": datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
+        "bytes": _path_size(path),
+    }
+    manifest_path = path / "manifest.json" if path.is_dir() else None
+    if manifest_path and manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        entry["kind"] = manifest.get("kind", "full")
+        entry["parent"] = manifest.get("parent")
+        entry["format"] = manifest.get("format")
+        entry["created"] = manifest.get("backup_timestamp", entry["created"])
+    elif not path.is_dir():
+        entry["format"] = "".join(path.suffixes).lstrip(".")
+    return entry
+
+
+def _is_backup_path(path):
+    name = path.name
+    if name == INDEX_NAME or name.endswith((".partial", ".tmp")):
+        return False
+    if not (name.startswith("backup_") or name.startswith("copy_")):
+        return False
+    return path.is_dir() or name.endswith((".json", ".json.gz", ".sql", ".sql.gz", ".sql.zst"))
+
+
+def rebuild_index(root):
+    """Scan root and write a fresh index."""
+    root = Path(root)
+    entries = [_describe(p) for p in sorted(root.iterdir()) if _is_backup_path(p)]
+    save_index(root, entries)
+    return entries
+
+
+def load_index(root):
+    """Backups recorded in root's index (rebuilt by scanning if there is none)."""
+    index_path = Path(root) / INDEX_NAME
+    if not index_path.exists():
+        return rebuild_index(root)
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)["backups"]
+
+
+@contextmanager
+def index_lock(root):
+    """
+    Exclusive lock on root's index (flock on POSIX, msvcrt on Windows),
+    waiting for any other process holding it. Not reentrant.
+    """
+    handle = open(Path(root) / f"{INDEX_NAME}.lock", "a+")
+    try:
+        try:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except ImportError:
+            import msvcrt
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after 10 attempts; keep waiting
+        yield
+    finally:
+        handle.close()  # closing the file drops the lock
+
+
+def save_index(root, entries):
+    root = Path(root)
+    tmp_path = root / f"{INDEX_NAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "backups": entries}, f, separators=(",", ":"))
+    os.replace(tmp_path, root / INDEX_NAME)
+
+
+def record_backup(root, path, **overrides):
+    """Add (or replace) a finished backup in the index."""
+    root = Path(root)
+    entry = _describe(Path(path))
+    entry.update(overrides)
+    with index_lock(root):
+        entries = [e for e in load_index(root) if e["name"] != entry["name"]]
+        entries.append(entry)
+        save_index(root, entries)
+    return entry
+
+
+# ============================================================================
+# Retention
+# ============================================================================
+
+def _chains(entries):
+    """Group entries into chains: a full backup plus the incrementals descending from it."""
+    by_name = {e["name"]: e for e in entries}
+
+    def root_of(entry):
+        seen = set()
+        while entry.get("parent") and entry["parent"] in by_name and entry["name"] not in seen:
+            seen.add(entry["name"])
+            entry = by_name[entry["parent"]]
+        return entry["name"]
+
+    chains = {}
+    for entry in entries:
+        chains.setdefault(root_of(entry), []).append(entry)
+    # Newest chain first, judged by its newest member
+    return sorted(chains.values(), key=lambda c: max(e["created"] for e in c), reverse=True)
+
+
+def plan_prune(entries, max_age_days=None, max_bytes=None, max_count=None, now=None):
+    """
+    Choose which backups to delete to fit the budgets.
+
+    Returns (keep, delete) lists of entries. Whole chains are kept or
+    deleted, newest first: once a chain is over a budget it and every
+    older chain are deleted (a smaller, older chain never outlives a newer
+    one). The newest chain is always kept even if it alone exceeds a
+    budget.
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=max_age_days) if max_age_days else None
+
+    keep, delete = [], []
+    total_bytes = 0
+    pruning = False
+    for i, chain in enumerate(_chains(entries)):
+        if pruning:
+            delete.extend(chain)
+            continue
+        chain_bytes = sum(e["bytes"] for e in chain)
+        newest = max(datetime.fromisoformat(e["created"]) for e in chain)
+        if newest.tzinfo is not None:
+            newest = newest.replace(tzinfo=None)
+        over_budget = (
+            (cutoff is not None and newest < cutoff)
+            or (max_bytes is not None and total_bytes + chain_bytes > max_bytes)
+            or (max_count is not None and len(keep) + len(chain) > max_count)
+        )
+        if i > 0 and over_budget:
+            pruning = True
+            delete.extend(chain)
+        else:
+            keep.extend(chain)
+            total_bytes += chain_bytes
+    return keep, delete
+
+
+def prune(root, max_age_days=DEFAULT_KEEP_DAYS, max_bytes=BACKUP_MAX_BYTES, max_count=BACKUP_MAX_COUNT, dry_run=False):
+    """
+    Delete backups outside the budgets and update the index.
+
+    Returns (deleted_count, bytes_freed).
+    """
+    root = Path(root)
+    # Held until the index is saved: a backup recorded meanwhile waits, rather than being overwritten by `keep`
+    with index_lock(root):
+        keep, delete = plan_prune(load_index(root), max_age_days, max_bytes, max_count)
+
+        freed = 0
+        for entry in delete:
+            path = root / entry["name"]
+            if dry_run:
+                log(f"Would delete: {entry['name']} ({entry['bytes'] / (1024 * 1024):.2f} MB)")
+            else:
+                if path.is_dir():
+                    shutil.rmtree(path)
+                elif path.exists():
+                    path.unlink()
+                log(f"Deleted old backup: {entry['name']}")
+            freed += entry["bytes"]
+
+        if delete and not dry_run:
+            save_index(root, keep)
+    return len(delete), freed
+
+
+def cleanup_backups(root, days_to_keep=DEFAULT_KEEP_DAYS):
+    """prune() with the BACKUP_MAX_BYTES / BACKUP_MAX_COUNT budgets, logging the result."""
+    try:
+        deleted_count, freed = prune(root, max_age_days=days_to_keep)
+        if deleted_count > 0:
+            log(f"Cleaned up {deleted_count} old backup(s), freed {freed / (1024 * 1024):.2f} MB")
+    except Exception as e:
+        log(f"⚠️  Error during cleanup: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backup storage: list, prune, reindex, compress")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("list", "prune", "reindex"):
+        p = sub.add_parser(name)
+        p.add_argument("--dir", default=os.getenv("BACKUP_DIR", "."))
+        if name == "prune":
+            p.add_argument("--keep-days", type=int, default=DEFAULT_KEEP_DAYS)
+            p.add_argument("--max-bytes", default=os.getenv("BACKUP_MAX_BYTES"))
+            p.add_argument("--max-count", type=int, default=BACKUP_MAX_COUNT)
+            p.add_argument("--dry-run", action="store_true")
+
+    p = sub.add_parser("compress")
+    p.add_argument("file")
+    p.add_argument("--workers", type=int, default=BACKUP_COMPRESS_WORKERS)
+    p.add_argument("--keep", action="store_true", help="Keep the uncompressed file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        with index_lock(args.dir):
+            entries = load_index(args.dir)
+        for chain in _chains(entries):
+            for e in sorted(chain, key=lambda e: e["created"]):
+                indent = "  " if e.get("parent") else ""
+                log(f"{indent}{e['name']:<32} {e['kind']:<12} {e['bytes'] / (1024 * 1024):>9.2f} MB  {e['created']}")
+        log(f"{len(entries)} backup(s), {sum(e['bytes'] for e in entries) / (1024 * 1024):.2f} MB total")
+    elif args.command == "prune":
+        deleted_count, freed = prune(args.dir, args.keep_days, parse_size(args.max_bytes), args.max_count, args.dry_run)
+        log(f"{'Would delete' if args.dry_run else 'Deleted'} {deleted_count} backup(s), {freed / (1024 * 1024):.2f} MB")
+    elif args.command == "reindex":
+        with index_lock(args.dir):
+            entries = rebuild_index(args.dir)
+        log(f"Indexed {len(entries)} backup(s)")
+    elif args.command == "compress":
+        started = datetime.now()
+        dst = compress_file(args.file, args.workers, remove_source=not args.keep)
+        elapsed = (datetime.now() - started).total_seconds()
+        log(f"✅ {dst} ({dst.stat().st_size / (1024 * 1024):.2f} MB in {elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
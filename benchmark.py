@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for CRM hot paths.
+
+Runs without a server - each benchmark builds synthetic data that mirrors
+what the routes use. Database benchmarks run against a throwaway SQLite
+file unless --database-url is given.
+
+Usage:
+    python benchmark.py templates [--rows 500] [--iterations 50]
+    python benchmark.py compression [--rows 2000] [--iterations 20]
+    python benchmark.py timesheet-import [--rows 100000] [--database-url URL]
+    python benchmark.py client-import [--rows 50000] [--database-url URL]
+    python benchmark.py sqlite-concurrency [--threads 8] [--seconds 5] [--write-ratio 0.2]
+"""
+import argparse
+import csv
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import compression
+import templating
+
+
+def _timed(func, iterations: int) -> dict:
+    """Run func repeatedly and return timing stats in milliseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean": statistics.mean(samples),
+        "p50": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def _fake_user():
+    return SimpleNamespace(id=1, name="Benchmark User", email="bench@example.com",
+                           permissions='{"view_settings": true}')
+
+
+def _fake_clients(rows: int) -> list:
+    statuses = ["Active", "Prospect", "Dead", "Paused"]
+    today = date.today()
+    return [
+        SimpleNamespace(
+            id=i,
+            legal_name=f"Client {i:05d} Holdings LLC",
+            entity_type="LLC",
+            ein_last4=None,
+            fiscal_year_end="12/31",
+            status=statuses[i % len(statuses)],
+            owner_name="Owner",
+            owner_email="owner@example.com",
+            next_follow_up_date=today + timedelta(days=i % 45),
+            created_at=datetime.now(),
+        )
+        for i in range(rows)
+    ]
+
+
+def clients_list_context(rows: int) -> dict:
+    """Context shaped like the one clients_list() renders."""
+    clients = _fake_clients(rows)
+    return {
+        "request": None,
+        "clients_with_revenue": [
+            {"client": c, "revenue": 1200.0, "total_hours": 4.5, "billable_hours": 4.0, "timesheet_entries": 3}
+            for c in clients
+        ],
+        "search": None,
+        "status_filter": None,
+        "entity_type_filter": None,
+        "follow_up_filter": None,
+        "sort_by": "name",
+        "sort_order": "asc",
+        "statuses": ["Active", "Dead", "Paused", "Prospect"],
+        "entity_types": ["LLC"],
+        "today": date.today(),
+        "user": _fake_user(),
+    }
+
+
+def dashboard_context(rows: int) -> dict:
+    """Context shaped like the one dashboard() renders."""
+    clients = _fake_clients(rows)
+    prospects = [c for c in clients if c.status == "Prospect"]
+    won = [c for c in clients if c.status == "Active"]
+    lost = [c for c in clients if c.status == "Dead"]
+    return {
+        "request": None,
+        "user": _fake_user(),
+        "prospects": [{"client": c, "estimated_revenue": 0.0, "expected_close_date": c.next_follow_up_date} for c in prospects],
+        "prospects_count": len(prospects),
+        "total_prospect_revenue": 0.0,
+        "won_deals": [{"client": c, "actual_revenue": 0.0, "close_date": c.created_at.date()} for c in won],
+        "won_count": len(won),
+        "total_won_revenue": 0.0,
+        "lost_deals": [{"client": c, "estimated_value": 0.0, "lost_date": c.created_at.date(), "reason": "Not specified"} for c in lost],
+        "lost_count": len(lost),
+        "total_lost_value": 0.0,
+        "total_clients": len(clients),
+        "active_clients": len(won),
+        "total_prospects": len(prospects),
+        "total_revenue": 0.0,
+        "total_revenue_formatted": "0",
+        "total_hours": 123.5,
+        "today": date.today(),
+    }
+
+
+def bench_templates(rows: int, iterations: int) -> None:
+    """Compare render time of clients_list.html and dashboard.html in both template modes."""
+    cache_dir = tempfile.mkdtemp(prefix="crm_jinja_")
+    templating.TEMPLATE_CACHE_DIR = cache_dir
+    try:
+        contexts = {
+            "clients_list.html": clients_list_context(rows),
+            "dashboard.html": dashboard_context(rows),
+        }
+        print(f"Template render benchmark ({rows} rows, {iterations} iterations)")
+        print(f"{'template':<22}{'mode':<14}{'first ms':>10}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+        for mode in ("development", "production"):
+            templates = templating.create_templates(mode)
+            if mode == "production":
+                templating.precompile_templates(templates)
+            for name, context in contexts.items():
+                start = time.perf_counter()
+                templates.get_template(name).render(context)
+                first_ms = (time.perf_counter() - start) * 1000
+                stats = _timed(lambda: templates.get_template(name).render(context), iterations)
+                print(f"{name:<22}{mode:<14}{first_ms:>10.2f}{stats['mean']:>10.2f}{stats['p50']:>10.2f}{stats['max']:>10.2f}")
+
+        # Warm restart: a new environment loading from the bytecode cache
+        start = time.perf_counter()
+        templating.precompile_templates(templating.create_templates("production"))
+        print(f"Warm restart precompile (bytecode cache hit): {(time.perf_counter() - start) * 1000:.2f}ms")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def bench_compression(rows: int, iterations: int) -> None:
+    """Bytes-on-wire vs CPU time for a rendered clients page at several codec settings."""
+    templates = templating.create_templates("development")
+    body = templates.get_template("clients_list.html").render(clients_list_context(rows)).encode("utf-8")
+
+    settings = [("identity", None)]
+    settings += [("gzip", level) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        settings += [("br", quality) for quality in (1, 4, 6)]
+
+    print(f"Compression benchmark: clients_list.html with {rows} rows ({len(body):,} bytes), {iterations} iterations")
+    print(f"{'encoding':<10}{'level':>6}{'bytes':>12}{'ratio':>8}{'mean ms':>10}{'p50 ms':>10}")
+    for encoding, level in settings:
+        if encoding == "identity":
+            print(f"{encoding:<10}{'-':>6}{len(body):>12,}{1.0:>8.2f}{0.0:>10.2f}{0.0:>10.2f}")
+            continue
+        compress = lambda: compression._Compressor(encoding, level or 6, level or 4).finish(body)
+        size = len(compress())
+        stats = _timed(compress, iterations)
+        print(f"{encoding:<10}{level:>6}{size:>12,}{len(body) / size:>8.2f}{stats['mean']:>10.2f}{stats['p50']:>10.2f}")
+    if compression.brotli is None:
+        print("brotli not installed - brotli rows skipped")
+
+
+def _bench_engine(database_url: str = None):
+    """Engine with fresh CRM tables: a temp SQLite file unless a URL is given."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database import Base
+    import models  # noqa: F401 - registers the tables on Base
+
+    temp_dir = None
+    if not database_url:
+        temp_dir = tempfile.mkdtemp(prefix="crm_bench_")
+        database_url = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine), temp_dir
+
+
+def bench_timesheet_import(rows: int, database_url: str = None, chunk_size: int = 1000) -> None:
+    """Parse, validate and insert a synthetic time-tracker CSV export."""
+    from sqlalchemy import insert
+    import bulk_import
+    from models import Client
+
+    engine, session_factory, temp_dir = _bench_engine(database_url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(Client), [{"legal_name": f"Client {i:05d} Holdings LLC", "status": "Active"} for i in range(200)])
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["client_name", "staff_member", "entry_date", "start_time", "end_time", "hours", "project_task", "description", "billable"])
+        today = date.today()
+        for i in range(rows):
+            timed = i % 3 == 0
+            writer.writerow([
+                f"client {i % 200:05d} holdings llc",
+                f"Staff {i % 12}",
+                (today - timedelta(days=i % 30)).isoformat(),
+                "09:00" if timed else "",
+                "10:20" if timed else "",
+                "" if timed else "1.1",
+                "Monthly close",
+                "Reconciliation and review",
+                "yes" if i % 5 else "no",
+            ])
+        content = buffer.getvalue().encode("utf-8")
+
+        db = session_factory()
+        try:
+            start = time.perf_counter()
+            report = bulk_import.import_timesheets(db, bulk_import.parse_rows(content, "export.csv"), chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+
+        print(f"Timesheet import benchmark: {rows:,} rows ({len(content):,} bytes CSV), chunk size {chunk_size}")
+        print(f"inserted={report['inserted']:,} failed={report['failed']:,} in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    finally:
+        engine.dispose()
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_client_import(rows: int, database_url: str = None, chunk_size: int = 1000) -> None:
+    """Import a synthetic book of business, then re-import it (all updates)."""
+    import bulk_import
+
+    engine, session_factory, temp_dir = _bench_engine(database_url)
+    csv_dir = tempfile.mkdtemp(prefix="crm_bench_csv_")
+    try:
+        csv_path = os.path.join(csv_dir, "clients.csv")
+        statuses = ["Active", "Prospect", "Paused"]
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                "legal_name", "entity_type", "status", "owner_name", "owner_email", "next_follow_up_date",
+                "contact_name", "contact_role", "contact_email",
+                "service_type", "billing_frequency", "monthly_fee",
+            ])
+            for i in range(rows):
+                writer.writerow([
+                    f"Client {i:06d} Holdings LLC", "LLC", statuses[i % 3], "Owner", "owner@example.com",
+                    (date.today() + timedelta(days=i % 60)).isoformat(),
+                    f"Contact {i}", "Controller", f"contact{i}@example.com",
+                    "Bookkeeping", "Monthly", f"{250 + i % 500}",
+                ])
+
+        print(f"Client import benchmark: {rows:,} clients ({os.path.getsize(csv_path):,} bytes CSV), chunk size {chunk_size}")
+        for label in ("initial import", "re-import (updates)"):
+            db = session_factory()
+            try:
+                start = time.perf_counter()
+                with open(csv_path, encoding="utf-8", newline="") as f:
+                    report = bulk_import.import_clients(db, bulk_import.iter_csv_rows(f), chunk_size=chunk_size)
+                elapsed = time.perf_counter() - start
+            finally:
+                db.close()
+            print(
+                f"{label:<22} {elapsed:>7.2f}s ({rows / elapsed:>9,.0f} rows/s) "
+                f"created={report['clients_created']:,} updated={report['clients_updated']:,} "
+                f"contacts={report['contacts_created']:,} services={report['services_created']:,}+{report['services_updated']:,} "
+                f"failed={report['failed']:,}"
+            )
+    finally:
+        engine.dispose()
+        shutil.rmtree(csv_dir, ignore_errors=True)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_sqlite_concurrency(threads: int, seconds: float, write_ratio: float, clients: int = 2000) -> None:
+    """Mixed read/write load from several threads: default SQLite profile vs the tuned one."""
+    import random
+    from sqlalchemy import func, insert
+    import database
+    from models import Client, Note
+
+    print(f"SQLite concurrency benchmark: {threads} threads, {seconds:.0f}s per profile, "
+          f"{write_ratio:.0%} writes, {clients:,} clients")
+    print(f"{'profile':<10}{'ops/s':>10}{'reads':>9}{'writes':>9}{'errors':>8}"
+          f"{'read p50':>10}{'read p95':>10}{'write p50':>11}{'write p95':>11}")
+    for tuned in (False, True):
+        temp_dir = tempfile.mkdtemp(prefix="crm_bench_")
+        url = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+        writer, reader = database.create_sqlite_engines(url, tuned=tuned, name=f"bench_{'tuned' if tuned else 'default'}")
+        session_factory = database.sqlite_session_factory(writer, reader)
+        try:
+            database.Base.metadata.create_all(writer)
+            with writer.begin() as conn:
+                conn.execute(insert(Client), [
+                    {"legal_name": f"Client {i:05d} Holdings LLC", "status": "Active" if i % 3 else "Prospect",
+                     "owner_name": f"Owner {i % 10}"}
+                    for i in range(clients)
+                ])
+
+            read_ms, write_ms, errors = [], [], []
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+
+            def worker(seed: int):
+                rng = random.Random(seed)
+                local_reads, local_writes, local_errors = [], [], 0
+                while time.perf_counter() < deadline:
+                    is_write = rng.random() < write_ratio
+                    start = time.perf_counter()
+                    db = session_factory()
+                    try:
+                        if is_write:
+                            client_id = rng.randint(1, clients)
+                            db.add(Note(client_id=client_id, content="Benchmark note"))
+                            db.query(Client).filter(Client.id == client_id).update({"owner_email": f"o{seed}@example.com"})
+                            db.commit()
+                            local_writes.append((time.perf_counter() - start) * 1000)
+                        else:
+                            owner = f"Owner {rng.randint(0, 9)}"
+                            db.query(func.count(Client.id)).filter(Client.owner_name == owner).scalar()
+                            db.query(Client).filter(Client.status == "Active").order_by(Client.legal_name).limit(50).all()
+                            local_reads.append((time.perf_counter() - start) * 1000)
+                    except Exception:
+                        db.rollback()
+                        local_errors += 1
+                    finally:
+                        db.close()
+                with lock:
+                    read_ms.extend(local_reads)
+                    write_ms.extend(local_writes)
+                    errors.append(local_errors)
+
+            workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+
+            label = "tuned" if tuned else "default"
+            total = len(read_ms) + len(write_ms)
+            print(f"{label:<10}{total / seconds:>10,.0f}{len(read_ms):>9,}{len(write_ms):>9,}{sum(errors):>8}"
+                  f"{_percentile(read_ms, 0.5):>10.2f}{_percentile(read_ms, 0.95):>10.2f}"
+                  f"{_percentile(write_ms, 0.5):>11.2f}{_percentile(write_ms, 0.95):>11.2f}")
+        finally:
+            writer.dispose()
+            reader.dispose()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    print("latencies in ms; errors are mostly 'database is locked'")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    templates_parser = subparsers.add_parser("templates", help="Render clients_list.html and dashboard.html")
+    templates_parser.add_argument("--rows", type=int, default=500)
+    templates_parser.add_argument("--iterations", type=int, default=50)
+
+    compression_parser = subparsers.add_parser("compression", help="Compress a rendered clients page")
+    compression_parser.add_argument("--rows", type=int, default=2000)
+    compression_parser.add_argument("--iterations", type=int, default=20)
+
+    import_parser = subparsers.add_parser("timesheet-import", help="Bulk import a synthetic timesheet CSV")
+    import_parser.add_argument("--rows", type=int, default=100000)
+    import_parser.add_argument("--chunk-size", type=int, default=1000)
+    import_parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+
+    client_import_parser = subparsers.add_parser("client-import", help="Bulk upsert a synthetic client CSV")
+    client_import_parser.add_argument("--rows", type=int, default=50000)
+    client_import_parser.add_argument("--chunk-size", type=int, default=1000)
+    client_import_parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+
+    sqlite_parser = subparsers.add_parser("sqlite-concurrency", help="Threaded read/write load, default vs tuned SQLite")
+    sqlite_parser.add_argument("--threads", type=int, default=8)
+    sqlite_parser.add_argument("--seconds", type=float, default=5)
+    sqlite_parser.add_argument("--write-ratio", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "templates":
+        bench_templates(args.rows, args.iterations)
+    elif args.benchmark == "compression":
+        bench_compression(args.rows, args.iterations)
+    elif args.benchmark == "timesheet-import":
+        bench_timesheet_import(args.rows, args.database_url, args.chunk_size)
+    elif args.benchmark == "client-import":
+        bench_client_import(args.rows, args.database_url, args.chunk_size)
+    elif args.benchmark == "sqlite-concurrency":
+        bench_sqlite_concurrency(args.threads, args.seconds, args.write_ratio)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
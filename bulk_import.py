@@ -0,0 +1,684 @@
+"""
+Bulk imports for timesheets and clients.
+
+Timesheets
+----------
+Accepts CSV (header row) or JSON (a list of objects, or {"rows": [...]})
+exports from a time tracker. Recognized columns:
+
+    client_id or client / client_name   (legal name, case-insensitive)
+    staff_member                         (defaults to the importing user)
+    entry_date                           (YYYY-MM-DD or MM/DD/YYYY)
+    start_time, end_time                 (HH:MM - hours are computed from these)
+    hours                                (used when start/end are absent)
+    project_task, description, billable
+
+Every row is validated against schemas.TimesheetCreate and hours are rounded
+up to 15 minutes exactly like the single-entry form. Client names are
+resolved with one lookup map, and valid rows are inserted with executemany
+in chunks, one transaction per chunk. Invalid rows are skipped and reported
+with their row number; a chunk that fails at the database is retried row by
+row so only the offending rows are reported.
+
+Clients
+-------
+Streams a CSV with one row per client (repeat the legal_name on further
+rows to add more contacts/services to the same client):
+
+    legal_name (required), entity_type, fiscal_year_end, status,
+    owner_name, owner_email, next_follow_up_date
+    contact_name, contact_role, contact_email, contact_phone
+    service_type, billing_frequency, monthly_fee, service_active
+
+Clients are matched case-insensitively on legal_name against an index
+preloaded once (legal_name has no unique constraint, so ON CONFLICT cannot
+be used). Each chunk then runs in one transaction: an INSERT ... RETURNING
+executemany for new clients, executemany UPDATEs for existing ones (only
+the columns present in the row), and batched inserts of contacts and
+services that aren't already on the client. Existing services with the
+same service_type are updated instead of duplicated.
+
+CLI:
+    python bulk_import.py clients book_of_business.csv
+    python bulk_import.py timesheets export.csv --staff-member "Jane Doe"
+"""
+import io
+import csv
+import sys
+import json
+import logging
+import argparse
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from models import Client, Contact, Service, Timesheet
+from schemas import TimesheetCreate, ClientCreate, ContactBase, ServiceBase
+from crud import calculate_hours, round_up_to_quarter_hour
+from change_tracking import bump_table_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Cap the error report so a completely wrong file doesn't produce a huge response
+MAX_REPORTED_ERRORS = 1000
+
+_TRUE_VALUES = {"true", "t", "yes", "y", "1", "billable"}
+_FALSE_VALUES = {"false", "f", "no", "n", "0", "non-billable", "nonbillable"}
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file could not be parsed at all."""
+
+
+# ============================================================================
+# Parsing
+# ============================================================================
+
+def parse_rows(content: bytes, filename: str = "", content_type: str = "") -> Iterator[dict]:
+    """
+    Yield raw row dicts from CSV or JSON content.
+
+    The format is taken from the filename extension or content type, falling
+    back to sniffing the first non-blank character.
+    """
+    text = content.decode("utf-8-sig")
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith(".json") or "json" in ctype:
+        is_json = True
+    elif name.endswith(".csv") or "csv" in ctype:
+        is_json = False
+    else:
+        is_json = text.lstrip()[:1] in ("[", "{")
+
+    if is_json:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f"Invalid JSON: {e}")
+        if isinstance(data, dict):
+            data = data.get("rows")
+        if not isinstance(data, list):
+            raise ImportFormatError('JSON must be a list of rows or {"rows": [...]}')
+        for row in data:
+            yield row if isinstance(row, dict) else {"__invalid__": row}
+    else:
+        yield from iter_csv_rows(io.StringIO(text))
+
+
+def iter_csv_rows(stream: TextIO) -> Iterator[dict]:
+    """Yield CSV rows from a text stream with normalized header names."""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if not header:
+        raise ImportFormatError("CSV has no header row")
+    # Normalize header spelling once: "Client Name" -> client_name
+    keys = [(k or "").strip().lower().replace(" ", "_") for k in header]
+    for values in reader:
+        if values:
+            yield dict(zip(keys, values))
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _parse_date(value, field: str = "entry_date") -> date:
+    if isinstance(value, date):
+        return value
+    value = _clean(value)
+    if not value:
+        raise ValueError(f"{field} is required")
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, "%m/%d/%Y").date()
+    except ValueError:
+        pass
+    raise ValueError(f"invalid {field} '{value}' (expected YYYY-MM-DD or MM/DD/YYYY)")
+
+
+def _parse_billable(value, field: str = "billable") -> bool:
+    if isinstance(value, bool):
+        return value
+    value = _clean(value)
+    if value is None:
+        return True
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid {field} value '{value}'")
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+
+def load_client_lookup(db: Session) -> Tuple[Dict[str, int], set]:
+    """One query: {lower(legal_name): id} and the set of valid ids."""
+    by_name = {}
+    ids = set()
+    for client_id, legal_name in db.query(Client.id, Client.legal_name):
+        ids.add(client_id)
+        if legal_name:
+            by_name.setdefault(legal_name.strip().lower(), client_id)
+    return by_name, ids
+
+
+def build_timesheet(
+    row: dict,
+    clients_by_name: Dict[str, int],
+    client_ids: set,
+    default_staff_member: Optional[str] = None
+) -> dict:
+    """
+    Turn one raw row into validated insert values.
+
+    Raises:
+        ValueError: With a human-readable reason if the row is invalid.
+    """
+    if "__invalid__" in row:
+        raise ValueError("row is not an object")
+
+    # Resolve client
+    client_id = _clean(row.get("client_id"))
+    if client_id:
+        try:
+            client_id = int(client_id)
+        except ValueError:
+            raise ValueError(f"invalid client_id '{client_id}'")
+        if client_id not in client_ids:
+            raise ValueError(f"client_id {client_id} not found")
+    else:
+        client_name = _clean(row.get("client_name") or row.get("client"))
+        if not client_name:
+            raise ValueError("client_id or client_name is required")
+        client_id = clients_by_name.get(client_name.lower())
+        if client_id is None:
+            raise ValueError(f"client '{client_name}' not found")
+
+    entry_date = _parse_date(row.get("entry_date"))
+    start_time = _clean(row.get("start_time"))
+    end_time = _clean(row.get("end_time"))
+
+    # Same rules as the timesheet form: start/end wins over hours, then round up
+    if start_time and end_time:
+        try:
+            hours_value = calculate_hours(entry_date, start_time, end_time)
+        except ValueError:
+            raise ValueError(f"invalid start_time/end_time '{start_time}'/'{end_time}' (expected HH:MM)")
+    else:
+        hours = _clean(row.get("hours"))
+        if hours is None:
+            raise ValueError("hours or start_time/end_time is required")
+        try:
+            hours_value = float(hours)
+        except ValueError:
+            raise ValueError(f"invalid hours '{hours}'")
+    if hours_value <= 0:
+        raise ValueError("hours must be positive")
+    hours_value = round_up_to_quarter_hour(hours_value)
+
+    try:
+        timesheet = TimesheetCreate(
+            client_id=client_id,
+            staff_member=_clean(row.get("staff_member")) or default_staff_member,
+            entry_date=entry_date,
+            start_time=start_time,
+            end_time=end_time,
+            hours=hours_value,
+            project_task=_clean(row.get("project_task")),
+            description=_clean(row.get("description")),
+            billable=_parse_billable(row.get("billable")),
+        )
+    except ValidationError as e:
+        raise ValueError(_validation_message(e))
+    return timesheet.model_dump()
+
+
+# ============================================================================
+# Import
+# ============================================================================
+
+def _insert_chunk(db: Session, chunk: List[Tuple[int, dict]], errors: List[dict]) -> int:
+    """Insert one chunk in a single transaction; on failure retry row by row."""
+    try:
+        # Core insert on the table: a single executemany per chunk (the ORM
+        # bulk path splits batches whenever the set of NULL columns changes)
+        db.execute(insert(Timesheet.__table__), [values for _, values in chunk])
+        db.commit()
+        return len(chunk)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"[IMPORT] Chunk of {len(chunk)} rows failed ({e.__class__.__name__}), retrying row by row")
+
+    inserted = 0
+    for row_number, values in chunk:
+        try:
+            db.execute(insert(Timesheet.__table__), [values])
+            db.commit()
+            inserted += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            errors.append({"row": row_number, "error": str(getattr(e, "orig", e))})
+    return inserted
+
+
+def import_timesheets(
+    db: Session,
+    rows: Iterable[dict],
+    default_staff_member: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False
+) -> dict:
+    """
+    Validate and insert timesheet rows.
+
+    Row numbers in the report are 1-based data rows (CSV header excluded).
+
+    Returns:
+        {"total": n, "inserted": n, "failed": n, "errors": [{"row": n, "error": str}], ...}
+    """
+    start = datetime.now()
+    clients_by_name, client_ids = load_client_lookup(db)
+
+    errors: List[dict] = []
+    chunk: List[Tuple[int, dict]] = []
+    total = 0
+    valid = 0
+    inserted = 0
+
+    for row_number, row in enumerate(rows, start=1):
+        total += 1
+        try:
+            values = build_timesheet(row, clients_by_name, client_ids, default_staff_member)
+        except ValueError as e:
+            errors.append({"row": row_number, "error": str(e)})
+            continue
+        valid += 1
+        if dry_run:
+            continue
+        chunk.append((row_number, values))
+        if len(chunk) >= chunk_size:
+            inserted += _insert_chunk(db, chunk, errors)
+            chunk = []
+
+    if chunk:
+        inserted += _insert_chunk(db, chunk, errors)
+
+    if inserted:
+        bump_table_version("timesheets")
+
+    duration = (datetime.now() - start).total_seconds()
+    logger.info(
+        f"[IMPORT] Timesheets: {total} rows, {valid} valid, {inserted} inserted, "
+        f"{len(errors)} errors in {duration:.2f}s{' (dry run)' if dry_run else ''}"
+    )
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "total": total,
+        "valid": valid,
+        "inserted": inserted,
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "duration_seconds": round(duration, 3),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "errors_truncated": len(errors) > MAX_REPORTED_ERRORS,
+    }
+
+
+# ============================================================================
+# Client Import
+# ============================================================================
+
+CLIENT_FIELDS = (
+    "legal_name", "entity_type", "fiscal_year_end", "status",
+    "owner_name", "owner_email", "next_follow_up_date",
+)
+
+# CSV column -> Contact/Service attribute
+CONTACT_COLUMNS = {"contact_name": "name", "contact_role": "role", "contact_email": "email", "contact_phone": "phone"}
+SERVICE_COLUMNS = {"service_type": "service_type", "billing_frequency": "billing_frequency", "monthly_fee": "monthly_fee"}
+
+
+def build_client_row(row: dict) -> Tuple[dict, Optional[dict], Optional[dict]]:
+    """
+    Split one CSV row into (client fields, contact, service).
+
+    Client and service fields only include columns with a value, so an
+    import never blanks out data on an existing client or service (a new
+    service gets ServiceBase defaults for the rest when it is inserted).
+
+    Raises:
+        ValueError: With a human-readable reason if the row is invalid.
+    """
+    fields = {}
+    for name in CLIENT_FIELDS:
+        value = _clean(row.get(name))
+        if value is not None:
+            fields[name] = value
+    if "legal_name" not in fields:
+        raise ValueError("legal_name is required")
+    if "next_follow_up_date" in fields:
+        fields["next_follow_up_date"] = _parse_date(fields["next_follow_up_date"], "next_follow_up_date")
+
+    try:
+        client = ClientCreate(**fields).model_dump(include=set(fields))
+
+        contact = None
+        contact_values = {attr: _clean(row.get(column)) for column, attr in CONTACT_COLUMNS.items()}
+        if any(contact_values.values()):
+            if not contact_values["name"]:
+                raise ValueError("contact_name is required when contact columns are set")
+            contact = ContactBase(**contact_values).model_dump()
+
+        service = None
+        service_values = {}
+        for column, attr in SERVICE_COLUMNS.items():
+            value = _clean(row.get(column))
+            if value is not None:
+                service_values[attr] = value
+        if service_values:
+            if "service_type" not in service_values:
+                raise ValueError("service_type is required when service columns are set")
+            if _clean(row.get("service_active")) is not None:
+                service_values["active"] = _parse_billable(row.get("service_active"), "service_active")
+            service = ServiceBase(**service_values).model_dump(include=set(service_values))
+    except ValidationError as e:
+        raise ValueError(_validation_message(e))
+
+    return client, contact, service
+
+
+class ClientImporter:
+    """
+    Upserts clients with their contacts and services in chunks.
+
+    Preloads (once) the legal_name index and the existing contact/service
+    keys, then keeps them current as chunks commit.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.clients_by_name: Dict[str, int] = {}
+        self.contact_keys = set()
+        self.service_ids: Dict[Tuple[int, str], int] = {}
+        self.stats = {
+            "clients_created": 0,
+            "clients_updated": 0,
+            "contacts_created": 0,
+            "services_created": 0,
+            "services_updated": 0,
+        }
+
+    def load_indexes(self) -> None:
+        db = self.db
+        for client_id, legal_name in db.query(Client.id, Client.legal_name):
+            if legal_name:
+                self.clients_by_name.setdefault(legal_name.strip().lower(), client_id)
+        for client_id, name in db.query(Contact.client_id, Contact.name):
+            self.contact_keys.add((client_id, (name or "").strip().lower()))
+        for service_id, client_id, service_type in db.query(Service.id, Service.client_id, Service.service_type):
+            self.service_ids[(client_id, (service_type or "").strip().lower())] = service_id
+        logger.info(
+            f"[IMPORT] Loaded index: {len(self.clients_by_name)} clients, "
+            f"{len(self.contact_keys)} contacts, {len(self.service_ids)} services"
+        )
+
+    def apply_chunk(self, chunk: List[Tuple[int, tuple]]) -> None:
+        """
+        Write one chunk of parsed rows in a single transaction.
+
+        Indexes and stats are only updated after the commit succeeds, so a
+        failed chunk can be retried safely.
+        """
+        db = self.db
+        client_table = Client.__table__
+        contact_table = Contact.__table__
+        service_table = Service.__table__
+
+        # 1. Merge rows per client: new clients by name, existing ones by id
+        new_clients: Dict[str, dict] = {}
+        updates: Dict[int, dict] = {}
+        for _, (client, _, _) in chunk:
+            key = client["legal_name"].strip().lower()
+            client_id = self.clients_by_name.get(key)
+            if client_id is None:
+                # First spelling of the name wins; later rows only add fields
+                merged = new_clients.setdefault(key, {"legal_name": client["legal_name"]})
+                merged.update((k, v) for k, v in client.items() if k != "legal_name")
+            else:
+                # Matched case-insensitively - keep the existing spelling
+                updates.setdefault(client_id, {}).update((k, v) for k, v in client.items() if k != "legal_name")
+
+        # 2. Insert new clients, getting their ids back in parameter order
+        new_ids: Dict[str, int] = {}
+        if new_clients:
+            keys = list(new_clients)
+            values = [ClientCreate(**new_clients[k]).model_dump() for k in keys]
+            result = db.execute(
+                insert(client_table).returning(client_table.c.id, sort_by_parameter_order=True),
+                values,
+            )
+            new_ids = dict(zip(keys, (row[0] for row in result)))
+
+        # 3. Update existing clients, one executemany per distinct column set
+        self._executemany_updates(client_table, updates)
+
+        def resolve(client: dict) -> int:
+            key = client["legal_name"].strip().lower()
+            return self.clients_by_name.get(key) or new_ids[key]
+
+        # 4. Contacts not already on the client
+        new_contact_keys = set()
+        contacts = []
+        for _, (client, contact, _) in chunk:
+            if contact is None:
+                continue
+            client_id = resolve(client)
+            key = (client_id, contact["name"].strip().lower())
+            if key in self.contact_keys or key in new_contact_keys:
+                continue
+            new_contact_keys.add(key)
+            contacts.append(dict(contact, client_id=client_id))
+        if contacts:
+            db.execute(insert(contact_table), contacts)
+
+        # 5. Services: update by (client, service_type) if present, else insert
+        new_services: Dict[Tuple[int, str], dict] = {}
+        service_updates: Dict[int, dict] = {}
+        for _, (client, _, service) in chunk:
+            if service is None:
+                continue
+            client_id = resolve(client)
+            key = (client_id, service["service_type"].strip().lower())
+            service_id = self.service_ids.get(key)
+            if service_id is None:
+                # Fill unset columns with defaults so every inserted row has the same keys
+                new_services[key] = dict(ServiceBase(**service).model_dump(), client_id=client_id)
+            else:
+                service_updates[service_id] = {k: v for k, v in service.items() if k != "service_type"}
+        new_service_ids: Dict[Tuple[int, str], int] = {}
+        if new_services:
+            keys = list(new_services)
+            result = db.execute(
+                insert(service_table).returning(service_table.c.id, sort_by_parameter_order=True),
+                [new_services[k] for k in keys],
+            )
+            new_service_ids = dict(zip(keys, (row[0] for row in result)))
+        self._executemany_updates(service_table, service_updates)
+
+        db.commit()
+
+        self.clients_by_name.update(new_ids)
+        self.contact_keys.update(new_contact_keys)
+        self.service_ids.update(new_service_ids)
+        self.stats["clients_created"] += len(new_ids)
+        self.stats["clients_updated"] += sum(1 for values in updates.values() if values)
+        self.stats["contacts_created"] += len(contacts)
+        self.stats["services_created"] += len(new_service_ids)
+        self.stats["services_updated"] += sum(1 for values in service_updates.values() if values)
+
+    def _executemany_updates(self, table, updates: Dict[int, dict]) -> None:
+        """UPDATE table SET ... WHERE id = :id, batched per distinct column set."""
+        groups: Dict[Tuple[str, ...], List[dict]] = {}
+        for row_id, values in updates.items():
+            columns = tuple(sorted(values))
+            if not columns:
+                continue
+            params = {f"b_{name}": values[name] for name in columns}
+            params["b_id"] = row_id
+            groups.setdefault(columns, []).append(params)
+        for columns, params in groups.items():
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values({name: bindparam(f"b_{name}") for name in columns})
+            )
+            self.db.execute(statement, params)
+
+
+def import_clients(
+    db: Session,
+    rows: Iterable[dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+    progress: Optional[Callable[[int, dict], None]] = None
+) -> dict:
+    """
+    Upsert clients (with contacts and services) from raw CSV rows.
+
+    progress(rows_processed, stats) is called after every chunk.
+
+    Returns:
+        {"total": n, "clients_created": n, "clients_updated": n, ...,
+         "failed": n, "errors": [{"row": n, "error": str}]}
+    """
+    start = datetime.now()
+    importer = ClientImporter(db)
+    importer.load_indexes()
+
+    errors: List[dict] = []
+    chunk: List[Tuple[int, tuple]] = []
+    total = 0
+    valid = 0
+
+    def flush():
+        if not chunk:
+            return
+        try:
+            importer.apply_chunk(chunk)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"[IMPORT] Client chunk of {len(chunk)} rows failed ({e.__class__.__name__}), retrying row by row")
+            for item in chunk:
+                try:
+                    importer.apply_chunk([item])
+                except SQLAlchemyError as row_error:
+                    db.rollback()
+                    errors.append({"row": item[0], "error": str(getattr(row_error, "orig", row_error))})
+        if progress:
+            progress(total, dict(importer.stats, failed=len(errors)))
+
+    for row_number, row in enumerate(rows, start=1):
+        total += 1
+        try:
+            parsed = build_client_row(row)
+        except ValueError as e:
+            errors.append({"row": row_number, "error": str(e)})
+            continue
+        valid += 1
+        if dry_run:
+            continue
+        chunk.append((row_number, parsed))
+        if len(chunk) >= chunk_size:
+            flush()
+            chunk = []
+    flush()
+
+    stats = importer.stats
+    if stats["clients_created"] or stats["clients_updated"]:
+        bump_table_version("clients")
+    if stats["contacts_created"]:
+        bump_table_version("contacts")
+    if stats["services_created"] or stats["services_updated"]:
+        bump_table_version("services")
+
+    duration = (datetime.now() - start).total_seconds()
+    logger.info(
+        f"[IMPORT] Clients: {total} rows, {stats['clients_created']} created, "
+        f"{stats['clients_updated']} updated, {stats['contacts_created']} contacts, "
+        f"{stats['services_created']}+{stats['services_updated']} services, "
+        f"{len(errors)} errors in {duration:.2f}s{' (dry run)' if dry_run else ''}"
+    )
+    errors.sort(key=lambda e: e["row"])
+    return dict(
+        stats,
+        total=total,
+        valid=valid,
+        failed=len(errors),
+        dry_run=dry_run,
+        duration_seconds=round(duration, 3),
+        errors=errors[:MAX_REPORTED_ERRORS],
+        errors_truncated=len(errors) > MAX_REPORTED_ERRORS,
+    )
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import clients or timesheets from CSV")
+    parser.add_argument("kind", choices=["clients", "timesheets"])
+    parser.add_argument("path", help="CSV file (JSON is also accepted for timesheets)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Validate only")
+    parser.add_argument("--staff-member", help="Default staff_member for timesheet rows")
+    args = parser.parse_args(argv)
+
+    from database import SessionLocal
+
+    def print_progress(processed: int, stats: dict) -> None:
+        print(
+            f"[IMPORT] {processed:,} rows: {stats['clients_created']:,} created, "
+            f"{stats['clients_updated']:,} updated, {stats['failed']:,} failed",
+            flush=True,
+        )
+
+    db = SessionLocal()
+    try:
+        if args.kind == "clients":
+            with open(args.path, encoding="utf-8-sig", newline="") as f:
+                report = import_clients(db, iter_csv_rows(f), args.chunk_size, args.dry_run, progress=print_progress)
+        else:
+            with open(args.path, "rb") as f:
+                report = import_timesheets(
+                    db, parse_rows(f.read(), filename=args.path),
+                    default_staff_member=args.staff_member,
+                    chunk_size=args.chunk_size,
+                    dry_run=args.dry_run,
+                )
+    finally:
+        db.close()
+
+    for error in report["errors"]:
+        print(f"[IMPORT] Row {error['row']}: {error['error']}")
+    summary = {k: v for k, v in report.items() if k not in ("errors", "errors_truncated")}
+    print(f"[IMPORT] Done: {json.dumps(summary)}")
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Per-table change counters and ETag helpers for conditional GETs.
+
+The CRUD write functions in crud.py bump a table's counter after every
+successful commit. Read routes derive a weak ETag from the counters of the
+tables they render plus the user and query parameters, so a repeat request
+with a matching If-None-Match can be answered with 304 before any query or
+template render.
+
+Counters live in process memory, like the cache in performance.py. A
+random boot id is folded into every ETag so a restart invalidates them, and
+a time window (ETAG_MAX_AGE_SECONDS) bounds how long a 304 can be served
+for a write this process did not see. Because of that, ETags are only used
+with a single worker (WEB_CONCURRENCY=1): with several, a write handled by
+one worker leaves the others answering 304 from their old counters. They
+are also skipped while the session is pinned after its own write
+(database.PrimaryPinMiddleware), so POST-redirect-GET always re-renders.
+"""
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from starlette.requests import Request
+from starlette.responses import Response
+from pool_metrics import WEB_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+ETAG_MAX_AGE_SECONDS = int(os.getenv("ETAG_MAX_AGE_SECONDS", "300"))
+
+# Counters are per process - see module docstring
+ETAGS_ENABLED = WEB_CONCURRENCY <= 1
+
+# Responses carrying an ETag may be stored by the browser but must be revalidated
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+_BOOT_ID = uuid.uuid4().hex[:12]
+_versions: Dict[str, int] = {}
+_listeners: List[Callable[[Tuple[str, ...]], None]] = []
+_lock = threading.Lock()
+
+
+def bump_table_version(*table_names: str) -> None:
+    """Record that the given tables changed and notify listeners."""
+    with _lock:
+        for table_name in table_names:
+            _versions[table_name] = _versions.get(table_name, 0) + 1
+        listeners = list(_listeners)
+
+    # CRUD functions run in worker threads; listeners must be thread-safe
+    for listener in listeners:
+        try:
+            listener(table_names)
+        except Exception as e:
+            logger.error(f"[CHANGES] Change listener failed: {e}", exc_info=True)
+
+
+def add_change_listener(listener: Callable[[Tuple[str, ...]], None]) -> None:
+    """Call listener(table_names) after every bump_table_version()."""
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_change_listener(listener: Callable[[Tuple[str, ...]], None]) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def get_table_version(table_name: str) -> int:
+    """Current change counter for a table (0 if never written in this process)."""
+    return _versions.get(table_name, 0)
+
+
+def get_table_versions(table_names: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+    """Counters for several tables, as a hashable tuple."""
+    return tuple((name, _versions.get(name, 0)) for name in sorted(table_names))
+
+
+def compute_etag(table_names: Iterable[str], *parts) -> str:
+    """
+    Build a weak ETag from table versions plus any extra identifying parts
+    (user id, query parameters, date, ...).
+    """
+    window = int(time.time() // ETAG_MAX_AGE_SECONDS) if ETAG_MAX_AGE_SECONDS > 0 else 0
+    raw = repr((_BOOT_ID, window, get_table_versions(table_names), parts))
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+
+    Handles '*', comma-separated lists and W/ prefixes (which compression
+    middleware may add).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_get(request: Request, table_names: Iterable[str],
+                    read_db: bool = True) -> Tuple[Optional[str], Optional[Response]]:
+    """
+    Compute the ETag for a read route and check If-None-Match.
+
+    Uses only the session's user_id, so no query runs on a hit. The date is
+    part of the tag because pages highlight overdue/today items.
+
+    read_db: the route renders from get_read_db. When that session is on a
+    read replica, no ETag is used: the counters are the primary's, and the
+    replica may not have applied the write yet, so the tag could end up on
+    (and later 304 for) a stale page.
+
+    No ETag either with several workers or while the session is pinned
+    after a write (see module docstring).
+
+    Returns:
+        (etag, response): response is a ready 304 when the client's copy is
+        current, otherwise None. etag is None for anonymous requests.
+    """
+    user_id = request.session.get("user_id") if "session" in request.scope else None
+    if user_id is None or not ETAGS_ENABLED:
+        return None, None
+    from database import is_pinned_to_primary, reads_from_replica
+    if is_pinned_to_primary(request):
+        return None, None
+    if read_db and reads_from_replica(request):
+        return None, None
+
+    etag = compute_etag(
+        table_names,
+        user_id,
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        date.today().isoformat(),
+    )
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        logger.debug(f"[ETAG] 304 Not Modified for {request.url.path}")
+        return etag, Response(status_code=304, headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL})
+    return etag, None
+
+
+def set_etag(response: Response, etag: Optional[str]) -> Response:
+    """Attach the ETag to a successful response."""
+    if etag and response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
+    return response
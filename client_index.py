@@ -0,0 +1,208 @@
+"""
+In-memory prefix index of client names for the /api/clients/lookup typeahead.
+
+The index is a sorted list of (key, id) pairs, where key is the casefolded
+legal name and also every word-start suffix of it ("smith & co cpa", "& co
+cpa", "co cpa", "cpa"), so "smi" and "cpa" both find "Smith & Co CPA". A
+prefix query is a bisect to the first key >= q followed by a scan while
+keys still start with q - O(log n + k), no database round trip.
+
+Kept current incrementally: session events record Client rows inserted,
+renamed or deleted in a flush and apply them to the index after the
+transaction commits (nothing is applied on rollback). Set-based statements
+on the clients table (bulk import, bulk delete) can't be tracked row by row
+and mark the index stale, as does CLIENT_INDEX_MAX_AGE_SECONDS passing
+(covers writes made by other workers); the next lookup rebuilds it from a
+column-only SELECT id, legal_name.
+
+Rebuilds always read the primary, never a read replica: a replica that has
+not yet applied a bulk import would rebuild the index without those clients
+(and drop incremental updates already applied) for a full
+CLIENT_INDEX_MAX_AGE_SECONDS.
+"""
+import os
+import time
+import bisect
+import heapq
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Client
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CLIENT_INDEX_MAX_AGE_SECONDS = int(os.getenv("CLIENT_INDEX_MAX_AGE_SECONDS", "300"))
+LOOKUP_DEFAULT_LIMIT = 10
+LOOKUP_MAX_LIMIT = 50
+
+# session.info keys for changes waiting on commit
+_PENDING_KEY = "client_index_pending"
+_STALE_KEY = "client_index_stale"
+
+
+def _index_keys(legal_name: str) -> List[str]:
+    """The full casefolded name plus the suffix starting at each later word."""
+    folded = " ".join(legal_name.casefold().split())
+    keys = [folded]
+    for position, char in enumerate(folded):
+        if char == " " and position + 1 < len(folded):
+            keys.append(folded[position + 1:])
+    return keys
+
+
+class ClientPrefixIndex:
+    """Sorted (key, id) list with a reverse map for incremental updates."""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, int]] = []
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+
+    def needs_load(self) -> bool:
+        return self._loaded_at is None or (
+            CLIENT_INDEX_MAX_AGE_SECONDS > 0 and time.monotonic() - self._loaded_at > CLIENT_INDEX_MAX_AGE_SECONDS
+        )
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def load(self, db: Session) -> int:
+        """Rebuild from the database (id and legal_name only). Returns the client count."""
+        rows = db.query(Client.id, Client.legal_name).all()
+        entries, names = [], {}
+        for client_id, legal_name in rows:
+            if not legal_name:
+                continue
+            names[client_id] = legal_name
+            entries.extend((key, client_id) for key in _index_keys(legal_name))
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._names = names
+            self._loaded_at = time.monotonic()
+        logger.info(f"[CLIENT INDEX] Loaded {len(names)} clients ({len(entries)} keys)")
+        return len(names)
+
+    def upsert(self, client_id: int, legal_name: Optional[str]) -> None:
+        with self._lock:
+            self._remove_locked(client_id)
+            if legal_name:
+                self._names[client_id] = legal_name
+                for key in _index_keys(legal_name):
+                    bisect.insort(self._entries, (key, client_id))
+
+    def remove(self, client_id: int) -> None:
+        with self._lock:
+            self._remove_locked(client_id)
+
+    def _remove_locked(self, client_id: int) -> None:
+        old_name = self._names.pop(client_id, None)
+        if old_name is None:
+            return
+        for key in _index_keys(old_name):
+            position = bisect.bisect_left(self._entries, (key, client_id))
+            if position < len(self._entries) and self._entries[position] == (key, client_id):
+                del self._entries[position]
+
+    def search(self, query: str, limit: int = LOOKUP_DEFAULT_LIMIT) -> List[dict]:
+        """
+        Clients whose name, or any word in it, starts with query (case-insensitive).
+        Name-prefix matches sort before word matches; an empty query returns
+        the first clients alphabetically.
+        """
+        prefix = " ".join(query.casefold().split())
+        if not prefix:
+            with self._lock:
+                first = heapq.nsmallest(limit, self._names.items(), key=lambda item: (item[1].casefold(), item[0]))
+            return [{"id": client_id, "legal_name": legal_name} for client_id, legal_name in first]
+
+        matches: Dict[int, bool] = {}
+        with self._lock:
+            entries, names = self._entries, self._names
+            position = bisect.bisect_left(entries, (prefix, -1))
+            # Scan a few extra keys so name-prefix matches aren't crowded out by word matches
+            while position < len(entries) and len(matches) < limit * 4:
+                key, client_id = entries[position]
+                if not key.startswith(prefix):
+                    break
+                starts_name = names[client_id].casefold().startswith(prefix)
+                matches[client_id] = matches.get(client_id, False) or starts_name
+                position += 1
+            results = [(not starts_name, names[client_id].casefold(), client_id, names[client_id])
+                       for client_id, starts_name in matches.items()]
+        results.sort()
+        return [{"id": client_id, "legal_name": legal_name} for _, _, client_id, legal_name in results[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+client_index = ClientPrefixIndex()
+
+
+def load_client_index() -> int:
+    """Rebuild the index on a fresh primary session. Returns the client count."""
+    db = SessionLocal()
+    try:
+        return client_index.load(db)
+    finally:
+        db.close()
+
+
+def lookup_clients(query: str, limit: int = LOOKUP_DEFAULT_LIMIT) -> List[dict]:
+    """Typeahead search, (re)loading the index from the primary first if it is empty or stale."""
+    if client_index.needs_load():
+        load_client_index()
+    return client_index.search(query, max(1, min(limit, LOOKUP_MAX_LIMIT)))
+
+
+# ============================================================================
+# Incremental maintenance
+# ============================================================================
+
+@event.listens_for(Session, "after_flush")
+def _record_client_changes(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in session.new:
+        if isinstance(obj, Client):
+            pending[obj.id] = obj.legal_name
+    for obj in session.dirty:
+        if isinstance(obj, Client) and inspect(obj).attrs.legal_name.history.has_changes():
+            pending[obj.id] = obj.legal_name
+    for obj in session.deleted:
+        if isinstance(obj, Client):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_client_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) == Client.__tablename__:
+        orm_execute_state.session.info[_STALE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_client_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if session.info.pop(_STALE_KEY, False):
+        client_index.invalidate()
+        return
+    if not pending or client_index.needs_load():
+        return
+    for client_id, legal_name in pending.items():
+        if legal_name is None:
+            client_index.remove(client_id)
+        else:
+            client_index.upsert(client_id, legal_name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_client_changes(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_STALE_KEY, None)
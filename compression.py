@@ -0,0 +1,229 @@
+"""
+Response compression middleware.
+
+Compresses text responses with brotli when the client accepts it and the
+brotli package is installed, and with gzip otherwise. Small responses and
+binary/already-encoded content pass through untouched.
+
+Works with both regular and streamed responses (StreamingResponse CSV
+exports etc.): up to 64 KB of body is buffered, after which the rest is
+compressed incrementally and flushed chunk by chunk, so a long stream is
+never held in memory.
+"""
+import zlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Streamed bodies are buffered up to this size before compression starts, so
+# anything smaller is sent in one piece with a Content-Length
+STREAMING_BUFFER_SIZE = 64 * 1024
+
+# Content types worth compressing (prefix match, parameters ignored).
+# text/event-stream is deliberately absent: buffering would delay SSE events.
+DEFAULT_COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/css",
+    "text/csv",
+    "text/plain",
+    "text/javascript",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {encoding: q-value}."""
+    encodings = {}
+    for part in header.split(","):
+        pieces = part.strip().split(";")
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+def acceptable_encodings(accept_encoding: str, offered=("br", "gzip")) -> List[str]:
+    """The offered encodings the client accepts (q > 0, "*" included), in offered order."""
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    return [encoding for encoding in offered if accepted.get(encoding, wildcard) > 0]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" for an Accept-Encoding header, or None."""
+    offered = ("br", "gzip") if brotli is not None else ("gzip",)
+    encodings = acceptable_encodings(accept_encoding, offered)
+    return encodings[0] if encodings else None
+
+
+class _Compressor:
+    """Incremental compressor with a common interface for gzip and brotli."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 -> gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it right away."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses eligible responses.
+
+    A response is compressed when:
+    - the client accepts br or gzip
+    - its Content-Type matches the allowlist
+    - it has no Content-Encoding yet (e.g. precompressed static assets)
+    - its body is at least minimum_size bytes
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types: Tuple[str, ...] = DEFAULT_COMPRESSIBLE_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = content_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-response state for CompressionMiddleware."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream_send = send
+        self.start_message: Optional[Message] = None
+        self.eligible = False
+        self.buffer = bytearray()
+        self.compressor: Optional[_Compressor] = None
+
+    def _is_eligible(self, message: Message) -> bool:
+        if message.get("status", 200) in (204, 304) or message.get("status", 200) < 200:
+            return False
+        headers = Headers(raw=message.get("headers", []))
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type.startswith(self.middleware.content_types)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.eligible = self._is_eligible(message)
+            if self.eligible:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            else:
+                await self.downstream_send(message)
+            return
+
+        if message_type != "http.response.body" or not self.eligible:
+            await self.downstream_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            # Already streaming compressed output
+            if more_body:
+                chunk = self.compressor.compress(body)
+                if chunk:
+                    await self.downstream_send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await self.downstream_send({"type": "http.response.body", "body": self.compressor.finish(body), "more_body": False})
+            return
+
+        self.buffer.extend(body)
+
+        if more_body and len(self.buffer) < max(self.middleware.minimum_size, STREAMING_BUFFER_SIZE):
+            # Keep buffering: short bodies split into several messages (e.g. by
+            # BaseHTTPMiddleware) still get a Content-Length
+            return
+
+        data = bytes(self.buffer)
+        self.buffer.clear()
+
+        if not more_body and len(data) < self.middleware.minimum_size:
+            # Whole body is below the threshold - send it uncompressed
+            await self._send_start(compressed=False, content_length=len(data))
+            await self.downstream_send({"type": "http.response.body", "body": data, "more_body": False})
+            return
+
+        self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+        if more_body:
+            await self._send_start(compressed=True, content_length=None)
+            await self.downstream_send({"type": "http.response.body", "body": self.compressor.compress(data), "more_body": True})
+        else:
+            compressed = self.compressor.finish(data)
+            await self._send_start(compressed=True, content_length=len(compressed))
+            await self.downstream_send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    async def _send_start(self, compressed: bool, content_length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        if compressed:
+            headers["Content-Encoding"] = self.encoding
+            # A strong validator no longer matches the transformed bytes
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+        if content_length is None:
+            if "content-length" in headers:
+                del headers["content-length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        await self.downstream_send(self.start_message)
@@ -4,12 +4,12 @@ CRUD operations for all models.
 These functions encapsulate database operations and can be reused
 across different routes. Keeps business logic separate from routing.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, raiseload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import or_, func, case
+from sqlalchemy import or_, func, case, tuple_
 from sqlalchemy.sql import desc, asc
-from typing import List, Optional, Tuple
-from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 from models import Client, Contact, Service, Task, Note, Timesheet, User
 from schemas import (
     ClientCreate, ClientUpdate,
@@ -17,8 +17,20 @@ from schemas import (
     TimesheetCreate, TimesheetUpdate,
     UserCreate, UserUpdate
 )
+import os
 import json
+import math
 from auth import hash_password, get_default_permissions
+from change_tracking import bump_table_version
+
+# Test mode: any relationship the list/detail read functions below didn't
+# eager-load raises on access instead of silently issuing a query per row.
+RAISE_ON_LAZY_LOAD = os.getenv("CRM_RAISE_ON_LAZY_LOAD", "0") == "1"
+
+
+def _strict_loading(query):
+    """Add raiseload('*') in CRM_RAISE_ON_LAZY_LOAD mode (explicit loader options still win)."""
+    return query.options(raiseload("*")) if RAISE_ON_LAZY_LOAD else query
 
 
 # Client CRUD
@@ -27,6 +39,89 @@ def get_client(db: Session, client_id: int) -> Optional[Client]:
     return db.query(Client).filter(Client.id == client_id).first()
 
 
+def get_client_detail(db: Session, client_id: int) -> Optional[Client]:
+    """
+    Get a client with its contacts loaded up front (one SELECT ... IN
+    instead of a lazy load). Services, tasks, notes and timesheets are not
+    loaded - the detail page fetches them per tab, a page at a time.
+    """
+    query = db.query(Client).options(selectinload(Client.contacts))
+    return _strict_loading(query).filter(Client.id == client_id).first()
+
+
+def client_exists(db: Session, client_id: int) -> bool:
+    return db.query(Client.id).filter(Client.id == client_id).first() is not None
+
+
+# Client detail tabs (keyset pagination)
+CLIENT_TAB_PAGE_SIZE = 25
+CLIENT_TAB_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor for the sort key of the last row on a page."""
+    return "~".join(value.isoformat() if isinstance(value, date) else str(value) for value in values)
+
+
+def _keyset_page(query, columns, parsers, cursor: Optional[str], limit: int, descending: bool = True):
+    """
+    One page of query ordered by columns (the last one unique), starting
+    after cursor. Uses a row-value comparison, so each page is an index
+    range scan no matter how deep it is (no OFFSET).
+    
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(limit, CLIENT_TAB_MAX_PAGE_SIZE))
+    if cursor:
+        parts = cursor.split("~")
+        if len(parts) != len(columns):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        values = [parse(part) for parse, part in zip(parsers, parts)]
+        key, after = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+    
+    order = [desc(column) if descending else asc(column) for column in columns]
+    rows = _strict_loading(query).order_by(*order).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*(getattr(rows[-1], column.key) for column in columns))
+    return rows, next_cursor
+
+
+def get_client_notes_page(db: Session, client_id: int, cursor: Optional[str] = None,
+                          limit: int = CLIENT_TAB_PAGE_SIZE) -> Tuple[List[Note], Optional[str]]:
+    """Newest notes first."""
+    query = db.query(Note).filter(Note.client_id == client_id)
+    return _keyset_page(query, [Note.id], [int], cursor, limit)
+
+
+def get_client_tasks_page(db: Session, client_id: int, cursor: Optional[str] = None,
+                          limit: int = CLIENT_TAB_PAGE_SIZE) -> Tuple[List[Task], Optional[str]]:
+    """Newest tasks first."""
+    query = db.query(Task).filter(Task.client_id == client_id)
+    return _keyset_page(query, [Task.id], [int], cursor, limit)
+
+
+def get_client_services_page(db: Session, client_id: int, cursor: Optional[str] = None,
+                             limit: int = CLIENT_TAB_PAGE_SIZE) -> Tuple[List[Service], Optional[str]]:
+    """Services in the order they were added."""
+    query = db.query(Service).filter(Service.client_id == client_id)
+    return _keyset_page(query, [Service.id], [int], cursor, limit, descending=False)
+
+
+def get_client_timesheets_page(db: Session, client_id: int, cursor: Optional[str] = None,
+                               limit: int = CLIENT_TAB_PAGE_SIZE,
+                               staff_member: Optional[str] = None) -> Tuple[List[Timesheet], Optional[str]]:
+    """Most recent entry_date first; staff_member restricts to one person's entries."""
+    query = db.query(Timesheet).filter(Timesheet.client_id == client_id)
+    if staff_member:
+        query = query.filter(Timesheet.staff_member == staff_member)
+    return _keyset_page(query, [Timesheet.entry_date, Timesheet.id], [date.fromisoformat, int], cursor, limit)
+
+
 async def calculate_client_revenue_async(client_id: int) -> float:
     """
     Calculate annual revenue for a client based on active services.
@@ -116,6 +211,117 @@ async def calculate_client_revenue_async(client_id: int) -> float:
         return 0.0
 
 
+def get_revenue_by_client(db: Session, client_ids: Optional[List[int]] = None) -> Dict[int, float]:
+    """
+    Annual revenue per client from active services, in one aggregate query.
+
+    Same rules as calculate_client_revenue_async: Monthly x12, Quarterly x4,
+    Annual x1, anything else x12. Clients without active services are absent.
+    """
+    annualized_fee = case(
+        (Service.billing_frequency == "Quarterly", Service.monthly_fee * 4),
+        (Service.billing_frequency == "Annual", Service.monthly_fee),
+        else_=Service.monthly_fee * 12,
+    )
+    query = db.query(Service.client_id, func.sum(annualized_fee)).filter(
+        Service.active == True,
+        Service.monthly_fee.isnot(None),
+    )
+    if client_ids is not None:
+        query = query.filter(Service.client_id.in_(client_ids))
+    return {client_id: float(total or 0.0) for client_id, total in query.group_by(Service.client_id)}
+
+
+def _format_date(value) -> Optional[str]:
+    """Format a date/datetime as YYYY-MM-DD for JSON payloads."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+
+def get_dashboard_revenue_snapshot(db: Session) -> dict:
+    """
+    Revenue and pipeline stats for the dashboard, as a JSON-ready dict.
+
+    Two queries regardless of client count (clients + revenue aggregate).
+    Served by /api/dashboard/revenue and pushed by /api/dashboard/stream.
+    """
+    all_clients = db.query(
+        Client.id, Client.status, Client.created_at, Client.next_follow_up_date
+    ).all()
+    revenue_map = get_revenue_by_client(db)
+
+    active_clients = [c for c in all_clients if c.status == "Active"]
+    prospects = [c for c in all_clients if c.status == "Prospect"]
+    won_clients = [c for c in active_clients if c.created_at and c.created_at.year == 2025]
+    lost_clients = [c for c in all_clients if c.status == "Dead"]
+
+    total_revenue = sum(revenue_map.get(c.id, 0.0) for c in active_clients)
+    return {
+        "total_revenue": total_revenue,
+        "total_revenue_formatted": f"{total_revenue:,.0f}",
+        "total_prospect_revenue": sum(revenue_map.get(c.id, 0.0) for c in prospects),
+        "total_won_revenue": sum(revenue_map.get(c.id, 0.0) for c in won_clients),
+        "total_lost_value": sum(revenue_map.get(c.id, 0.0) for c in lost_clients),
+        "total_clients": len(all_clients),
+        "active_clients": len(active_clients),
+        "prospects_count": len(prospects),
+        "prospects": [
+            {
+                "client_id": c.id,
+                "estimated_revenue": revenue_map.get(c.id, 0.0),
+                "expected_close_date": _format_date(c.next_follow_up_date or c.created_at),
+            }
+            for c in prospects
+        ],
+        "won_deals": [
+            {"client_id": c.id, "actual_revenue": revenue_map.get(c.id, 0.0), "close_date": _format_date(c.created_at)}
+            for c in won_clients
+        ],
+        "lost_deals": [
+            {"client_id": c.id, "estimated_value": revenue_map.get(c.id, 0.0), "lost_date": _format_date(c.created_at)}
+            for c in lost_clients
+        ],
+    }
+
+
+def filter_clients_query(
+    query,
+    search: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    entity_type_filter: Optional[str] = None,
+    follow_up_filter: Optional[str] = None
+):
+    """Apply the client list filters to a Client query (shared by pages and /api/v1)."""
+    if search:
+        query = query.filter(Client.legal_name.ilike(f"%{search}%"))
+    
+    if status_filter:
+        query = query.filter(Client.status == status_filter)
+    
+    if entity_type_filter:
+        query = query.filter(Client.entity_type == entity_type_filter)
+    
+    if follow_up_filter:
+        today = date.today()
+        if follow_up_filter == "needed":
+            # Prospects needing follow-up (due today or past)
+            query = query.filter(
+                Client.status == "Prospect",
+                Client.next_follow_up_date <= today
+            )
+        elif follow_up_filter == "overdue":
+            # Prospects overdue for follow-up (past date only)
+            query = query.filter(
+                Client.status == "Prospect",
+                Client.next_follow_up_date < today
+            )
+    
+    return query
+
+
 def get_clients(
     db: Session, 
     skip: int = 0, 
@@ -125,7 +331,8 @@ def get_clients(
     entity_type_filter: Optional[str] = None,
     follow_up_filter: Optional[str] = None,
     sort_by: str = "name",
-    sort_order: str = "asc"
+    sort_order: str = "asc",
+    with_contacts: bool = False
 ) -> List[Client]:
     """
     Get all clients with optional search, filtering, and sorting.
@@ -133,37 +340,25 @@ def get_clients(
     follow_up_filter options:
     - "needed": Prospects with follow-up date today or in the past
     - "overdue": Prospects with follow-up date in the past
+    
+    with_contacts=True loads every client's contacts in one extra query
+    (selectinload) for pages that show a contact per row.
     """
     import logging
     from sqlalchemy.exc import SQLAlchemyError
     logger = logging.getLogger(__name__)
     
     try:
-        query = db.query(Client)
-        
-        if search:
-            query = query.filter(Client.legal_name.ilike(f"%{search}%"))
-        
-        if status_filter:
-            query = query.filter(Client.status == status_filter)
-        
-        if entity_type_filter:
-            query = query.filter(Client.entity_type == entity_type_filter)
-        
-        if follow_up_filter:
-            today = date.today()
-            if follow_up_filter == "needed":
-                # Prospects needing follow-up (due today or past)
-                query = query.filter(
-                    Client.status == "Prospect",
-                    Client.next_follow_up_date <= today
-                )
-            elif follow_up_filter == "overdue":
-                # Prospects overdue for follow-up (past date only)
-                query = query.filter(
-                    Client.status == "Prospect",
-                    Client.next_follow_up_date < today
-                )
+        query = filter_clients_query(
+            db.query(Client),
+            search=search,
+            status_filter=status_filter,
+            entity_type_filter=entity_type_filter,
+            follow_up_filter=follow_up_filter
+        )
+        if with_contacts:
+            query = query.options(selectinload(Client.contacts))
+        query = _strict_loading(query)
         
         # Sorting
         if sort_by == "name":
@@ -216,6 +411,7 @@ def create_client(db: Session, client: ClientCreate) -> Client:
         db_client = Client(**client.dict())
         db.add(db_client)
         db.commit()
+        bump_table_version("clients")
         db.refresh(db_client)
         logger.info(f"Created client {db_client.id}: {db_client.legal_name}")
         return db_client
@@ -246,6 +442,7 @@ def update_client(db: Session, client_id: int, client_update: ClientUpdate) -> O
             setattr(db_client, field, value)
         
         db.commit()
+        bump_table_version("clients")
         db.refresh(db_client)
         logger.info(f"Updated client {client_id}: {db_client.legal_name}")
         return db_client
@@ -282,6 +479,7 @@ def update_client_field(db: Session, client_id: int, field: str, value: any) ->
         
         setattr(db_client, field, value)
         db.commit()
+        bump_table_version("clients")
         db.refresh(db_client)
     
     return db_client
@@ -302,6 +500,7 @@ def delete_client(db: Session, client_id: int) -> bool:
         client_name = db_client.legal_name
         db.delete(db_client)
         db.commit()
+        bump_table_version("clients", "contacts", "services", "tasks", "notes", "timesheets")
         logger.info(f"Deleted client {client_id}: {client_name}")
         return True
     except SQLAlchemyError as e:
@@ -325,6 +524,7 @@ def create_contact(db: Session, contact: ContactCreate) -> Contact:
         db_contact = Contact(**contact.dict())
         db.add(db_contact)
         db.commit()
+        bump_table_version("contacts")
         db.refresh(db_contact)
         logger.info(f"Created contact {db_contact.id} for client {db_contact.client_id}: {db_contact.name}")
         return db_contact
@@ -346,6 +546,7 @@ def delete_contact(db: Session, contact_id: int) -> bool:
     
     db.delete(db_contact)
     db.commit()
+    bump_table_version("contacts")
     return True
 
 
@@ -360,6 +561,7 @@ def create_service(db: Session, service: ServiceCreate) -> Service:
         db_service = Service(**service.dict())
         db.add(db_service)
         db.commit()
+        bump_table_version("services")
         db.refresh(db_service)
         logger.info(f"Created service {db_service.id} for client {db_service.client_id}: {db_service.service_type}")
         return db_service
@@ -381,6 +583,7 @@ def update_service(db: Session, service_id: int, active: bool) -> Optional[Servi
     
     db_service.active = active
     db.commit()
+    bump_table_version("services")
     db.refresh(db_service)
     return db_service
 
@@ -393,6 +596,7 @@ def delete_service(db: Session, service_id: int) -> bool:
     
     db.delete(db_service)
     db.commit()
+    bump_table_version("services")
     return True
 
 
@@ -407,6 +611,7 @@ def create_task(db: Session, task: TaskCreate) -> Task:
         db_task = Task(**task.dict())
         db.add(db_task)
         db.commit()
+        bump_table_version("tasks")
         db.refresh(db_task)
         logger.info(f"Created task {db_task.id} for client {db_task.client_id}: {db_task.title}")
         return db_task
@@ -428,6 +633,7 @@ def update_task_status(db: Session, task_id: int, status: str) -> Optional[Task]
     
     db_task.status = status
     db.commit()
+    bump_table_version("tasks")
     db.refresh(db_task)
     return db_task
 
@@ -440,6 +646,7 @@ def delete_task(db: Session, task_id: int) -> bool:
     
     db.delete(db_task)
     db.commit()
+    bump_table_version("tasks")
     return True
 
 
@@ -454,6 +661,7 @@ def create_note(db: Session, note: NoteCreate) -> Note:
         db_note = Note(**note.dict())
         db.add(db_note)
         db.commit()
+        bump_table_version("notes")
         db.refresh(db_note)
         logger.info(f"Created note {db_note.id} for client {db_note.client_id}")
         return db_note
@@ -475,10 +683,187 @@ def delete_note(db: Session, note_id: int) -> bool:
     
     db.delete(db_note)
     db.commit()
+    bump_table_version("notes")
     return True
 
 
+# Bulk operations
+#
+# Set-based UPDATE/DELETE ... WHERE id IN (...) in one transaction. They skip
+# the ORM identity map (synchronize_session=False), so callers must not rely
+# on already-loaded objects for the affected rows afterwards.
+
+# Upper bound on ids per bulk request (keeps IN lists well under driver limits)
+MAX_BULK_IDS = 5000
+
+
+def _bulk_update(db: Session, model, ids: List[int], values: dict, table_name: str) -> int:
+    """UPDATE model SET values WHERE id IN ids; returns the number of rows matched."""
+    import logging
+    from sqlalchemy.exc import SQLAlchemyError
+    logger = logging.getLogger(__name__)
+    
+    if not ids or not values:
+        return 0
+    try:
+        count = db.query(model).filter(model.id.in_(ids)).update(values, synchronize_session=False)
+        db.commit()
+        bump_table_version(table_name)
+        logger.info(f"[BULK] Updated {count} {table_name} ({', '.join(values)})")
+        return count
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in bulk update of {table_name}: {e}", exc_info=True)
+        db.rollback()
+        raise
+
+
+def _bulk_delete(db: Session, model, ids: List[int], table_name: str) -> int:
+    """DELETE FROM model WHERE id IN ids; returns the number of rows deleted."""
+    import logging
+    from sqlalchemy.exc import SQLAlchemyError
+    logger = logging.getLogger(__name__)
+    
+    if not ids:
+        return 0
+    try:
+        count = db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        bump_table_version(table_name)
+        logger.info(f"[BULK] Deleted {count} {table_name}")
+        return count
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in bulk delete of {table_name}: {e}", exc_info=True)
+        db.rollback()
+        raise
+
+
+def bulk_update_clients(db: Session, client_ids: List[int], values: dict) -> int:
+    """Set the same field values on many clients (status change, owner reassignment, ...)."""
+    return _bulk_update(db, Client, client_ids, values, "clients")
+
+
+def bulk_reassign_owner(
+    db: Session,
+    owner_name: str,
+    owner_email: Optional[str] = None,
+    client_ids: Optional[List[int]] = None,
+    from_owner_name: Optional[str] = None,
+    status_filter: Optional[str] = None
+) -> int:
+    """
+    Reassign clients to a new owner in one UPDATE.
+    
+    Targets client_ids if given, otherwise every client currently owned by
+    from_owner_name (optionally only those with status_filter, e.g. "Prospect").
+    """
+    import logging
+    from sqlalchemy.exc import SQLAlchemyError
+    logger = logging.getLogger(__name__)
+    
+    query = db.query(Client)
+    if client_ids:
+        query = query.filter(Client.id.in_(client_ids))
+    elif from_owner_name:
+        query = query.filter(func.lower(Client.owner_name) == from_owner_name.strip().lower())
+    else:
+        return 0
+    if status_filter:
+        query = query.filter(Client.status == status_filter)
+    
+    try:
+        count = query.update({"owner_name": owner_name, "owner_email": owner_email}, synchronize_session=False)
+        db.commit()
+        bump_table_version("clients")
+        logger.info(f"[BULK] Reassigned {count} clients to {owner_name}")
+        return count
+    except SQLAlchemyError as e:
+        logger.error(f"Database error reassigning owner: {e}", exc_info=True)
+        db.rollback()
+        raise
+
+
+def bulk_delete_clients(db: Session, client_ids: List[int]) -> int:
+    """
+    Delete many clients and all their related records in one transaction.
+    
+    Child rows are deleted set-based first (the ORM cascade would load and
+    delete them one by one).
+    """
+    import logging
+    from sqlalchemy.exc import SQLAlchemyError
+    logger = logging.getLogger(__name__)
+    
+    if not client_ids:
+        return 0
+    try:
+        for child in (Contact, Service, Task, Note, Timesheet):
+            db.query(child).filter(child.client_id.in_(client_ids)).delete(synchronize_session=False)
+        count = db.query(Client).filter(Client.id.in_(client_ids)).delete(synchronize_session=False)
+        db.commit()
+        bump_table_version("clients", "contacts", "services", "tasks", "notes", "timesheets")
+        logger.info(f"[BULK] Deleted {count} clients with related records")
+        return count
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in bulk client delete: {e}", exc_info=True)
+        db.rollback()
+        raise
+
+
+def bulk_update_task_status(db: Session, task_ids: List[int], status: str) -> int:
+    """Set the status of many tasks."""
+    return _bulk_update(db, Task, task_ids, {"status": status}, "tasks")
+
+
+def bulk_delete_tasks(db: Session, task_ids: List[int]) -> int:
+    """Delete many tasks."""
+    return _bulk_delete(db, Task, task_ids, "tasks")
+
+
+def bulk_set_services_active(db: Session, service_ids: List[int], active: bool) -> int:
+    """Activate or deactivate many services."""
+    return _bulk_update(db, Service, service_ids, {"active": active}, "services")
+
+
+def bulk_delete_services(db: Session, service_ids: List[int]) -> int:
+    """Delete many services."""
+    return _bulk_delete(db, Service, service_ids, "services")
+
+
 # Timesheet CRUD
+def filter_timesheets_query(
+    query,
+    client_id: Optional[int] = None,
+    staff_member: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    search: Optional[str] = None
+):
+    """Apply the timesheet list filters to a Timesheet query (shared by pages and /api/v1)."""
+    if client_id:
+        query = query.filter(Timesheet.client_id == client_id)
+    
+    if staff_member:
+        query = query.filter(Timesheet.staff_member == staff_member)
+    
+    if date_from:
+        query = query.filter(Timesheet.entry_date >= date_from)
+    
+    if date_to:
+        query = query.filter(Timesheet.entry_date <= date_to)
+    
+    if search:
+        search_term = f"%{search}%"
+        query = query.filter(
+            or_(
+                Timesheet.description.ilike(search_term),
+                Timesheet.project_task.ilike(search_term),
+                Timesheet.staff_member.ilike(search_term)
+            )
+        )
+    
+    return query
+
+
 def get_timesheets(
     db: Session,
     skip: int = 0,
@@ -495,29 +880,14 @@ def get_timesheets(
     logger = logging.getLogger(__name__)
     
     try:
-        query = db.query(Timesheet)
-        
-        if client_id:
-            query = query.filter(Timesheet.client_id == client_id)
-        
-        if staff_member:
-            query = query.filter(Timesheet.staff_member == staff_member)
-        
-        if date_from:
-            query = query.filter(Timesheet.entry_date >= date_from)
-        
-        if date_to:
-            query = query.filter(Timesheet.entry_date <= date_to)
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Timesheet.description.ilike(search_term),
-                    Timesheet.project_task.ilike(search_term),
-                    Timesheet.staff_member.ilike(search_term)
-                )
-            )
+        query = filter_timesheets_query(
+            db.query(Timesheet),
+            client_id=client_id,
+            staff_member=staff_member,
+            date_from=date_from,
+            date_to=date_to,
+            search=search
+        )
         
         # Order by most recent first
         query = query.order_by(desc(Timesheet.entry_date), desc(Timesheet.created_at))
@@ -532,6 +902,27 @@ def get_timesheets(
         return []
 
 
+def calculate_hours(entry_date: date, start_time: str, end_time: str) -> float:
+    """
+    Hours between two HH:MM times on entry_date (overnight if end < start).
+    
+    Raises:
+        ValueError: If either time is not HH:MM.
+    """
+    start_dt = datetime.combine(entry_date, datetime.strptime(start_time, "%H:%M").time())
+    end_dt = datetime.combine(entry_date, datetime.strptime(end_time, "%H:%M").time())
+    if end_dt < start_dt:
+        end_dt += timedelta(days=1)  # Handle overnight
+    return (end_dt - start_dt).total_seconds() / 3600.0
+
+
+def round_up_to_quarter_hour(hours: float) -> float:
+    """Round hours up to the nearest 15-minute increment (0.25 hours)."""
+    minutes = hours * 60
+    rounded_minutes = math.ceil(minutes / 15) * 15
+    return rounded_minutes / 60
+
+
 def get_timesheet(db: Session, timesheet_id: int) -> Optional[Timesheet]:
     """Get a single timesheet entry by ID."""
     return db.query(Timesheet).filter(Timesheet.id == timesheet_id).first()
@@ -547,6 +938,7 @@ def create_timesheet(db: Session, timesheet: TimesheetCreate) -> Timesheet:
     db_timesheet = Timesheet(**timesheet.dict())
     db.add(db_timesheet)
     db.commit()
+    bump_table_version("timesheets")
     db.refresh(db_timesheet)
     return db_timesheet
 
@@ -563,6 +955,7 @@ def update_timesheet(db: Session, timesheet_id: int, timesheet_update: Timesheet
     
     db_timesheet.updated_at = datetime.now()
     db.commit()
+    bump_table_version("timesheets")
     db.refresh(db_timesheet)
     return db_timesheet
 
@@ -575,6 +968,7 @@ def delete_timesheet(db: Session, timesheet_id: int) -> bool:
     
     db.delete(db_timesheet)
     db.commit()
+    bump_table_version("timesheets")
     return True
 
 
@@ -677,6 +1071,7 @@ def create_user(db: Session, user: UserCreate) -> User:
         )
         db.add(db_user)
         db.commit()
+        bump_table_version("users")
         db.refresh(db_user)
         return db_user
     except Exception as e:
@@ -707,6 +1102,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
         setattr(db_user, field, value)
     
     db.commit()
+    bump_table_version("users")
     db.refresh(db_user)
     return db_user
 
@@ -719,5 +1115,6 @@ def delete_user(db: Session, user_id: int) -> bool:
     
     db_user.active = False
     db.commit()
+    bump_table_version("users")
     return True
 
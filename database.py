@@ -6,43 +6,184 @@ All database operations are managed through session contexts.
 
 NOTE: Kept synchronous for backward compatibility with existing code.
 Revenue calculation uses async wrapper to prevent blocking.
+
+Read replica (optional): when DATABASE_READ_URL is set, read-only routes
+use get_read_db, which hands out sessions on the replica engine. Writes
+always go through get_db (primary). After any successful non-GET request
+PrimaryPinMiddleware stamps the session cookie, and for READ_PIN_SECONDS
+get_read_db serves that user from the primary, so users see their own
+writes despite replica lag. Without DATABASE_READ_URL both dependencies
+use the primary. Works with two SQLite files locally, e.g.
+DATABASE_READ_URL=sqlite:///./crm_replica.db.
+
+Pool sizes come from a global connection budget split across worker
+processes (DB_MAX_CONNECTIONS / WEB_CONCURRENCY), and every pool reports
+checkout wait times and long-held connections - see pool_metrics.py.
+
+SQLite (no DATABASE_URL) runs a tuned profile unless SQLITE_TUNED=0:
+WAL journal, synchronous=NORMAL, mmap, a larger page cache, busy_timeout
+and foreign keys, set on every new connection. Writes go through a single
+writer connection (SQLite allows one writer at a time anyway, so a writer
+pool only adds lock contention) while reads use a pool of reader
+connections, which WAL lets run alongside the writer. get_db sessions
+route per statement: reads use a reader until the session first writes,
+then stay on the writer until commit/rollback so the transaction sees its
+own changes. Compare profiles with `python benchmark.py sqlite-concurrency`.
 """
 import os
+import time
 import logging
-from sqlalchemy import create_engine
+from starlette.requests import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.exc import SQLAlchemyError
+from pool_metrics import (
+    DB_MAX_CONNECTIONS, DB_POOL_TIMEOUT, instrument_engine, instrumented_pool_class, pool_budget
+)
 
 logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+# How long after a write a session keeps reading from the primary
+READ_PIN_SECONDS = float(os.getenv("READ_PIN_SECONDS", "5"))
+PIN_SESSION_KEY = "db_pin_until"
+
+# SQLite profile (see module docstring)
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "1") != "0"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))        # per connection
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+
+def _normalize_postgres_url(url: str) -> str:
+    """Convert postgres:// / postgresql:// to the psycopg (v3) driver URL."""
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg://", 1)
+    if url.startswith("postgresql://"):
+        # Use psycopg driver (version 3) instead of psycopg2 (Python 3.13 compatible)
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
+def _create_postgres_engine(url: str, application_name: str, pool_name: str,
+                            max_connections: int = DB_MAX_CONNECTIONS):
+    # PostgreSQL engine sized from this process's share of the connection budget
+    pool_size, max_overflow = pool_budget(max_connections)
+    new_engine = create_engine(
+        url,
+        poolclass=instrumented_pool_class(pool_name),
+        pool_pre_ping=True,      # Verify connections before using
+        pool_recycle=300,        # Recycle connections after 5 minutes
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,  # Fail fast instead of hanging the request
+        echo=False,              # Set to True for SQL debugging
+        connect_args={
+            "connect_timeout": 10,  # Connection timeout
+            "application_name": application_name
+        }
+    )
+    instrument_engine(new_engine, pool_name)
+    logger.info(f"[POOL] {pool_name}: pool_size={pool_size}, max_overflow={max_overflow}, "
+                f"timeout={DB_POOL_TIMEOUT:.0f}s")
+    return new_engine
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; fsync only at checkpoints
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")  # negative = KiB
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+def _create_sqlite_engine(url: str, pool_name: str, tuned: bool = False, **pool_args):
+    new_engine = create_engine(
+        url,
+        poolclass=instrumented_pool_class(pool_name),
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args={"check_same_thread": False},
+        echo=False,  # Set to True for SQL debugging
+        **pool_args
+    )
+    if tuned:
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    instrument_engine(new_engine, pool_name)
+    return new_engine
+
+
+def create_sqlite_engines(url: str, tuned: bool = SQLITE_TUNED, name: str = "primary"):
+    """
+    (writer, reader) engines for a SQLite file. Tuned: one writer connection
+    plus a reader pool. Untuned: one default-pooled engine used for both.
+    """
+    if not tuned:
+        single = _create_sqlite_engine(url, name)
+        return single, single
+    writer = _create_sqlite_engine(url, name, tuned=True, pool_size=1, max_overflow=0)
+    reader = _create_sqlite_engine(url, f"{name}_reader", tuned=True,
+                                   pool_size=SQLITE_READ_POOL_SIZE, max_overflow=SQLITE_READ_POOL_SIZE)
+    return writer, reader
+
+
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+
+class SQLiteRoutingSession(Session):
+    """
+    Session over a SQLite writer/reader pair (see create_sqlite_engines).
+    
+    Statements go to the reader until the session flushes or executes DML,
+    then everything goes to the writer until the transaction ends, so a
+    transaction always reads its own uncommitted writes.
+    """
+    
+    def __init__(self, writer=None, reader=None, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase) or (
+            isinstance(clause, TextClause) and clause.text.lstrip().upper().startswith(_WRITE_VERBS)
+        ):
+            self.info["sqlite_writing"] = True
+        return self.writer if self.info.get("sqlite_writing") else self.reader
+
+
+@event.listens_for(SQLiteRoutingSession, "after_transaction_end")
+def _release_sqlite_writer(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("sqlite_writing", None)
+
+
+def sqlite_session_factory(writer, reader):
+    """sessionmaker for a (writer, reader) pair; a plain sessionmaker when they're one engine."""
+    if writer is reader:
+        return sessionmaker(autocommit=False, autoflush=False, bind=writer)
+    return sessionmaker(class_=SQLiteRoutingSession, writer=writer, reader=reader,
+                        autocommit=False, autoflush=False)
+
 
 # Initialize engine with connection pooling and error handling
 if DATABASE_URL:
     # PostgreSQL (for production on Render)
-    # Convert postgres:// to postgresql:// if needed
-    if DATABASE_URL.startswith("postgres://"):
-        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg://", 1)
-    elif DATABASE_URL.startswith("postgresql://"):
-        # Use psycopg driver (version 3) instead of psycopg2 (Python 3.13 compatible)
-        DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+    DATABASE_URL = _normalize_postgres_url(DATABASE_URL)
     
     try:
-        # PostgreSQL engine with optimized connection pooling
-        engine = create_engine(
-            DATABASE_URL,
-            pool_pre_ping=True,      # Verify connections before using
-            pool_recycle=300,        # Recycle connections after 5 minutes
-            pool_size=20,            # Increased pool size for better concurrency
-            max_overflow=40,          # Allow overflow connections under load
-            pool_timeout=30,         # Timeout for getting connection from pool
-            echo=False,              # Set to True for SQL debugging
-            connect_args={
-                "connect_timeout": 10,  # Connection timeout
-                "application_name": "tierney_ohlms_crm"
-            }
-        )
+        engine = _create_postgres_engine(DATABASE_URL, "tierney_ohlms_crm", "primary")
         logger.info("Database engine created: PostgreSQL")
     except Exception as e:
         logger.error(f"Failed to create PostgreSQL engine: {e}")
@@ -51,18 +192,50 @@ else:
     # SQLite (for local development)
     SQLALCHEMY_DATABASE_URL = "sqlite:///./crm.db"
     try:
-        engine = create_engine(
-            SQLALCHEMY_DATABASE_URL,
-            connect_args={"check_same_thread": False},
-            echo=False  # Set to True for SQL debugging
-        )
-        logger.info("Database engine created: SQLite")
+        engine, sqlite_reader_engine = create_sqlite_engines(SQLALCHEMY_DATABASE_URL)
+        logger.info(f"Database engine created: SQLite ({'tuned, single writer' if SQLITE_TUNED else 'default profile'})")
     except Exception as e:
         logger.error(f"Failed to create SQLite engine: {e}")
         raise
 
+# Read replica engine (falls back to the primary when not configured)
+if DATABASE_READ_URL:
+    try:
+        if DATABASE_READ_URL.startswith("sqlite"):
+            read_engine = _create_sqlite_engine(DATABASE_READ_URL, "replica")
+        else:
+            DATABASE_READ_URL = _normalize_postgres_url(DATABASE_READ_URL)
+            # The replica is a separate server with its own connection limit
+            read_engine = _create_postgres_engine(
+                DATABASE_READ_URL, "tierney_ohlms_crm_read", "replica",
+                max_connections=int(os.getenv("DB_READ_MAX_CONNECTIONS", str(DB_MAX_CONNECTIONS)))
+            )
+        logger.info(f"Read replica engine created: {read_engine.dialect.name}")
+    except Exception as e:
+        logger.error(f"Failed to create read replica engine: {e}")
+        raise
+elif not DATABASE_URL:
+    # SQLite: read-only routes use the reader pool directly
+    read_engine = sqlite_reader_engine
+else:
+    read_engine = engine
+
+# /health/ready pings the primary database. On SQLite that means a reader
+# connection: the single writer connection can be held by a long write,
+# which would make the probe time out although the database is fine.
+ping_engine = engine if DATABASE_URL else sqlite_reader_engine
+
 Base = declarative_base()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if DATABASE_URL:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+else:
+    SessionLocal = sqlite_session_factory(engine, sqlite_reader_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+def has_read_replica() -> bool:
+    """True when DATABASE_READ_URL points at a separate (possibly lagging) database."""
+    return bool(DATABASE_READ_URL)
 
 def get_db():
     """
@@ -90,3 +263,77 @@ def get_db():
     finally:
         db.close()
 
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """True if this session wrote recently and must read its own writes."""
+    if "session" not in request.scope:
+        return False
+    return request.session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def reads_from_replica(request: Request) -> bool:
+    """True if get_read_db serves this request from the (possibly lagging) replica."""
+    return has_read_replica() and not is_pinned_to_primary(request)
+
+
+def get_read_db(request: Request):
+    """
+    Dependency for read-only routes (lists, detail pages, exports, dashboard).
+    
+    Yields a replica session, or a primary session when no replica is
+    configured or the user wrote within the last READ_PIN_SECONDS. Never
+    write through this session.
+    """
+    if read_engine is engine or not reads_from_replica(request):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    except SQLAlchemyError as e:
+        logger.error(f"Database error in read session: {e}", exc_info=True)
+        db.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in read session: {e}", exc_info=True)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class PrimaryPinMiddleware:
+    """
+    Pin a session's reads to the primary for READ_PIN_SECONDS after a write.
+    
+    Any non-GET/HEAD/OPTIONS request that succeeds (status < 400, which
+    includes the redirect after a form POST) is treated as a write. Must be
+    added before SessionMiddleware so it runs inside it and can update the
+    session before the cookie is written.
+    
+    The pin is stamped with or without a replica: besides routing reads
+    (replica only), it suspends ETags for the session (see
+    change_tracking.conditional_get) so a user never gets a 304 for a page
+    their own write changed.
+    """
+    
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in self.SAFE_METHODS
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400 and "session" in scope:
+                scope["session"][PIN_SESSION_KEY] = time.time() + READ_PIN_SECONDS
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,206 @@
+"""
+Server-Sent Events broadcaster for the dashboard.
+
+One DashboardBroadcaster per process holds the latest revenue snapshot
+(crud.get_dashboard_revenue_snapshot). CRUD writes to clients/services bump
+their change counters (change_tracking.py), which schedules a single
+recompute; the result is pushed to every connected /api/dashboard/stream
+subscriber. Subscribers never touch the database, so the number of open
+dashboard tabs does not affect query load.
+
+Change counters are per process: a write handled by another worker is not
+seen here until the scheduler's dashboard_revenue job recomputes the
+snapshot (every DASHBOARD_REFRESH_SECONDS, default 300s), so subscribers
+connected to this worker get it then. If a recompute fails, subscribers keep
+the last good snapshot and get an "error" event only if there is none yet.
+"""
+import json
+import asyncio
+import logging
+from typing import Optional, Set, Tuple
+from change_tracking import add_change_listener, remove_change_listener
+
+logger = logging.getLogger(__name__)
+
+# Tables whose writes change the revenue snapshot
+WATCHED_TABLES = {"clients", "services"}
+
+# Bursts of writes (e.g. a client with several services) collapse into one recompute
+DEBOUNCE_SECONDS = 0.5
+
+# Comment line sent on idle streams so proxies don't drop the connection
+KEEPALIVE_SECONDS = 15
+
+
+def format_sse(data: dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Encode one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class DashboardBroadcaster:
+    """Computes the dashboard snapshot once per change and fans it out."""
+
+    def __init__(self, debounce_seconds: float = DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self.snapshot: Optional[dict] = None
+        self.version = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stale = True
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Attach to the running event loop and start listening for writes."""
+        self._loop = loop or asyncio.get_running_loop()
+        add_change_listener(self._on_tables_changed)
+        logger.info("[EVENTS] Dashboard broadcaster started")
+
+    def stop(self) -> None:
+        remove_change_listener(self._on_tables_changed)
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._loop = None
+
+    def _on_tables_changed(self, table_names: Tuple[str, ...]) -> None:
+        """change_tracking listener - may be called from any thread."""
+        if not WATCHED_TABLES.intersection(table_names):
+            return
+        self._stale = True
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._schedule_refresh)
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_after_debounce())
+            self._refresh_task.add_done_callback(self._reschedule_if_stale)
+
+    def _reschedule_if_stale(self, task: asyncio.Task) -> None:
+        """
+        A write that landed while a refresh was computing marked the snapshot
+        stale but couldn't schedule (the task was still running), so the
+        published snapshot predates it - refresh again. Failed refreshes are
+        left to the next write or get_snapshot() rather than retried in a loop.
+        """
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self._stale and self._loop is not None and not self._loop.is_closed():
+            self._schedule_refresh()
+
+    async def _refresh_after_debounce(self) -> None:
+        await asyncio.sleep(self.debounce_seconds)
+        await self.refresh()
+
+    async def refresh(self) -> dict:
+        """Recompute the snapshot and publish it to all subscribers."""
+        # Cleared before computing: a write landing mid-compute marks it stale again
+        self._stale = False
+        try:
+            snapshot = await asyncio.to_thread(_compute_snapshot)
+        except Exception as e:
+            self._stale = True
+            logger.error(f"[EVENTS] Error computing dashboard snapshot: {e}", exc_info=True)
+            raise
+        self.snapshot = snapshot
+        self.version += 1
+        self._publish(self.version, snapshot)
+        logger.info(
+            f"[EVENTS] Dashboard snapshot v{self.version} computed "
+            f"(total=${snapshot['total_revenue']:,.2f}, {len(self._subscribers)} subscriber(s))"
+        )
+        return snapshot
+
+    async def get_snapshot(self) -> dict:
+        """
+        Current snapshot, computing it first if a write invalidated it.
+        If the recompute fails, the previous (stale) snapshot is returned;
+        the error is only raised when there is no snapshot at all.
+        """
+        if self.snapshot is None or self._stale:
+            # Concurrent callers (and a pending debounced refresh) share one computation
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.ensure_future(self.refresh())
+                self._refresh_task.add_done_callback(self._reschedule_if_stale)
+            try:
+                await asyncio.shield(self._refresh_task)
+            except Exception as e:
+                if self.snapshot is None:
+                    raise
+                logger.warning(f"[EVENTS] Serving stale dashboard snapshot v{self.version}: {e}")
+        return self.snapshot
+
+    def ensure_fresh(self) -> None:
+        """Schedule a background refresh if the snapshot is missing or stale."""
+        if self._loop is not None and (self.snapshot is None or self._stale):
+            self._schedule_refresh()
+
+    def subscribe(self) -> asyncio.Queue:
+        # maxsize=1: a slow client only ever needs the latest snapshot
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, version: int, snapshot: dict) -> None:
+        for queue in list(self._subscribers):
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait((version, snapshot))
+
+    async def stream(self, request):
+        """Async generator of SSE messages for one subscriber."""
+        queue = self.subscribe()
+        try:
+            # The response has started, so a failed first compute becomes an
+            # error event; the next successful refresh arrives through the queue
+            last_version = 0
+            try:
+                snapshot = await self.get_snapshot()
+                last_version = self.version
+                yield format_sse(snapshot, event="revenue", event_id=last_version)
+            except Exception as e:
+                yield format_sse({"error": "Revenue data is temporarily unavailable"}, event="error")
+                logger.error(f"[EVENTS] Stream started without a snapshot: {e}")
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    version, snapshot = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if version > last_version:
+                    last_version = version
+                    yield format_sse(snapshot, event="revenue", event_id=version)
+        finally:
+            self.unsubscribe(queue)
+
+
+def _compute_snapshot() -> dict:
+    """Build the snapshot on a fresh session (runs in a worker thread)."""
+    from database import SessionLocal
+    from crud import get_dashboard_revenue_snapshot
+
+    db = SessionLocal()
+    try:
+        return get_dashboard_revenue_snapshot(db)
+    finally:
+        db.close()
+
+
+dashboard_broadcaster = DashboardBroadcaster()
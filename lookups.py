@@ -0,0 +1,73 @@
+"""
+Distinct column values for filter dropdowns.
+
+Each lookup is a column-only SELECT DISTINCT (no ORM rows are loaded) and
+is cached in performance.py's cache under a key that includes the clients
+table's change counter (change_tracking.py). A write through crud.py bumps
+the counter, so the next request misses and re-queries; writes made by
+another worker are picked up when the cache TTL (5 minutes) expires.
+
+Cache misses always query the primary, even when the caller's session is a
+get_read_db session on a read replica: values read from a lagging replica
+would be cached under the new version key and kept for the full TTL.
+"""
+import logging
+from typing import Callable, List
+from sqlalchemy.orm import Session
+from models import Client
+from database import SessionLocal, has_read_replica
+from performance import get_cache, set_cache
+from change_tracking import get_table_version
+
+logger = logging.getLogger(__name__)
+
+
+def _distinct_values(db: Session, column, *criteria) -> List[str]:
+    """Sorted non-empty distinct values of column (sorted in Python so order matches on every database)."""
+    query = db.query(column).filter(column.isnot(None), *criteria).distinct()
+    return sorted(value for (value,) in query if value)
+
+
+def _load_from_primary(db: Session, loader: Callable[[Session], List[str]]) -> List[str]:
+    """Run loader on db, or on a primary session when db may be a replica session."""
+    if not has_read_replica():
+        return loader(db)
+    primary = SessionLocal()
+    try:
+        return loader(primary)
+    finally:
+        primary.close()
+
+
+def _cached_lookup(name: str, table_name: str, db: Session, loader: Callable[[Session], List[str]]) -> List[str]:
+    key = f"lookup:{name}:v{get_table_version(table_name)}"
+    values = get_cache(key)
+    if values is None:
+        values = _load_from_primary(db, loader)
+        set_cache(key, values)
+        logger.debug(f"[LOOKUPS] Loaded {name}: {len(values)} values")
+    return values
+
+
+def client_statuses(db: Session) -> List[str]:
+    """Statuses in use on any client."""
+    return _cached_lookup(
+        "client_statuses", "clients", db,
+        lambda session: _distinct_values(session, Client.status)
+    )
+
+
+def client_entity_types(db: Session) -> List[str]:
+    """Entity types in use on any client."""
+    return _cached_lookup(
+        "client_entity_types", "clients", db,
+        lambda session: _distinct_values(session, Client.entity_type)
+    )
+
+
+def prospect_owners(db: Session) -> List[str]:
+    """Owners assigned to at least one prospect."""
+    return _cached_lookup(
+        "prospect_owners", "clients", db,
+        lambda session: _distinct_values(session, Client.owner_name, Client.status == "Prospect")
+    )
@@ -4,11 +4,10 @@ Main FastAPI application for the CRM tool.
 This is a server-rendered application using Jinja2 templates.
 All routes return HTML pages, not JSON APIs.
 """
-from fastapi import FastAPI, Depends, Request, Form, HTTPException, Query, BackgroundTasks
-from fastapi.responses import HTMLResponse, RedirectResponse, Response, JSONResponse
+from fastapi import FastAPI, Depends, Request, Form, HTTPException, Query, BackgroundTasks, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, JSONResponse, StreamingResponse
 import asyncio
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from sqlalchemy.orm import Session
@@ -17,13 +16,28 @@ from typing import Optional
 from datetime import date, datetime, timedelta
 import csv
 import io
+from urllib.parse import quote
 import math
 import os
 import logging
 import time
 import asyncio
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError
-from performance import PerformanceMiddleware, get_cache, set_cache, clear_cache
+from performance import PerformanceMiddleware, get_cache, set_cache, clear_cache, purge_expired_cache
+from compression import CompressionMiddleware
+from templating import get_template_mode, create_templates, precompile_templates
+from assets import StaticAssets
+from change_tracking import conditional_get, set_etag
+from lookups import client_statuses, client_entity_types, prospect_owners
+from client_index import lookup_clients, LOOKUP_DEFAULT_LIMIT, LOOKUP_MAX_LIMIT
+from pool_metrics import pool_stats, leak_watchdog
+from warmup import run_warmup, warmup_status
+from readiness import ReadinessGateMiddleware, readiness_report, startup_state
+from scheduler import scheduler
+from reminders import SMTP_HOST, send_due_reminders
+from events import dashboard_broadcaster
+from api_v1 import router as api_v1_router, APIError, authorize
+from bulk_import import parse_rows, iter_csv_rows, import_timesheets, import_clients, ImportFormatError
 
 # Configure logging
 logging.basicConfig(
@@ -32,7 +46,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from database import get_db, engine, Base
+from database import get_db, get_read_db, engine, read_engine, ping_engine, Base, PrimaryPinMiddleware
 from sqlalchemy import text
 
 # REMOVED: force_db_sync() - migrations.py is the single source of truth
@@ -44,15 +58,20 @@ from schemas import (
     UserCreate, UserUpdate
 )
 from crud import (
-    get_client, get_clients, create_client, update_client, update_client_field, delete_client,
+    get_client, get_client_detail, client_exists,
+    get_client_notes_page, get_client_tasks_page, get_client_services_page, get_client_timesheets_page,
+    CLIENT_TAB_PAGE_SIZE, CLIENT_TAB_MAX_PAGE_SIZE,
+    get_clients, create_client, update_client, update_client_field, delete_client,
     calculate_client_revenue_async,
     create_contact, delete_contact,
     create_service, update_service, delete_service,
     create_task, update_task_status, delete_task,
     create_note, delete_note,
     get_timesheets, get_timesheet, create_timesheet, update_timesheet, delete_timesheet,
-    get_timesheet_summary,
-    get_users, get_user, get_user_by_email, create_user, update_user, delete_user
+    get_timesheet_summary, calculate_hours, round_up_to_quarter_hour,
+    get_users, get_user, get_user_by_email, create_user, update_user, delete_user,
+    MAX_BULK_IDS, bulk_update_clients, bulk_reassign_owner, bulk_delete_clients,
+    bulk_update_task_status, bulk_delete_tasks, bulk_set_services_active, bulk_delete_services
 )
 from auth import (
     get_current_user, verify_user, has_permission, require_permission,
@@ -60,7 +79,7 @@ from auth import (
 )
 
 # Import migration utilities
-from migrations import migrate_database_schema
+from migrations import migrate_database_schema, create_missing_indexes
 
 # Note: Base.metadata.create_all() moved to startup event to prevent crashes
 # if database is unavailable during import
@@ -261,14 +280,71 @@ async def startup_event():
     logger.info("=" * 70)
     logger.info("[STARTUP] Server binding to port... (database init will run in background)")
     
+    # Production: compile every template now so a broken template fails the boot
+    # instead of the first request that renders it
+    if TEMPLATE_MODE == "production":
+        precompile_templates(templates)
+    
+    # Start listening for client/service writes that invalidate dashboard revenue
+    dashboard_broadcaster.start()
+    
+    # Log connections held longer than DB_LEAK_SECONDS, with the stack that took them
+    asyncio.create_task(leak_watchdog())
+    
+    # Periodic jobs (dashboard revenue, cache sweep, reminders, backups) - see scheduler.py
+    register_scheduled_jobs()
+    scheduler.start(engine)
+    
     # Schedule database initialization as a background task
     # This allows the server to bind to the port immediately
+    # Non-health requests are held (then 503'd) until it finishes - see readiness.py
+    startup_state.begin()
     asyncio.create_task(initialize_database_background())
     
     logger.info("[STARTUP] Application ready - port should be open now")
     logger.info("=" * 70)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop scheduled jobs and release the scheduler leader lock."""
+    await scheduler.stop()
+
+
+DASHBOARD_REFRESH_SECONDS = float(os.getenv("DASHBOARD_REFRESH_SECONDS", "300"))
+REMINDER_INTERVAL_SECONDS = float(os.getenv("REMINDER_INTERVAL_SECONDS", "3600"))
+BACKUP_INTERVAL_SECONDS = float(os.getenv("BACKUP_INTERVAL_SECONDS", "0"))  # 0 = backups run externally
+
+
+def run_scheduled_backup():
+    """Back up PostgreSQL and prune old backups (backup_database_python.py)."""
+    import backup_database_python
+    if not backup_database_python.backup_database():
+        raise RuntimeError("Backup failed - see backup log output")
+    backup_database_python.cleanup_old_backups(days_to_keep=7)
+
+
+def register_scheduled_jobs():
+    """
+    Register periodic jobs with the scheduler.
+    
+    Per-process caches (dashboard revenue snapshot, the TTL cache) are
+    refreshed in every worker; reminders and backups are leader_only so
+    they run once per deployment.
+    """
+    if scheduler.jobs:
+        return
+    # Picks up revenue changes written by other workers, which this worker's change counters never see
+    scheduler.register("dashboard_revenue", dashboard_broadcaster.refresh, DASHBOARD_REFRESH_SECONDS, timeout_seconds=60)
+    scheduler.register("cache_sweep", purge_expired_cache, 600, timeout_seconds=30)
+    if SMTP_HOST:
+        scheduler.register("follow_up_reminders", send_due_reminders, REMINDER_INTERVAL_SECONDS,
+                           timeout_seconds=900, leader_only=True)
+    if BACKUP_INTERVAL_SECONDS > 0 and os.getenv("DATABASE_URL"):
+        scheduler.register("database_backup", run_scheduled_backup, BACKUP_INTERVAL_SECONDS,
+                           timeout_seconds=3600, leader_only=True)
+
+
 async def initialize_database_background():
     """
     Run database initialization in background after server starts.
@@ -290,49 +366,91 @@ async def initialize_database_background():
     
     try:
         # Step 1: Create database tables (if they don't exist)
+        step_started = time.perf_counter()
         try:
             logger.info("[BACKGROUND] Creating database tables...")
             await loop.run_in_executor(executor, Base.metadata.create_all, engine)
             logger.info("[BACKGROUND] Database tables created/verified successfully")
+            startup_state.mark("tables", True, step_started)
         except Exception as e:
+            startup_state.mark("tables", False, step_started, str(e))
             logger.error(f"[BACKGROUND ERROR] Failed to create database tables: {e}", exc_info=True)
             logger.warning("[BACKGROUND] Application will continue but database operations may fail")
         
         # Step 2: Run database migrations
+        step_started = time.perf_counter()
         try:
             logger.info("[BACKGROUND] Running database migrations...")
             migration_success = await loop.run_in_executor(executor, migrate_database_schema)
+            startup_state.mark("migrations", bool(migration_success), step_started,
+                               None if migration_success else "completed with errors")
             if migration_success:
                 logger.info("[BACKGROUND] Database migrations completed successfully")
             else:
                 logger.warning("[BACKGROUND] Database migrations completed with errors - some columns may be missing")
         except Exception as e:
+            startup_state.mark("migrations", False, step_started, str(e))
             logger.error(f"[BACKGROUND ERROR] Database migration failed: {e}", exc_info=True)
             logger.warning("[BACKGROUND] Continuing without migrations - application will work")
         
+        # Step 2b: Indexes added to the models after the tables were created
+        step_started = time.perf_counter()
+        try:
+            indexes_ok = await loop.run_in_executor(executor, create_missing_indexes)
+            startup_state.mark("indexes", indexes_ok, step_started, None if indexes_ok else "some indexes not created")
+            if indexes_ok:
+                logger.info("[BACKGROUND] Database indexes verified")
+            else:
+                logger.warning("[BACKGROUND] Some indexes could not be created - see logs above")
+        except Exception as e:
+            startup_state.mark("indexes", False, step_started, str(e))
+            logger.error(f"[BACKGROUND ERROR] Index creation failed: {e}", exc_info=True)
+        
         # REMOVED: All self-healing and backup migration logic
         # migrations.py is the single source of truth - no fallbacks
         
         # Step 3: Reset/Create admin users
+        step_started = time.perf_counter()
         try:
             logger.info("[BACKGROUND] Resetting admin users...")
             result = await loop.run_in_executor(executor, reset_admin_users)
-            if result and result.get("status") == "success":
+            admin_ok = bool(result and result.get("status") == "success")
+            startup_state.mark("admin_users", admin_ok, step_started,
+                               None if admin_ok else (result or {}).get("message", "reset failed"))
+            if admin_ok:
                 created = result.get("created", 0)
                 updated = result.get("updated", 0)
                 logger.info(f"[BACKGROUND] Admin users ready: {created} created, {updated} updated")
             else:
                 logger.warning("[BACKGROUND] Admin user reset had issues - check logs")
         except Exception as e:
+            startup_state.mark("admin_users", False, step_started, str(e))
             logger.error(f"[BACKGROUND ERROR] Failed to reset admin users: {e}", exc_info=True)
             logger.warning("[BACKGROUND] Continuing without admin users - login may not work")
         
+        # Step 4: Warm pools, templates, revenue snapshot and lookup caches (bounded by WARMUP_BUDGET_SECONDS)
+        step_started = time.perf_counter()
+        try:
+            engines = [engine] if read_engine is engine else [engine, read_engine]
+            warmed = await run_warmup(templates, engines)
+            startup_state.mark("warmup", warmed["status"] == "done", step_started,
+                               None if warmed["status"] == "done" else warmed["status"])
+        except Exception as e:
+            startup_state.mark("warmup", False, step_started, str(e))
+            logger.error(f"[BACKGROUND ERROR] Warm-up failed: {e}", exc_info=True)
+        
         logger.info("[BACKGROUND] Database initialization complete!")
         
     except Exception as e:
         logger.error(f"[BACKGROUND ERROR] Unexpected error during database initialization: {e}", exc_info=True)
     finally:
         executor.shutdown(wait=False)
+        # Ready or not, stop holding requests - /health/ready reports what failed
+        startup_state.finish()
+
+# Read-your-writes for the optional read replica (DATABASE_READ_URL):
+# added before SessionMiddleware so it runs inside it and can stamp the session
+app.add_middleware(PrimaryPinMiddleware)
 
 # Add session middleware for authentication
 # CRITICAL FIX: Configure session cookies to work behind proxy (Render, etc.)
@@ -353,32 +471,31 @@ app.add_middleware(
     # when TrustedHostMiddleware is configured (which we added above)
 )
 
-# Setup templates and static files
-# Configure Jinja2 to handle UTF-8 encoding gracefully
-templates = Jinja2Templates(
-    directory="templates",
-    # Ensure UTF-8 encoding is used for all template files
-    # This prevents UnicodeDecodeError when templates have encoding issues
-    autoescape=False  # We handle escaping in templates manually
+# PERFORMANCE: Compress HTML/CSV/JSON responses (brotli if available, else gzip)
+# Added after the other app middleware so it wraps them and sees the final
+# response body; only the readiness gate below sits outside it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
 )
-# Set encoding explicitly for template loading
-templates.env.auto_reload = True  # Useful for development
-
-# Add custom Jinja2 filters
-import json as json_lib
-def from_json(value):
-    """Jinja2 filter to parse JSON string."""
-    if not value:
-        return {}
-    try:
-        return json_lib.loads(value)
-    except:
-        return {}
 
-templates.env.filters["from_json"] = from_json
-templates.env.filters["tojson"] = json_lib.dumps
+# Hold/503 non-health requests until background DB initialization finishes (readiness.py).
+# Must stay the outermost middleware - added last, outside compression - so a
+# gated request never reaches the session or database layers and its small
+# 503 isn't run through the compressor
+app.add_middleware(ReadinessGateMiddleware)
+
+# Setup templates and static files
+# Development mode auto-reloads templates; production mode precompiles them
+# at startup into a bytecode cache (see templating.py)
+TEMPLATE_MODE = get_template_mode()
+templates = create_templates(TEMPLATE_MODE)
+
+# Hashed assets (built by `python assets.py`) are served precompressed with immutable caching
+app.mount("/static", StaticAssets(directory="static"), name="static")
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Versioned JSON read API (/api/v1/...)
+app.include_router(api_v1_router)
 
 
 # ============================================================================
@@ -597,10 +714,59 @@ async def root(request: Request):
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint - no auth required."""
+    """Health check endpoint - no auth required. Liveness only (see /health/ready)."""
+    return {"status": "ok", "service": "tierney-ohlms-crm"}
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the process is up and serving. Never touches the database."""
     return {"status": "ok", "service": "tierney-ohlms-crm"}
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: startup init and warm-up finished and the database answers a ping in time; 503 otherwise."""
+    report = await readiness_report(ping_engine, warmup_status())
+    if not report["ready"]:
+        return JSONResponse(report, status_code=503, headers={"Cache-Control": "no-store"})
+    return JSONResponse(report, headers={"Cache-Control": "no-store"})
+
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    """Connection pool budget, checkout wait histogram, long-held connections, scheduled job runs and warm-up."""
+    try:
+        authorize(request, "view_settings")
+    except APIError as e:
+        return e.to_response()
+    return JSONResponse({"db": pool_stats(), "scheduler": scheduler.stats(), "warmup": warmup_status()})
+
+
+@app.get("/api/clients/lookup")
+async def clients_lookup(
+    request: Request,
+    q: str = Query(""),
+    limit: int = Query(LOOKUP_DEFAULT_LIMIT, ge=1, le=LOOKUP_MAX_LIMIT)
+):
+    """Client picker typeahead: clients whose name, or a word in it, starts with q."""
+    try:
+        authorize(request, "view_clients", "create_timesheets", "view_own_timesheets", "view_all_timesheets")
+    except APIError as e:
+        return e.to_response()
+    return JSONResponse({"results": lookup_clients(q, limit)})
+
+
+# Tables each conditional-GET route renders from (see change_tracking.py).
+# "users" is included everywhere so a permission change or deactivation
+# invalidates cached pages.
+CLIENTS_LIST_TABLES = ("clients", "services", "timesheets", "users")
+PROSPECTS_LIST_TABLES = ("clients", "contacts", "services", "users")
+DASHBOARD_TABLES = ("clients", "services", "timesheets", "users")
+REVENUE_TABLES = ("clients", "services", "users")
+TIMESHEETS_LIST_TABLES = ("clients", "timesheets", "users")
+
+
 @app.get("/clients", response_class=HTMLResponse)
 async def clients_list(
     request: Request,
@@ -610,9 +776,13 @@ async def clients_list(
     follow_up: Optional[str] = Query(None),
     sort_by: str = Query("name"),
     sort_order: str = Query("asc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Display list of all clients with optional search, filtering, and sorting."""
+    etag, not_modified = conditional_get(request, CLIENTS_LIST_TABLES)
+    if not_modified:
+        return not_modified
+
     try:
         current_user = get_current_user(request)
         if not current_user:
@@ -698,9 +868,8 @@ async def clients_list(
     statuses = []
     entity_types = []
     try:
-        all_clients = db.query(Client).all()
-        statuses = sorted(set(c.status for c in all_clients if c.status))
-        entity_types = sorted(set(c.entity_type for c in all_clients if c.entity_type))
+        statuses = client_statuses(db)
+        entity_types = client_entity_types(db)
     except Exception as e:
         logger.warning(f"Error getting filter options: {e}")
         statuses = []
@@ -708,7 +877,7 @@ async def clients_list(
     
     # Render template with error handling
     try:
-        return templates.TemplateResponse(
+        return set_etag(templates.TemplateResponse(
             "clients_list.html",
             {
                 "request": request, 
@@ -724,7 +893,7 @@ async def clients_list(
                 "today": date.today(),
                 "user": current_user
             }
-        )
+        ), etag)
     except Exception as e:
         logger.error(f"Error rendering clients list template: {e}", exc_info=True)
         return templates.TemplateResponse(
@@ -750,9 +919,13 @@ async def prospects_list(
     follow_up: Optional[str] = Query(None),  # needed, overdue, all
     sort_by: str = Query("name"),
     sort_order: str = Query("asc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Display list of all prospects with pipeline filtering."""
+    etag, not_modified = conditional_get(request, PROSPECTS_LIST_TABLES)
+    if not_modified:
+        return not_modified
+
     try:
         current_user = get_current_user(request)
         if not current_user:
@@ -775,7 +948,8 @@ async def prospects_list(
             status_filter="Prospect",  # Always filter to prospects only
             follow_up_filter=follow_up,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            with_contacts=True  # first contact per row, without a query per prospect
         )
         logger.info(f"Loaded {len(prospects)} prospects")
     except SQLAlchemyError as e:
@@ -855,8 +1029,7 @@ async def prospects_list(
     # Get unique owners for filter with error handling
     owners = []
     try:
-        all_prospects = db.query(Client).filter(Client.status == "Prospect").all()
-        owners = sorted(set(p.owner_name for p in all_prospects if p.owner_name))
+        owners = prospect_owners(db)
     except Exception as e:
         logger.warning(f"Error getting owners list: {e}")
         owners = []
@@ -870,7 +1043,7 @@ async def prospects_list(
     # CRITICAL: Always return a response, even if there are errors
     try:
         logger.info(f"[PROSPECTS] Rendering template with {len(prospects_with_data)} prospects")
-        return templates.TemplateResponse(
+        return set_etag(templates.TemplateResponse(
             "prospects_list.html",
             {
                 "request": request,
@@ -888,7 +1061,7 @@ async def prospects_list(
                 "today": date.today(),
                 "user": current_user
             }
-        )
+        ), etag)
     except Exception as e:
         logger.error(f"[PROSPECTS] CRITICAL: Error rendering prospects list template: {e}", exc_info=True)
         # Return a simple HTML response instead of redirecting to login
@@ -915,7 +1088,7 @@ async def prospects_export(
     stage: Optional[str] = Query(None),
     owner: Optional[str] = Query(None),
     follow_up: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Export filtered prospects list to CSV."""
     current_user = get_current_user(request)
@@ -1197,11 +1370,49 @@ async def client_create(
     return RedirectResponse(url=f"/clients/{client.id}", status_code=303)
 
 
+@app.post("/clients/import")
+async def client_import(
+    request: Request,
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk upsert clients with contacts and services from a CSV upload.
+    
+    The file is streamed, not read into memory; see bulk_import.py for the
+    columns. Returns a JSON report with per-row errors.
+    """
+    current_user = get_current_user(request)
+    if not current_user:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    
+    if not has_permission(current_user, "create_clients") or not has_permission(current_user, "edit_clients"):
+        return JSONResponse({"error": "You don't have permission to import clients"}, status_code=403)
+    
+    def run_import():
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        try:
+            return import_clients(db, iter_csv_rows(stream), dry_run=dry_run)
+        finally:
+            stream.detach()
+    
+    try:
+        report = await asyncio.to_thread(run_import)
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return JSONResponse({"error": f"Could not read import file: {e}"}, status_code=400)
+    except Exception as e:
+        logger.error(f"[IMPORT] Client import failed: {e}", exc_info=True)
+        return JSONResponse({"error": "Import failed"}, status_code=500)
+    
+    return JSONResponse(report, status_code=200)
+
+
 @app.get("/clients/{client_id}", response_class=HTMLResponse)
 async def client_detail(
     request: Request,
     client_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Display client detail page with all related data."""
     current_user = get_current_user(request)
@@ -1212,121 +1423,166 @@ async def client_detail(
     if permission_check:
         return permission_check
     
-    client = get_client(db, client_id)
+    client = get_client_detail(db, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    # Get timesheet summaries
-    from crud import get_timesheet_summary
-    from datetime import timedelta
-    
-    today = date.today()
-    month_start = date(today.year, today.month, 1)
-    year_start = date(today.year, 1, 1)
-    
-    # All-time summary
-    summary_all = get_timesheet_summary(db, client_id=client_id)
-    
-    # This month summary
-    summary_month = get_timesheet_summary(
-        db,
-        client_id=client_id,
-        date_from=month_start,
-        date_to=today
-    )
-    
-    # This year summary
-    summary_year = get_timesheet_summary(
-        db,
-        client_id=client_id,
-        date_from=year_start,
-        date_to=today
-    )
-    
-    # Get recent timesheet entries (last 10)
-    recent_timesheets = get_timesheets(
-        db,
-        client_id=client_id,
-        limit=10
-    )
-    
-    # Get all timesheets for monthly breakdown
-    all_timesheets = get_timesheets(db, client_id=client_id, limit=1000)
-    
-    # Calculate monthly breakdown (last 12 months)
-    monthly_breakdown = {}
-    for i in range(12):
-        month_date = date(today.year, today.month, 1) - timedelta(days=30*i)
-        month_start_date = date(month_date.year, month_date.month, 1)
-        if month_date.month == 12:
-            month_end_date = date(month_date.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end_date = date(month_date.year, month_date.month + 1, 1) - timedelta(days=1)
-        
-        month_summary = get_timesheet_summary(
-            db,
-            client_id=client_id,
-            date_from=month_start_date,
-            date_to=min(month_end_date, today)
-        )
-        month_key = month_start_date.strftime("%Y-%m")
-        monthly_breakdown[month_key] = {
-            "month": month_start_date.strftime("%B %Y"),
-            "total_hours": month_summary["total_hours"],
-            "billable_hours": month_summary["billable_hours"],
-            "non_billable_hours": month_summary["non_billable_hours"],
-            "entries": month_summary["total_entries"]
-        }
-    
-    # Get related data (explicitly load relationships)
-    contacts = []
-    services = []
-    tasks = []
-    notes = []
-    try:
-        contacts = list(client.contacts) if client.contacts else []
-    except Exception as e:
-        logger.warning(f"Error loading contacts for client {client_id}: {e}")
-        contacts = []
-    
-    try:
-        services = list(client.services) if client.services else []
-    except Exception as e:
-        logger.warning(f"Error loading services for client {client_id}: {e}")
-        services = []
-    
-    try:
-        tasks = list(client.tasks) if client.tasks else []
-    except Exception as e:
-        logger.warning(f"Error loading tasks for client {client_id}: {e}")
-        tasks = []
-    
-    try:
-        notes = list(client.notes) if client.notes else []
-    except Exception as e:
-        logger.warning(f"Error loading notes for client {client_id}: {e}")
-        notes = []
-    
+    # Services, tasks, notes and timesheets are tabs fetched after first paint
+    # (see the fragment routes below), so this page costs the same for a new
+    # client and one with years of history.
     return templates.TemplateResponse(
         "client_detail.html",
         {
             "request": request,
             "client": client,
-            "contacts": contacts,
-            "services": services,
-            "tasks": tasks,
-            "notes": notes,
+            "contacts": list(client.contacts),
             "user": current_user,
-            "timesheet_summary_all": summary_all,
-            "timesheet_summary_month": summary_month,
-            "timesheet_summary_year": summary_year,
-            "recent_timesheets": recent_timesheets,
-            "monthly_breakdown": monthly_breakdown,
-            "today": today
+            "today": date.today()
         }
     )
 
 
+# Client detail tab fragments: HTML partials, one keyset page per request.
+# ?cursor= comes from the previous page's "Load more" link.
+CLIENT_NOTES_TABLES = ("notes", "users")
+CLIENT_TASKS_TABLES = ("tasks", "users")
+CLIENT_SERVICES_TABLES = ("services", "users")
+CLIENT_TIMESHEETS_TABLES = ("timesheets", "users")
+
+
+def _client_tab_response(request: Request, db: Session, client_id: int, template_name: str,
+                         page_func, cursor: Optional[str], limit: int, etag: Optional[str],
+                         page_args: Optional[dict] = None, **context):
+    """Render one page of a client detail tab, or a 400/404 fragment."""
+    if not client_exists(db, client_id):
+        return HTMLResponse('<p class="empty-state">Client not found.</p>', status_code=404)
+    try:
+        rows, next_cursor = page_func(db, client_id, cursor=cursor, limit=limit, **(page_args or {}))
+    except ValueError:
+        return HTMLResponse('<p class="empty-state">Invalid page cursor.</p>', status_code=400)
+    
+    next_url = None
+    if next_cursor:
+        next_url = f"{request.url.path}?cursor={quote(next_cursor)}&limit={limit}"
+    return set_etag(templates.TemplateResponse(
+        template_name,
+        {
+            "request": request,
+            "client_id": client_id,
+            "rows": rows,
+            "next_url": next_url,
+            "first_page": not cursor,
+            **context
+        }
+    ), etag)
+
+
+@app.get("/clients/{client_id}/notes", response_class=HTMLResponse)
+async def client_notes_tab(
+    request: Request,
+    client_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(CLIENT_TAB_PAGE_SIZE, ge=1, le=CLIENT_TAB_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Notes tab: newest first, one page per request."""
+    current_user = get_current_user(request)
+    if not current_user:
+        return HTMLResponse('<p class="empty-state">Session expired - please log in again.</p>', status_code=401)
+    if not has_permission(current_user, "view_notes"):
+        return HTMLResponse('<p class="empty-state">You do not have permission to view notes.</p>', status_code=403)
+    
+    etag, not_modified = conditional_get(request, CLIENT_NOTES_TABLES)
+    if not_modified:
+        return not_modified
+    return _client_tab_response(request, db, client_id, "partials/client_notes.html",
+                                get_client_notes_page, cursor, limit, etag)
+
+
+@app.get("/clients/{client_id}/tasks", response_class=HTMLResponse)
+async def client_tasks_tab(
+    request: Request,
+    client_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(CLIENT_TAB_PAGE_SIZE, ge=1, le=CLIENT_TAB_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Tasks tab: newest first, one page per request."""
+    current_user = get_current_user(request)
+    if not current_user:
+        return HTMLResponse('<p class="empty-state">Session expired - please log in again.</p>', status_code=401)
+    if not has_permission(current_user, "view_tasks"):
+        return HTMLResponse('<p class="empty-state">You do not have permission to view tasks.</p>', status_code=403)
+    
+    etag, not_modified = conditional_get(request, CLIENT_TASKS_TABLES)
+    if not_modified:
+        return not_modified
+    return _client_tab_response(request, db, client_id, "partials/client_tasks.html",
+                                get_client_tasks_page, cursor, limit, etag, today=date.today())
+
+
+@app.get("/clients/{client_id}/services", response_class=HTMLResponse)
+async def client_services_tab(
+    request: Request,
+    client_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(CLIENT_TAB_PAGE_SIZE, ge=1, le=CLIENT_TAB_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """Services tab: in the order they were added, one page per request."""
+    current_user = get_current_user(request)
+    if not current_user:
+        return HTMLResponse('<p class="empty-state">Session expired - please log in again.</p>', status_code=401)
+    if not has_permission(current_user, "view_services"):
+        return HTMLResponse('<p class="empty-state">You do not have permission to view services.</p>', status_code=403)
+    
+    etag, not_modified = conditional_get(request, CLIENT_SERVICES_TABLES)
+    if not_modified:
+        return not_modified
+    return _client_tab_response(request, db, client_id, "partials/client_services.html",
+                                get_client_services_page, cursor, limit, etag)
+
+
+@app.get("/clients/{client_id}/timesheets", response_class=HTMLResponse)
+async def client_timesheets_tab(
+    request: Request,
+    client_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(CLIENT_TAB_PAGE_SIZE, ge=1, le=CLIENT_TAB_MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Timesheets tab: most recent first. The first page also carries the
+    all-time / this month / this year summaries (aggregate queries).
+    """
+    current_user = get_current_user(request)
+    if not current_user:
+        return HTMLResponse('<p class="empty-state">Session expired - please log in again.</p>', status_code=401)
+    if not has_permission(current_user, "view_own_timesheets") and not has_permission(current_user, "view_all_timesheets"):
+        return HTMLResponse('<p class="empty-state">You do not have permission to view timesheets.</p>', status_code=403)
+    
+    etag, not_modified = conditional_get(request, CLIENT_TIMESHEETS_TABLES)
+    if not_modified:
+        return not_modified
+    
+    # Users who can only see their own time get only their own entries and totals
+    staff_member = None if has_permission(current_user, "view_all_timesheets") else current_user.name
+    
+    summaries = {}
+    if not cursor:
+        today = date.today()
+        summaries = {
+            "All Time": get_timesheet_summary(db, client_id=client_id, staff_member=staff_member),
+            "This Month": get_timesheet_summary(db, client_id=client_id, staff_member=staff_member,
+                                                date_from=date(today.year, today.month, 1), date_to=today),
+            "This Year": get_timesheet_summary(db, client_id=client_id, staff_member=staff_member,
+                                               date_from=date(today.year, 1, 1), date_to=today),
+        }
+    return _client_tab_response(request, db, client_id, "partials/client_timesheets.html",
+                                get_client_timesheets_page, cursor, limit, etag,
+                                summaries=summaries, page_args={"staff_member": staff_member})
+
+
 @app.get("/clients/{client_id}/edit", response_class=HTMLResponse)
 async def client_edit_form(
     request: Request,
@@ -1783,6 +2039,185 @@ async def task_delete(
     return RedirectResponse(url=f"/clients/{client_id}", status_code=303)
 
 
+# ============================================================================
+# Bulk Action Routes
+# ============================================================================
+# JSON in, JSON out: {"ids": [...], ...} -> {"updated"/"deleted": n}.
+# Each request is one set-based statement (or one transaction for client
+# deletes) instead of a SELECT/UPDATE/COMMIT/REFRESH per row.
+
+BULK_CLIENT_FIELDS = {
+    "entity_type", "fiscal_year_end", "status",
+    "owner_name", "owner_email", "next_follow_up_date"
+}
+
+
+async def _read_bulk_request(request: Request, require_ids: bool = True) -> dict:
+    """Parse and validate a bulk action body; raises APIError on bad input."""
+    try:
+        payload = await request.json()
+    except Exception:
+        raise APIError(400, "Request body must be JSON")
+    if not isinstance(payload, dict):
+        raise APIError(400, "Request body must be a JSON object")
+    
+    ids = payload.get("ids") or []
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise APIError(400, "ids must be a list of integers")
+    if require_ids and not ids:
+        raise APIError(400, "ids is required")
+    if len(ids) > MAX_BULK_IDS:
+        raise APIError(400, f"At most {MAX_BULK_IDS} ids per request")
+    payload["ids"] = sorted(set(ids))
+    return payload
+
+
+def _bulk_result(key: str, count: int, requested: int) -> JSONResponse:
+    # Dashboard stats are cached per user - drop them along with the ETag/SSE
+    # invalidation done by the change counters
+    clear_cache("dashboard")
+    return JSONResponse({key: count, "requested": requested})
+
+
+@app.post("/bulk/clients/update")
+async def bulk_clients_update(request: Request, db: Session = Depends(get_db)):
+    """Set the same fields on many clients: {"ids": [...], "fields": {"status": "Active"}}."""
+    try:
+        authorize(request, "edit_clients")
+        payload = await _read_bulk_request(request)
+        fields = payload.get("fields")
+        if not isinstance(fields, dict) or not fields:
+            raise APIError(400, "fields is required")
+        not_allowed = set(fields) - BULK_CLIENT_FIELDS
+        if not_allowed:
+            raise APIError(400, f"Field(s) not allowed: {', '.join(sorted(not_allowed))}")
+        
+        values = {k: (v if v != "" else None) for k, v in fields.items()}
+        if values.get("status") is None and "status" in values:
+            raise APIError(400, "status cannot be empty")
+        if values.get("next_follow_up_date"):
+            try:
+                values["next_follow_up_date"] = date.fromisoformat(values["next_follow_up_date"])
+            except (TypeError, ValueError):
+                raise APIError(400, "next_follow_up_date must be YYYY-MM-DD")
+        
+        count = bulk_update_clients(db, payload["ids"], values)
+        return _bulk_result("updated", count, len(payload["ids"]))
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Bulk update failed"}, status_code=500)
+
+
+@app.post("/bulk/clients/reassign-owner")
+async def bulk_clients_reassign_owner(request: Request, db: Session = Depends(get_db)):
+    """
+    Reassign clients to a new owner.
+    
+    Body: {"owner_name": "...", "owner_email": "...", and either "ids": [...]
+    or "from_owner_name": "..." (optionally with "status": "Prospect")}.
+    """
+    try:
+        authorize(request, "edit_clients")
+        payload = await _read_bulk_request(request, require_ids=False)
+        owner_name = (payload.get("owner_name") or "").strip()
+        if not owner_name:
+            raise APIError(400, "owner_name is required")
+        from_owner_name = (payload.get("from_owner_name") or "").strip()
+        if not payload["ids"] and not from_owner_name:
+            raise APIError(400, "ids or from_owner_name is required")
+        
+        count = bulk_reassign_owner(
+            db,
+            owner_name=owner_name,
+            owner_email=(payload.get("owner_email") or "").strip() or None,
+            client_ids=payload["ids"],
+            from_owner_name=from_owner_name or None,
+            status_filter=payload.get("status") or None
+        )
+        return _bulk_result("updated", count, len(payload["ids"]) or count)
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Owner reassignment failed"}, status_code=500)
+
+
+@app.post("/bulk/clients/delete")
+async def bulk_clients_delete(request: Request, db: Session = Depends(get_db)):
+    """Delete many clients with their contacts, services, tasks, notes and timesheets."""
+    try:
+        authorize(request, "delete_clients")
+        payload = await _read_bulk_request(request)
+        count = bulk_delete_clients(db, payload["ids"])
+        return _bulk_result("deleted", count, len(payload["ids"]))
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Bulk delete failed"}, status_code=500)
+
+
+@app.post("/bulk/tasks/update-status")
+async def bulk_tasks_update_status(request: Request, db: Session = Depends(get_db)):
+    """Set the status of many tasks: {"ids": [...], "status": "Completed"}."""
+    try:
+        authorize(request, "edit_tasks")
+        payload = await _read_bulk_request(request)
+        status = (payload.get("status") or "").strip()
+        if not status:
+            raise APIError(400, "status is required")
+        count = bulk_update_task_status(db, payload["ids"], status)
+        return _bulk_result("updated", count, len(payload["ids"]))
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Bulk update failed"}, status_code=500)
+
+
+@app.post("/bulk/tasks/delete")
+async def bulk_tasks_delete(request: Request, db: Session = Depends(get_db)):
+    """Delete many tasks."""
+    try:
+        authorize(request, "delete_tasks")
+        payload = await _read_bulk_request(request)
+        count = bulk_delete_tasks(db, payload["ids"])
+        return _bulk_result("deleted", count, len(payload["ids"]))
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Bulk delete failed"}, status_code=500)
+
+
+@app.post("/bulk/services/set-active")
+async def bulk_services_set_active(request: Request, db: Session = Depends(get_db)):
+    """Activate or deactivate many services: {"ids": [...], "active": false}."""
+    try:
+        authorize(request, "edit_services")
+        payload = await _read_bulk_request(request)
+        active = payload.get("active")
+        if not isinstance(active, bool):
+            raise APIError(400, "active must be true or false")
+        count = bulk_set_services_active(db, payload["ids"], active)
+        return _bulk_result("updated", count, len(payload["ids"]))
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Bulk update failed"}, status_code=500)
+
+
+@app.post("/bulk/services/delete")
+async def bulk_services_delete(request: Request, db: Session = Depends(get_db)):
+    """Delete many services."""
+    try:
+        authorize(request, "delete_services")
+        payload = await _read_bulk_request(request)
+        count = bulk_delete_services(db, payload["ids"])
+        return _bulk_result("deleted", count, len(payload["ids"]))
+    except APIError as e:
+        return e.to_response()
+    except SQLAlchemyError:
+        return JSONResponse({"error": "Bulk delete failed"}, status_code=500)
+
+
 # ============================================================================
 # Note Routes
 # ============================================================================
@@ -1843,7 +2278,7 @@ async def note_delete(
 async def dashboard(
     request: Request,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     PERFORMANCE FIX: Fast dashboard that returns immediately.
@@ -1853,6 +2288,10 @@ async def dashboard(
     
     route_start = time.perf_counter()
     logger.info("[DASHBOARD] Fast dashboard route called...")
+
+    etag, not_modified = conditional_get(request, DASHBOARD_TABLES)
+    if not_modified:
+        return not_modified
     
     # Fast authentication check
     current_user = get_current_user(request)
@@ -1913,11 +2352,11 @@ async def dashboard(
     total_won_revenue = 0.0
     total_lost_value = 0.0
     
-    # Schedule background task to pre-calculate revenue (non-blocking)
+    # Pre-compute the shared revenue snapshot if a write invalidated it (non-blocking)
     try:
-        background_tasks.add_task(calculate_and_cache_revenue, active_clients)
+        dashboard_broadcaster.ensure_fresh()
     except Exception as e:
-        logger.debug(f"[DASHBOARD] Could not schedule background revenue calculation: {e}")
+        logger.debug(f"[DASHBOARD] Could not schedule revenue snapshot refresh: {e}")
     
     # Calculate total hours (all timesheets)
     logger.info("[DASHBOARD] Getting timesheet summary...")
@@ -2086,7 +2525,7 @@ async def dashboard(
         # Non-critical - continue without caching
     
     # Render and return immediately - revenue loads via API
-    response = templates.TemplateResponse("dashboard.html", template_data)
+    response = set_etag(templates.TemplateResponse("dashboard.html", template_data), etag)
     route_duration = (time.perf_counter() - route_start) * 1000
     logger.info(f"[PERF] Dashboard returned in {route_duration:.2f}ms (fast path - revenue loads asynchronously)")
     return response
@@ -2096,178 +2535,29 @@ async def dashboard(
 # Dashboard API Endpoints (Async Revenue Loading)
 # ============================================================================
 
-async def calculate_and_cache_revenue(active_clients: list):
-    """
-    Background task to calculate and cache revenue for all active clients.
-    This runs asynchronously and doesn't block the dashboard request.
-    """
-    from database import SessionLocal
-    logger.info(f"[REVENUE CACHE] Starting background revenue calculation for {len(active_clients)} clients...")
-    
-    total_revenue = 0.0
-    db = None
-    
-    try:
-        db = SessionLocal()
-        
-        for client in active_clients:
-            try:
-                revenue = await calculate_client_revenue_async(client.id)
-                total_revenue += revenue
-            except Exception as e:
-                logger.error(f"[REVENUE CACHE] Error calculating revenue for client {client.id}: {e}")
-                continue
-        
-        # Cache the result
-        set_cache("dashboard_total_revenue", total_revenue, timedelta(minutes=10))
-        logger.info(f"[REVENUE CACHE] Cached total revenue: ${total_revenue:,.2f}")
-        
-    except Exception as e:
-        logger.error(f"[REVENUE CACHE] Error in background revenue calculation: {e}", exc_info=True)
-    finally:
-        if db:
-            db.close()
-
-
 @app.get("/api/dashboard/revenue")
-async def get_dashboard_revenue(
-    request: Request,
-    db: Session = Depends(get_db)
-):
+async def get_dashboard_revenue(request: Request):
     """
     API endpoint to fetch dashboard revenue data asynchronously.
-    Returns cached revenue if available, otherwise calculates and caches it.
+    Returns the broadcaster's shared snapshot, recomputing it only after a
+    client/service write. Live updates are available via /api/dashboard/stream.
     """
     from auth import get_current_user
     
+    # The snapshot is computed on the primary, so it can be tagged even with a replica
+    etag, not_modified = conditional_get(request, REVENUE_TABLES, read_db=False)
+    if not_modified:
+        return not_modified
+    
     # Check authentication
     current_user = get_current_user(request)
     if not current_user:
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
     
-    logger.info("[API] Revenue endpoint called - checking cache...")
-    
-    # Try cache first
-    revenue_cache_key = "dashboard_total_revenue"
-    cached_revenue = get_cache(revenue_cache_key)
-    
-    if cached_revenue is not None:
-        logger.info(f"[API] Returning cached revenue: ${cached_revenue:,.2f}")
-        return JSONResponse({
-            "total_revenue": cached_revenue,
-            "total_revenue_formatted": f"{cached_revenue:,.0f}",
-            "cached": True
-        })
-    
-    # No cache - calculate now
-    logger.info("[API] No cache - calculating revenue...")
-    
     try:
-        # Get active clients
-        all_clients = db.query(Client).all()
-        active_clients = [c for c in all_clients if c.status == "Active"]
-        prospects = [c for c in all_clients if c.status == "Prospect"]
-        won_clients = [c for c in all_clients if c.status == "Active" and 
-                      (c.created_at and hasattr(c.created_at, 'year') and c.created_at.year == 2025)]
-        lost_clients = [c for c in all_clients if c.status == "Dead"]
-        
-        # Calculate revenues in parallel
-        client_ids = set()
-        for c in active_clients:
-            client_ids.add(c.id)
-        for p in prospects:
-            client_ids.add(p.id)
-        for w in won_clients:
-            client_ids.add(w.id)
-        for l in lost_clients:
-            client_ids.add(l.id)
-        
-        # Calculate all revenues concurrently
-        revenue_tasks = [calculate_client_revenue_async(cid) for cid in client_ids]
-        revenues = await asyncio.gather(*revenue_tasks, return_exceptions=True)
-        revenue_map = dict(zip(client_ids, revenues))
-        revenue_map = {k: (v if not isinstance(v, Exception) else 0.0) for k, v in revenue_map.items()}
-        
-        # Calculate totals
-        total_revenue = sum(revenue_map.get(c.id, 0.0) for c in active_clients)
-        total_prospect_revenue = sum(revenue_map.get(p.id, 0.0) for p in prospects)
-        total_won_revenue = sum(revenue_map.get(w.id, 0.0) for w in won_clients)
-        total_lost_value = sum(revenue_map.get(l.id, 0.0) for l in lost_clients)
-        
-        # Build response data
-        prospects_data = []
-        for prospect in prospects:
-            expected_close_date = None
-            try:
-                if prospect.next_follow_up_date:
-                    expected_close_date = prospect.next_follow_up_date.strftime('%Y-%m-%d') if hasattr(prospect.next_follow_up_date, 'strftime') else str(prospect.next_follow_up_date)
-                elif prospect.created_at:
-                    if hasattr(prospect.created_at, 'date'):
-                        expected_close_date = prospect.created_at.date().strftime('%Y-%m-%d')
-                    else:
-                        expected_close_date = str(prospect.created_at)
-            except Exception:
-                pass
-            
-            prospects_data.append({
-                "client_id": prospect.id,
-                "estimated_revenue": revenue_map.get(prospect.id, 0.0),
-                "expected_close_date": expected_close_date
-            })
-        
-        won_data = []
-        for client in won_clients:
-            close_date = None
-            try:
-                if client.created_at:
-                    if hasattr(client.created_at, 'date'):
-                        close_date = client.created_at.date().strftime('%Y-%m-%d')
-                    else:
-                        close_date = str(client.created_at)
-            except Exception:
-                pass
-            
-            won_data.append({
-                "client_id": client.id,
-                "actual_revenue": revenue_map.get(client.id, 0.0),
-                "close_date": close_date
-            })
-        
-        lost_data = []
-        for client in lost_clients:
-            lost_date = None
-            try:
-                if client.created_at:
-                    if hasattr(client.created_at, 'date'):
-                        lost_date = client.created_at.date().strftime('%Y-%m-%d')
-                    else:
-                        lost_date = str(client.created_at)
-            except Exception:
-                pass
-            
-            lost_data.append({
-                "client_id": client.id,
-                "estimated_value": revenue_map.get(client.id, 0.0),
-                "lost_date": lost_date
-            })
-        
-        # Cache the results
-        set_cache(revenue_cache_key, total_revenue, timedelta(minutes=10))
-        
-        logger.info(f"[API] Revenue calculated: total=${total_revenue:,.2f}")
-        
-        return JSONResponse({
-            "total_revenue": total_revenue,
-            "total_revenue_formatted": f"{total_revenue:,.0f}",
-            "total_prospect_revenue": total_prospect_revenue,
-            "total_won_revenue": total_won_revenue,
-            "total_lost_value": total_lost_value,
-            "prospects": prospects_data,
-            "won_deals": won_data,
-            "lost_deals": lost_data,
-            "cached": False
-        })
-        
+        # Shared snapshot: computed once per client/service change, not per request
+        snapshot = await dashboard_broadcaster.get_snapshot()
+        return set_etag(JSONResponse(snapshot), etag)
     except Exception as e:
         logger.error(f"[API] Error calculating revenue: {e}", exc_info=True)
         return JSONResponse({
@@ -2277,6 +2567,31 @@ async def get_dashboard_revenue(
         }, status_code=500)
 
 
+@app.get("/api/dashboard/stream")
+async def dashboard_stream(request: Request):
+    """
+    Server-Sent Events stream of dashboard revenue.
+    
+    Sends the current snapshot on connect and a new one after every
+    client/service change. All subscribers share one computation.
+    """
+    from auth import get_current_user
+    
+    current_user = get_current_user(request)
+    if not current_user:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    
+    return StreamingResponse(
+        dashboard_broadcaster.stream(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events arrive immediately
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 # ============================================================================
 # Timesheet Routes
 # ============================================================================
@@ -2289,9 +2604,13 @@ async def timesheets_list(
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Display list of timesheet entries."""
+    etag, not_modified = conditional_get(request, TIMESHEETS_LIST_TABLES)
+    if not_modified:
+        return not_modified
+
     current_user = get_current_user(request)
     if not current_user:
         return RedirectResponse(url="/login", status_code=303)
@@ -2350,13 +2669,13 @@ async def timesheets_list(
         logger.error(f"Unexpected error loading timesheets: {e}", exc_info=True)
         timesheets = []
     
-    # Get all clients for filter dropdown
-    all_clients = []
-    try:
-        all_clients = db.query(Client).order_by(Client.legal_name).all()
-    except Exception as e:
-        logger.warning(f"Error loading clients for filter: {e}")
-        all_clients = []
+    # Client filter is a typeahead (/api/clients/lookup); only the selected client is loaded
+    selected_client = None
+    if client_id:
+        try:
+            selected_client = get_client(db, client_id)
+        except Exception as e:
+            logger.warning(f"Error loading selected client for filter: {e}")
     
     # Get summary statistics with error handling
     today = date.today()
@@ -2402,14 +2721,13 @@ async def timesheets_list(
     
     # Render template with error handling
     try:
-        return templates.TemplateResponse(
+        return set_etag(templates.TemplateResponse(
             "timesheets_list.html",
             {
                 "request": request,
                 "user": current_user,
                 "timesheets": timesheets,
-                "clients": all_clients,
-                "selected_client_id": client_id,
+                "selected_client": selected_client,
                 "selected_staff_member": staff_member,
                 "date_from": date_from,
                 "date_to": date_to,
@@ -2419,7 +2737,7 @@ async def timesheets_list(
                 "summary_all": summary_all,
                 "today": today
             }
-        )
+        ), etag)
     except Exception as e:
         logger.error(f"Error rendering timesheets list template: {e}", exc_info=True)
         return templates.TemplateResponse(
@@ -2448,16 +2766,13 @@ async def timesheet_new_form(
     if permission_check:
         return permission_check
     
-    clients = db.query(Client).order_by(Client.legal_name).all()
-    
     return templates.TemplateResponse(
         "timesheet_form.html",
         {
             "request": request,
             "user": current_user,
             "timesheet": None,
-            "clients": clients,
-            "preselected_client_id": client_id,
+            "selected_client": get_client(db, client_id) if client_id else None,
             "today": date.today()
         }
     )
@@ -2497,17 +2812,7 @@ async def timesheet_create(
     hours_value = 0.0
     if start_time and end_time:
         try:
-            start = datetime.strptime(start_time, "%H:%M").time()
-            end = datetime.strptime(end_time, "%H:%M").time()
-            start_dt = datetime.combine(entry_date_parsed, start)
-            end_dt = datetime.combine(entry_date_parsed, end)
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)  # Handle overnight
-            raw_hours = (end_dt - start_dt).total_seconds() / 3600.0
-            # Round up to nearest 15-minute increment (0.25 hours)
-            minutes = raw_hours * 60
-            rounded_minutes = math.ceil(minutes / 15) * 15
-            hours_value = rounded_minutes / 60
+            hours_value = round_up_to_quarter_hour(calculate_hours(entry_date_parsed, start_time, end_time))
         except ValueError:
             pass
     elif hours:
@@ -2522,9 +2827,7 @@ async def timesheet_create(
         return RedirectResponse(url="/timesheets/new?error=hours_must_be_positive", status_code=303)
     
     # Round up to nearest 15-minute increment (0.25 hours)
-    minutes = hours_value * 60
-    rounded_minutes = math.ceil(minutes / 15) * 15
-    hours_value = rounded_minutes / 60
+    hours_value = round_up_to_quarter_hour(hours_value)
     
     # Verify client exists
     client = get_client(db, client_id)
@@ -2553,6 +2856,52 @@ async def timesheet_create(
         return RedirectResponse(url="/timesheets/new?error=creation_failed", status_code=303)
 
 
+@app.post("/timesheets/import")
+async def timesheet_import(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import timesheet entries from CSV or JSON (see bulk_import.py).
+    
+    Accepts a multipart upload in the "file" field, or the raw CSV/JSON as
+    the request body. Returns a JSON report with per-row errors.
+    """
+    current_user = get_current_user(request)
+    if not current_user:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    
+    if not has_permission(current_user, "create_timesheets"):
+        return JSONResponse({"error": "You don't have permission to create timesheets"}, status_code=403)
+    
+    if file is not None:
+        content = await file.read()
+        filename, content_type = file.filename or "", file.content_type or ""
+    else:
+        content = await request.body()
+        filename, content_type = "", request.headers.get("content-type", "")
+    
+    if not content:
+        return JSONResponse({"error": "No file uploaded"}, status_code=400)
+    
+    try:
+        rows = parse_rows(content, filename=filename, content_type=content_type)
+        report = await asyncio.to_thread(
+            import_timesheets, db, rows,
+            default_staff_member=current_user.name,
+            dry_run=dry_run
+        )
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return JSONResponse({"error": f"Could not read import file: {e}"}, status_code=400)
+    except Exception as e:
+        logger.error(f"[IMPORT] Timesheet import failed: {e}", exc_info=True)
+        return JSONResponse({"error": "Import failed"}, status_code=500)
+    
+    return JSONResponse(report, status_code=200)
+
+
 @app.get("/timesheets/{timesheet_id}/edit", response_class=HTMLResponse)
 async def timesheet_edit_form(
     request: Request,
@@ -2572,15 +2921,13 @@ async def timesheet_edit_form(
     if not can_edit_timesheet(current_user, timesheet.staff_member):
         raise HTTPException(status_code=403, detail="You don't have permission to edit this timesheet entry")
     
-    clients = db.query(Client).order_by(Client.legal_name).all()
-    
     return templates.TemplateResponse(
         "timesheet_form.html",
         {
             "request": request,
             "user": current_user,
             "timesheet": timesheet,
-            "clients": clients,
+            "selected_client": get_client(db, timesheet.client_id),
             "today": date.today()
         }
     )
@@ -2624,17 +2971,7 @@ async def timesheet_update(
     hours_value = 0.0
     if start_time and end_time:
         try:
-            start = datetime.strptime(start_time, "%H:%M").time()
-            end = datetime.strptime(end_time, "%H:%M").time()
-            start_dt = datetime.combine(entry_date_parsed, start)
-            end_dt = datetime.combine(entry_date_parsed, end)
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)
-            raw_hours = (end_dt - start_dt).total_seconds() / 3600.0
-            # Round up to nearest 15-minute increment (0.25 hours)
-            minutes = raw_hours * 60
-            rounded_minutes = math.ceil(minutes / 15) * 15
-            hours_value = rounded_minutes / 60
+            hours_value = round_up_to_quarter_hour(calculate_hours(entry_date_parsed, start_time, end_time))
         except ValueError:
             pass
     elif hours:
@@ -2649,9 +2986,7 @@ async def timesheet_update(
         return RedirectResponse(url=f"/timesheets/{timesheet_id}/edit?error=hours_must_be_positive", status_code=303)
     
     # Round up to nearest 15-minute increment (0.25 hours)
-    minutes = hours_value * 60
-    rounded_minutes = math.ceil(minutes / 15) * 15
-    hours_value = rounded_minutes / 60
+    hours_value = round_up_to_quarter_hour(hours_value)
     
     # Verify client exists
     client = get_client(db, client_id)
@@ -3043,7 +3378,7 @@ async def clients_export(
     status: Optional[str] = Query(None),
     entity_type: Optional[str] = Query(None),
     follow_up: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Export filtered client list to CSV."""
     current_user = get_current_user(request)
@@ -9,6 +9,7 @@ Rebuilt with:
 """
 import os
 from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
 from database import engine
 
 
@@ -110,6 +111,81 @@ def migrate_database_schema():
         return False
 
 
+def create_missing_indexes() -> bool:
+    """
+    Create indexes declared on the models that existing tables don't have yet
+    (create_all only adds indexes when it creates the table).
+    
+    On PostgreSQL each index is built with CREATE INDEX CONCURRENTLY on an
+    autocommit connection, so adding an index to a large table doesn't block
+    writes to it for the length of the build.
+    """
+    from database import Base
+    import models  # noqa: F401 - registers the tables on Base
+    
+    if engine.dialect.name == "postgresql":
+        return _create_missing_indexes_concurrently(Base.metadata)
+    try:
+        with engine.begin() as conn:
+            existing_tables = set(inspect(conn).get_table_names())
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+        return True
+    except Exception as e:
+        print(f"[MIGRATION ERROR] Failed to create indexes: {e}")
+        return False
+
+
+def _create_missing_indexes_concurrently(metadata) -> bool:
+    """
+    PostgreSQL path of create_missing_indexes. CONCURRENTLY can't run inside
+    a transaction, hence AUTOCOMMIT. An interrupted concurrent build leaves
+    an INVALID index behind that IF NOT EXISTS would skip forever, so those
+    are dropped (also concurrently) and rebuilt.
+    """
+    success = True
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            inspector = inspect(conn)
+            existing_tables = set(inspector.get_table_names())
+            invalid = set(conn.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid"
+            )).scalars())
+            for table in metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing = {index["name"] for index in inspector.get_indexes(table.name)} - invalid
+                for index in table.indexes:
+                    if index.name in existing:
+                        continue
+                    try:
+                        if index.name in invalid:
+                            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                        _create_index_concurrently(conn, index)
+                        print(f"[MIGRATION] Created index '{index.name}' concurrently")
+                    except Exception as e:
+                        print(f"[MIGRATION ERROR] Failed to create index '{index.name}': {e}")
+                        success = False
+    except Exception as e:
+        print(f"[MIGRATION ERROR] Failed to create indexes: {e}")
+        return False
+    return success
+
+
+def _create_index_concurrently(conn, index) -> None:
+    # Set only for this statement: create_all must keep emitting plain CREATE INDEX inside its transaction
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+    finally:
+        options["concurrently"] = False
+
+
 def _migrate_users_table(conn, inspector) -> bool:
     """
     Add missing columns to users table.
@@ -186,7 +262,8 @@ def _migrate_clients_table(conn, inspector) -> bool:
             'owner_email': 'VARCHAR',
             'next_follow_up_date': 'DATE',
             'last_reminder_sent': 'DATE',
-            'created_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
+            'created_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP',
+            'updated_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
         }
         
         for col_name, col_def in required_columns.items():
@@ -256,7 +333,8 @@ def _migrate_services_table(conn, inspector) -> bool:
             'service_type': "VARCHAR NOT NULL DEFAULT 'Other'",  # Required field, add default for existing rows
             'billing_frequency': 'VARCHAR',
             'monthly_fee': 'DOUBLE PRECISION',
-            'active': 'BOOLEAN DEFAULT TRUE'
+            'active': 'BOOLEAN DEFAULT TRUE',
+            'updated_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
         }
         
         # Check each column and add only if missing
@@ -323,7 +401,8 @@ def _migrate_contacts_table(conn, inspector) -> bool:
         required_columns = {
             'role': 'VARCHAR',  # Owner, Controller, Bookkeeper, Tax, Other
             'email': 'VARCHAR',
-            'phone': 'VARCHAR'
+            'phone': 'VARCHAR',
+            'updated_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
         }
         
         for col_name, col_def in required_columns.items():
@@ -481,7 +560,8 @@ def _migrate_tasks_table(conn, inspector) -> bool:
             'title': "VARCHAR NOT NULL DEFAULT 'Untitled Task'",  # Required field
             'due_date': 'DATE',
             'status': "VARCHAR NOT NULL DEFAULT 'Open'",  # Required field
-            'notes': 'TEXT'
+            'notes': 'TEXT',
+            'updated_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
         }
         
         for col_name, col_def in required_columns.items():
@@ -534,7 +614,8 @@ def _migrate_notes_table(conn, inspector) -> bool:
         # Based on the Note model in models.py
         required_columns = {
             'content': "TEXT NOT NULL DEFAULT ''",  # Required field
-            'created_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
+            'created_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP',
+            'updated_at': 'TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP'
         }
         
         for col_name, col_def in required_columns.items():
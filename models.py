@@ -4,7 +4,7 @@ SQLAlchemy models for the CRM database.
 All models use standard naming conventions and include proper relationships.
 Foreign keys ensure data integrity at the database level.
 """
-from sqlalchemy import Column, Integer, String, Date, Float, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Date, Float, Boolean, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.sqlite import JSON
@@ -19,6 +19,7 @@ class Client(Base):
     Entity types: LLC, S-Corp, C-Corp, Partnership, Sole Proprietorship, Unknown, etc.
     """
     __tablename__ = "clients"
+    __table_args__ = (Index("ix_clients_status_follow_up", "status", "next_follow_up_date"),)
     
     id = Column(Integer, primary_key=True, index=True)
     legal_name = Column(String, nullable=False, index=True)  # Indexed for search performance
@@ -30,9 +31,10 @@ class Client(Base):
     next_follow_up_date = Column(Date)  # For prospect follow-up tracking
     last_reminder_sent = Column(Date)  # Track when last reminder was sent (prevent spam)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships - cascade delete ensures related records are cleaned up
-    contacts = relationship("Contact", back_populates="client", cascade="all, delete-orphan")
+    contacts = relationship("Contact", back_populates="client", cascade="all, delete-orphan", order_by="Contact.id")
     services = relationship("Service", back_populates="client", cascade="all, delete-orphan")
     tasks = relationship("Task", back_populates="client", cascade="all, delete-orphan")
     notes = relationship("Note", back_populates="client", cascade="all, delete-orphan", order_by="Note.created_at.desc()")
@@ -46,6 +48,8 @@ class Contact(Base):
     Each client can have multiple contacts for different roles.
     """
     __tablename__ = "contacts"
+    # Per-client lookups (eager loading, client detail tabs' keyset pagination)
+    __table_args__ = (Index("ix_contacts_client_id_id", "client_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -53,6 +57,7 @@ class Contact(Base):
     role = Column(String)  # Owner, Controller, Bookkeeper, Tax, Other
     email = Column(String)
     phone = Column(String)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship back to client
     client = relationship("Client", back_populates="contacts")
@@ -66,6 +71,7 @@ class Service(Base):
     Active flag allows soft-deletion of services.
     """
     __tablename__ = "services"
+    __table_args__ = (Index("ix_services_client_id_id", "client_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -73,6 +79,7 @@ class Service(Base):
     billing_frequency = Column(String)  # Monthly, Quarterly, Annual
     monthly_fee = Column(Float)  # Fee amount (interpreted based on billing_frequency)
     active = Column(Boolean, default=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship back to client
     client = relationship("Client", back_populates="services")
@@ -86,6 +93,7 @@ class Task(Base):
     Due dates help prioritize work.
     """
     __tablename__ = "tasks"
+    __table_args__ = (Index("ix_tasks_client_id_id", "client_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -93,6 +101,7 @@ class Task(Base):
     due_date = Column(Date)
     status = Column(String, nullable=False, default="Open")  # Open, Waiting on Client, Completed
     notes = Column(Text)  # Additional task details
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship back to client
     client = relationship("Client", back_populates="tasks")
@@ -106,11 +115,13 @@ class Note(Base):
     Ordered by creation date (newest first) in the relationship.
     """
     __tablename__ = "notes"
+    __table_args__ = (Index("ix_notes_client_id_id", "client_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship back to client
     client = relationship("Client", back_populates="notes")
@@ -123,6 +134,7 @@ class Timesheet(Base):
     Tracks hours worked, billable status, and associated client/project.
     """
     __tablename__ = "timesheets"
+    __table_args__ = (Index("ix_timesheets_client_id_entry_date", "client_id", "entry_date", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -25,12 +25,15 @@ _cache_ttl = timedelta(minutes=5)  # 5 minute cache TTL
 
 def get_cache(key: str) -> Optional[Any]:
     """Get value from cache if not expired."""
-    if key in _cache:
-        value, expiry = _cache[key]
+    # get/pop rather than check-then-index: the scheduler's cache_sweep job
+    # (purge_expired_cache) runs in a worker thread and may remove the key in between
+    entry = _cache.get(key)
+    if entry is not None:
+        value, expiry = entry
         if datetime.now() < expiry:
             return value
         else:
-            del _cache[key]
+            _cache.pop(key, None)
     return None
 
 
@@ -44,13 +47,22 @@ def set_cache(key: str, value: Any, ttl: Optional[timedelta] = None):
 def clear_cache(pattern: Optional[str] = None):
     """Clear cache entries matching pattern, or all if None."""
     if pattern:
-        keys_to_delete = [k for k in _cache.keys() if pattern in k]
+        keys_to_delete = [k for k in list(_cache) if pattern in k]
         for key in keys_to_delete:
-            del _cache[key]
+            _cache.pop(key, None)
     else:
         _cache.clear()
 
 
+def purge_expired_cache() -> int:
+    """Drop expired entries that were never read again (get_cache only evicts on read)."""
+    now = datetime.now()
+    expired = [k for k, (_, expiry) in list(_cache.items()) if expiry <= now]
+    for key in expired:
+        _cache.pop(key, None)
+    return len(expired)
+
+
 class PerformanceMiddleware(BaseHTTPMiddleware):
     """Middleware to measure and log request performance."""
     
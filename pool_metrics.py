@@ -0,0 +1,296 @@
+"""
+Connection pool budgeting and telemetry.
+
+Budget: every uvicorn/gunicorn worker process has its own pool, so the
+per-process pool is derived from a global budget:
+
+    per_process = (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // WEB_CONCURRENCY
+    pool_size = per_process // 2, max_overflow = the rest
+
+DB_POOL_SIZE / DB_MAX_OVERFLOW override the computed values. DB_POOL_TIMEOUT
+(default 5s) bounds how long a request waits for a connection before
+failing, instead of hanging for 30 seconds.
+
+Telemetry (per engine, in process memory):
+- checkout wait-time histogram, timeouts (InstrumentedQueuePool times _do_get)
+- leak detection: each checkout records when and where (stack) it happened;
+  a connection held longer than DB_LEAK_SECONDS is logged with that stack,
+  on checkin or by the periodic leak_watchdog() scan
+
+pool_stats() feeds /api/metrics.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "60"))
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "0"))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_LEAK_SECONDS = float(os.getenv("DB_LEAK_SECONDS", "30"))  # 0 disables stack capture
+
+# Upper bounds (ms) of the wait-time histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+LEAK_STACK_LIMIT = 15
+
+
+def pool_budget(max_connections: int = DB_MAX_CONNECTIONS,
+                workers: int = WEB_CONCURRENCY,
+                reserved: int = DB_RESERVED_CONNECTIONS) -> Tuple[int, int]:
+    """(pool_size, max_overflow) for one process under the global budget."""
+    per_process = max(2, (max_connections - reserved) // max(1, workers))
+    pool_size = int(os.getenv("DB_POOL_SIZE") or max(1, per_process // 2))
+    max_overflow = int(os.getenv("DB_MAX_OVERFLOW") or max(0, per_process - pool_size))
+    return pool_size, max_overflow
+
+
+class WaitHistogram:
+    """Fixed-bucket histogram of checkout wait times."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        index = len(WAIT_BUCKETS_MS)
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Bucket upper bound containing the given percentile (None if +Inf or empty)."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return WAIT_BUCKETS_MS[i] if i < len(WAIT_BUCKETS_MS) else None
+        return None
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b}ms" for b in WAIT_BUCKETS_MS] + ["le_inf"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_le_ms": self.percentile(0.50),
+            "p95_le_ms": self.percentile(0.95),
+            "p99_le_ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+def _caller_stack() -> list:
+    """Current stack without SQLAlchemy/pool_metrics frames, innermost LEAK_STACK_LIMIT kept."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if "sqlalchemy" not in frame.filename and frame.filename != __file__
+    ]
+    return frames[-LEAK_STACK_LIMIT:]
+
+
+class PoolTelemetry:
+    """Wait times, timeouts and open checkouts for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait = WaitHistogram()
+        self.timeouts = 0
+        self.leaks_reported = 0
+        self.engine = None
+        self._checkouts: Dict[int, Tuple[float, Optional[list]]] = {}
+        self._reported: set = set()
+        self._lock = threading.Lock()
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        stack = _caller_stack() if DB_LEAK_SECONDS > 0 else None
+        with self._lock:
+            self._checkouts[id(connection_record)] = (time.monotonic(), stack)
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        key = id(connection_record)
+        with self._lock:
+            entry = self._checkouts.pop(key, None)
+            already_reported = key in self._reported
+            self._reported.discard(key)
+        if entry is None or DB_LEAK_SECONDS <= 0:
+            return
+        held = time.monotonic() - entry[0]
+        if held > DB_LEAK_SECONDS and not already_reported:
+            self._report(held, entry[1], still_open=False)
+
+    def on_detach(self, dbapi_connection, connection_record) -> None:
+        """A detached connection leaves the pool and never checks in (e.g. the scheduler's leader lock)."""
+        key = id(connection_record)
+        with self._lock:
+            self._checkouts.pop(key, None)
+            self._reported.discard(key)
+
+    def _report(self, held: float, stack: Optional[list], still_open: bool) -> None:
+        self.leaks_reported += 1
+        state = "still checked out" if still_open else "returned"
+        formatted = "".join(traceback.format_list(stack)) if stack else "  (no stack captured)\n"
+        logger.warning(
+            f"[POOL] {self.name}: connection held {held:.1f}s ({state}, limit {DB_LEAK_SECONDS:.0f}s). "
+            f"Checked out at:\n{formatted}"
+        )
+
+    def check_leaks(self) -> List[dict]:
+        """Report (once each) connections held past DB_LEAK_SECONDS; return all of them."""
+        if DB_LEAK_SECONDS <= 0:
+            return []
+        now = time.monotonic()
+        leaks, to_report = [], []
+        with self._lock:
+            for key, (started, stack) in self._checkouts.items():
+                held = now - started
+                if held > DB_LEAK_SECONDS:
+                    frame = stack[-1] if stack else None
+                    leaks.append({
+                        "held_seconds": round(held, 1),
+                        "checked_out_at": f"{frame.filename}:{frame.lineno} in {frame.name}" if frame else None,
+                    })
+                    if key not in self._reported:
+                        self._reported.add(key)
+                        to_report.append((held, stack))
+        for held, stack in to_report:
+            self._report(held, stack, still_open=True)
+        return leaks
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        long_held = self.check_leaks()
+        stats = {
+            "wait": self.wait.snapshot(),
+            "timeouts": self.timeouts,
+            "leaks_reported": self.leaks_reported,
+            "long_held": long_held,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "timeout_seconds": pool.timeout(),
+            })
+        return stats
+
+
+_telemetry: Dict[str, PoolTelemetry] = {}
+
+
+def get_telemetry(name: str) -> PoolTelemetry:
+    if name not in _telemetry:
+        _telemetry[name] = PoolTelemetry(name)
+    return _telemetry[name]
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    telemetry_name = "primary"
+
+    def _do_get(self):
+        telemetry = get_telemetry(self.telemetry_name)
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            telemetry.timeouts += 1
+            telemetry.wait.observe(time.perf_counter() - start)
+            logger.error(
+                f"[POOL] {self.telemetry_name}: timed out after {self.timeout():.0f}s waiting for a connection "
+                f"({self.checkedout()} checked out, pool_size={self.size()})"
+            )
+            raise
+        telemetry.wait.observe(time.perf_counter() - start)
+        return connection
+
+
+def instrumented_pool_class(name: str):
+    """InstrumentedQueuePool subclass bound to a telemetry name (survives pool.recreate())."""
+    return type(f"InstrumentedQueuePool_{name}", (InstrumentedQueuePool,), {"telemetry_name": name})
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Attach checkout/checkin/detach leak tracking to an engine created with instrumented_pool_class(name)."""
+    telemetry = get_telemetry(name)
+    telemetry.engine = engine
+    event.listen(engine, "checkout", telemetry.on_checkout)
+    event.listen(engine, "checkin", telemetry.on_checkin)
+    event.listen(engine, "detach", telemetry.on_detach)
+
+
+def warm_pool(engine, connections: Optional[int] = None) -> int:
+    """
+    Open up to pool_size connections now so the first requests after a deploy
+    don't pay connection setup. Returns the number of connections opened.
+    """
+    pool = engine.pool
+    target = connections if connections is not None else (pool.size() if isinstance(pool, QueuePool) else 1)
+    opened = []
+    try:
+        for _ in range(target):
+            opened.append(engine.raw_connection())
+    except Exception as e:
+        logger.warning(f"[POOL] Warm-up stopped after {len(opened)} connection(s): {e}")
+    finally:
+        for connection in opened:
+            connection.close()  # back to the pool, not closed
+    return len(opened)
+
+
+def pool_stats() -> dict:
+    """Budget inputs plus per-engine telemetry, for /api/metrics."""
+    pool_size, max_overflow = pool_budget()
+    return {
+        "budget": {
+            "db_max_connections": DB_MAX_CONNECTIONS,
+            "reserved": DB_RESERVED_CONNECTIONS,
+            "web_concurrency": WEB_CONCURRENCY,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout_seconds": DB_POOL_TIMEOUT,
+            "leak_seconds": DB_LEAK_SECONDS,
+        },
+        "pools": {name: telemetry.snapshot() for name, telemetry in _telemetry.items()},
+    }
+
+
+async def leak_watchdog(interval: Optional[float] = None) -> None:
+    """Periodically log connections held past DB_LEAK_SECONDS (runs until cancelled)."""
+    if DB_LEAK_SECONDS <= 0:
+        return
+    interval = interval or max(5.0, DB_LEAK_SECONDS / 2)
+    while True:
+        await asyncio.sleep(interval)
+        for telemetry in list(_telemetry.values()):
+            try:
+                telemetry.check_leaks()
+            except Exception as e:
+                logger.error(f"[POOL] Leak check failed for {telemetry.name}: {e}", exc_info=True)
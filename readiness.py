@@ -0,0 +1,176 @@
+"""
+Liveness, readiness and traffic gating during startup.
+
+startup_event binds the port at once and runs initialize_database_background
+as a task (create_all, migrations, indexes, admin users, warm-up). Until that
+finishes, the schema may be half-migrated and the pool cold, so:
+
+- /health and /health/live: liveness - the process is up (always 200)
+- /health/ready: readiness - 200 once startup initialization (including
+  warm-up, see warmup.py) has finished and a SELECT 1 ping answers within
+  READY_DB_PING_MAX_MS; otherwise 503 with each step's status. The ping
+  result is cached for READY_PING_CACHE_SECONDS so probes don't add load.
+  It runs on database.ping_engine: the primary, or on SQLite a reader
+  connection, so a long write holding the single writer doesn't fail it.
+  A failed migration is reported as "degraded" but does not hold readiness
+  (the app runs without it, as before).
+- ReadinessGateMiddleware: until initialization has finished, other requests
+  wait up to READINESS_QUEUE_SECONDS for it (at most READINESS_MAX_QUEUED at
+  once) and then get a 503 with Retry-After, instead of holding a
+  connection against a schema that isn't ready. Health checks, HEAD / and
+  /static are never gated. No effect when the startup event never ran
+  (e.g. a TestClient used without a with block).
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy import text
+from starlette.responses import JSONResponse, PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+READINESS_QUEUE_SECONDS = float(os.getenv("READINESS_QUEUE_SECONDS", "5"))
+READINESS_MAX_QUEUED = int(os.getenv("READINESS_MAX_QUEUED", "50"))
+READINESS_RETRY_AFTER_SECONDS = int(os.getenv("READINESS_RETRY_AFTER_SECONDS", "5"))
+READY_DB_PING_MAX_MS = float(os.getenv("READY_DB_PING_MAX_MS", "1000"))
+READY_PING_CACHE_SECONDS = float(os.getenv("READY_PING_CACHE_SECONDS", "2"))
+
+UNGATED_PREFIXES = ("/health", "/static/")
+
+
+class StartupState:
+    """Progress of initialize_database_background, plus an event requests can wait on."""
+
+    def __init__(self):
+        self.gating = False
+        self.finished = False
+        self.steps = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._event: Optional[asyncio.Event] = None
+        self.waiting = 0
+
+    def begin(self) -> None:
+        """Called from startup_event: start gating traffic until finish()."""
+        self._event = asyncio.Event()
+        self.gating = True
+        self.finished = False
+        self.steps = {}
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    def mark(self, name: str, ok: bool, started: float, error: Optional[str] = None) -> None:
+        step = {"status": "ok" if ok else "failed", "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+        if error:
+            step["error"] = error
+        self.steps[name] = step
+
+    def finish(self) -> None:
+        self.finished = True
+        self.finished_at = time.monotonic()
+        if self._event is not None:
+            self._event.set()
+        elapsed = self.finished_at - self.started_at if self.started_at is not None else 0.0
+        logger.info(f"[READINESS] Startup initialization finished in {elapsed:.1f}s - accepting traffic")
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for finish(); True if finished."""
+        if self.finished or self._event is None:
+            return True
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.finished
+
+
+startup_state = StartupState()
+
+_last_ping = {"at": 0.0, "result": None}
+
+
+def _ping(engine) -> float:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return (time.perf_counter() - started) * 1000
+
+
+async def database_ping(engine) -> dict:
+    """SELECT 1 latency, cached for READY_PING_CACHE_SECONDS."""
+    now = time.monotonic()
+    if _last_ping["result"] is not None and now - _last_ping["at"] < READY_PING_CACHE_SECONDS:
+        return _last_ping["result"]
+    try:
+        latency_ms = await asyncio.wait_for(asyncio.to_thread(_ping, engine), READY_DB_PING_MAX_MS / 1000 * 2)
+        result = {"ok": latency_ms <= READY_DB_PING_MAX_MS, "latency_ms": round(latency_ms, 1)}
+        if not result["ok"]:
+            result["error"] = f"slower than {READY_DB_PING_MAX_MS:g}ms"
+    except asyncio.TimeoutError:
+        result = {"ok": False, "latency_ms": None, "error": "timed out"}
+    except Exception as e:
+        result = {"ok": False, "latency_ms": None, "error": str(e)}
+    _last_ping.update(at=now, result=result)
+    return result
+
+
+async def readiness_report(engine, warmup: dict) -> dict:
+    """Body for /health/ready; "ready" is the overall verdict."""
+    initialized = startup_state.finished or not startup_state.gating
+    ping = await database_ping(engine) if initialized else None
+    failed = [name for name, step in startup_state.steps.items() if step["status"] != "ok"]
+    ready = initialized and ping is not None and ping["ok"]
+    if not initialized:
+        status = "starting"
+    elif not ready:
+        status = "unavailable"
+    else:
+        status = "degraded" if failed else "ready"
+    return {
+        "status": status,
+        "ready": ready,
+        "initialized": initialized,
+        "steps": startup_state.steps,
+        "failed_steps": failed,
+        "database": ping,
+        "warmup": warmup,
+    }
+
+
+class ReadinessGateMiddleware:
+    """Hold or reject non-health requests until startup initialization finishes (see module docstring)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not startup_state.gating
+            or startup_state.finished
+            or scope["path"].startswith(UNGATED_PREFIXES)
+            or (scope["path"] == "/" and scope["method"] == "HEAD")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        ready = False
+        if startup_state.waiting < READINESS_MAX_QUEUED:
+            startup_state.waiting += 1
+            try:
+                ready = await startup_state.wait(READINESS_QUEUE_SECONDS)
+            finally:
+                startup_state.waiting -= 1
+        if ready:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {"Retry-After": str(READINESS_RETRY_AFTER_SECONDS), "Cache-Control": "no-store"}
+        if scope["path"].startswith("/api"):
+            response = JSONResponse({"error": "Service is starting, retry shortly"}, status_code=503, headers=headers)
+        else:
+            response = PlainTextResponse("Service is starting, please retry in a few seconds.",
+                                         status_code=503, headers=headers)
+        await response(scope, receive, send)
@@ -0,0 +1,315 @@
+"""
+Follow-up reminder digests for prospect owners.
+
+One run:
+1. selects every due prospect in a single column-only query - status
+   Prospect, next_follow_up_date on or before today, an owner_email, and
+   no reminder sent yet today (served by ix_clients_status_follow_up)
+2. groups them into one digest email per owner_email
+3. sends the digests through SMTPTransport on REMINDER_SEND_CONCURRENCY
+   threads, each thread reusing its own SMTP connection, throttled to
+   REMINDER_RATE_PER_SECOND messages per second across all threads
+4. stamps last_reminder_sent = today on the clients whose digest was
+   accepted, with set-based UPDATE ... WHERE id IN (...) statements of
+   REMINDER_UPDATE_CHUNK ids and a single commit
+
+A digest that fails to send leaves its clients unstamped, so the next run
+picks them up again; a second run on the same day sends nothing new.
+
+SMTP settings: SMTP_HOST (unset = reminders disabled), SMTP_PORT (25),
+SMTP_USERNAME / SMTP_PASSWORD, SMTP_STARTTLS (0/1), SMTP_FROM,
+SMTP_TIMEOUT. Any SMTP server works, including a local debugging sink
+(python -m aiosmtpd -n -l localhost:8025).
+
+Usage:
+    python reminders.py                      # send today's reminders
+    python reminders.py --dry-run            # list digests, send nothing
+    python reminders.py --date 2026-01-31    # treat another day as today
+"""
+import os
+import sys
+import time
+import smtplib
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from models import Client
+from change_tracking import bump_table_version
+
+logger = logging.getLogger(__name__)
+
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "0") == "1"
+SMTP_FROM = os.getenv("SMTP_FROM", "crm@tierneyohlms.com")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+REMINDER_SEND_CONCURRENCY = max(1, int(os.getenv("REMINDER_SEND_CONCURRENCY", "4")))
+REMINDER_RATE_PER_SECOND = float(os.getenv("REMINDER_RATE_PER_SECOND", "5"))  # 0 = unthrottled
+REMINDER_UPDATE_CHUNK = max(1, int(os.getenv("REMINDER_UPDATE_CHUNK", "500")))
+REMINDER_BASE_URL = os.getenv("REMINDER_BASE_URL", "").rstrip("/")
+
+
+# ============================================================================
+# Selection
+# ============================================================================
+
+def find_due_prospects(db: Session, today: date) -> list:
+    """
+    (id, legal_name, owner_name, owner_email, next_follow_up_date) rows for
+    every prospect due on or before today and not yet reminded today,
+    ordered by owner then due date.
+    """
+    return (
+        db.query(Client.id, Client.legal_name, Client.owner_name, Client.owner_email, Client.next_follow_up_date)
+        .filter(
+            Client.status == "Prospect",
+            Client.next_follow_up_date <= today,
+            Client.owner_email.isnot(None),
+            Client.owner_email != "",
+            or_(Client.last_reminder_sent.is_(None), Client.last_reminder_sent < today),
+        )
+        .order_by(Client.owner_email, Client.next_follow_up_date, Client.id)
+        .all()
+    )
+
+
+def group_by_owner(rows) -> List[dict]:
+    """One digest per owner_email (compared case-insensitively): {"email", "name", "prospects"}."""
+    digests: Dict[str, dict] = {}
+    for client_id, legal_name, owner_name, owner_email, due in rows:
+        email = owner_email.strip()
+        digest = digests.get(email.lower())
+        if digest is None:
+            digest = digests[email.lower()] = {"email": email, "name": owner_name or "", "prospects": []}
+        digest["prospects"].append({"id": client_id, "legal_name": legal_name, "due": due})
+    return list(digests.values())
+
+
+def build_digest_message(digest: dict, today: date, sender: str = SMTP_FROM) -> EmailMessage:
+    """Plain-text digest listing the owner's due prospects, most overdue first."""
+    prospects = digest["prospects"]
+    count = len(prospects)
+    lines = [f"Hi {digest['name']}," if digest["name"] else "Hi,", ""]
+    lines.append(f"You have {count} prospect{'s' if count != 1 else ''} due for follow-up:")
+    lines.append("")
+    for prospect in prospects:
+        overdue = (today - prospect["due"]).days
+        when = "due today" if overdue == 0 else f"{overdue} day{'s' if overdue != 1 else ''} overdue"
+        lines.append(f"  - {prospect['legal_name']} ({when})")
+        if REMINDER_BASE_URL:
+            lines.append(f"    {REMINDER_BASE_URL}/clients/{prospect['id']}")
+    lines.extend(["", "- Tierney & Ohlms CRM"])
+
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = digest["email"]
+    message["Subject"] = f"Follow-up reminder: {count} prospect{'s' if count != 1 else ''} due"
+    message.set_content("\n".join(lines))
+    return message
+
+
+# ============================================================================
+# Sending
+# ============================================================================
+
+class RateLimiter:
+    """Spaces acquire() calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate_per_second: float):
+        self._interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SMTPTransport:
+    """
+    Sends EmailMessages over SMTP, one connection per sending thread,
+    reconnecting once if the server dropped an idle connection.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, username: str = SMTP_USERNAME,
+                 password: str = SMTP_PASSWORD, starttls: bool = SMTP_STARTTLS, timeout: float = SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def send(self, message: EmailMessage) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        try:
+            connection.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            connection = self._local.connection = self._connect()
+            connection.send_message(message)
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.quit()
+            except Exception:
+                pass
+
+
+def send_digests(digests: List[dict], transport, today: date,
+                 concurrency: int = REMINDER_SEND_CONCURRENCY,
+                 rate_per_second: float = REMINDER_RATE_PER_SECOND) -> List[dict]:
+    """
+    Send every digest; at most `concurrency` in flight and `rate_per_second`
+    started per second. Returns the digests the server accepted.
+    """
+    limiter = RateLimiter(rate_per_second)
+
+    def send_one(digest):
+        limiter.acquire()
+        transport.send(build_digest_message(digest, today))
+        return digest
+
+    sent = []
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="reminders") as executor:
+        futures = {executor.submit(send_one, digest): digest for digest in digests}
+        for future in as_completed(futures):
+            digest = futures[future]
+            try:
+                sent.append(future.result())
+            except Exception as e:
+                logger.error(f"[REMINDERS] Failed to send digest to {digest['email']}: {e}")
+    return sent
+
+
+# ============================================================================
+# Stamping
+# ============================================================================
+
+def mark_reminded(db: Session, client_ids: List[int], today: date, chunk_size: int = REMINDER_UPDATE_CHUNK) -> int:
+    """Set last_reminder_sent = today on client_ids in chunked UPDATEs and one commit. Returns rows updated."""
+    if not client_ids:
+        return 0
+    updated = 0
+    try:
+        for start in range(0, len(client_ids), chunk_size):
+            chunk = client_ids[start:start + chunk_size]
+            result = db.execute(
+                update(Client)
+                .where(Client.id.in_(chunk))
+                .values(last_reminder_sent=today)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    bump_table_version("clients")
+    return updated
+
+
+def run_reminders(db: Session, today: Optional[date] = None, transport=None, dry_run: bool = False) -> dict:
+    """Select, send and stamp one day's reminders. Returns counts for logging."""
+    today = today or date.today()
+    started = time.perf_counter()
+    digests = group_by_owner(find_due_prospects(db, today))
+    # The SELECT opened a transaction; end it so no connection sits idle while sending
+    db.rollback()
+    due = sum(len(digest["prospects"]) for digest in digests)
+    summary = {"date": today.isoformat(), "due_prospects": due, "digests": len(digests),
+               "sent": 0, "failed": 0, "stamped": 0}
+
+    if dry_run or not digests:
+        return summary
+
+    own_transport = transport is None
+    if own_transport:
+        if not SMTP_HOST:
+            logger.warning("[REMINDERS] SMTP_HOST not set - skipping send")
+            return summary
+        transport = SMTPTransport()
+    try:
+        sent = send_digests(digests, transport, today)
+    finally:
+        if own_transport:
+            transport.close()
+
+    client_ids = [prospect["id"] for digest in sent for prospect in digest["prospects"]]
+    summary["sent"] = len(sent)
+    summary["failed"] = len(digests) - len(sent)
+    summary["stamped"] = mark_reminded(db, client_ids, today)
+    logger.info(
+        f"[REMINDERS] {summary['sent']}/{len(digests)} digests sent covering {summary['stamped']} prospects "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return summary
+
+
+def send_due_reminders() -> dict:
+    """run_reminders for today on its own session (the scheduler's follow_up_reminders job)."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return run_reminders(db)
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="List the digests without sending or stamping")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Run as of this date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        today = args.date or date.today()
+        if args.dry_run:
+            for digest in group_by_owner(find_due_prospects(db, today)):
+                print(f"{digest['email']}: {len(digest['prospects'])} prospect(s)")
+        summary = run_reminders(db, today=today, dry_run=args.dry_run)
+        print(summary)
+        return 1 if summary["failed"] else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
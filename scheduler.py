@@ -0,0 +1,320 @@
+"""
+In-process periodic job scheduler.
+
+Jobs are registered with scheduler.register(name, func, interval_seconds,
+...) and run on the event loop once scheduler.start() is called from
+startup_event:
+
+- each job sleeps interval +/- SCHEDULER_JITTER (a fraction) between runs,
+  so workers started together don't all fire at the same moment
+- sync functions run in a worker thread, coroutines on the loop; a run
+  longer than its timeout is recorded as a timeout. A coroutine is
+  cancelled; a thread can't be, so the job is skipped until it returns
+  (runs of one job never overlap)
+- leader_only jobs (reminders, backups - anything that must happen once
+  per deployment, not once per worker) run only in the worker holding the
+  scheduler lock: a session-level pg_try_advisory_lock on a dedicated
+  PostgreSQL connection, or an exclusive file lock next to the SQLite
+  database. Every worker retries the lock each SCHEDULER_ELECTION_SECONDS;
+  the lock is freed when the leader exits or its connection drops, and
+  another worker takes over on its next attempt
+- jobs without leader_only (refreshing per-process caches) run in every
+  worker
+
+Run counts, durations, failures and timeouts per job are kept in memory
+and reported by stats() on /api/metrics. SCHEDULER_ENABLED=0 turns the
+scheduler off.
+"""
+import os
+import time
+import zlib
+import random
+import asyncio
+import logging
+import inspect
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") != "0"
+SCHEDULER_JITTER = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+SCHEDULER_ELECTION_SECONDS = float(os.getenv("SCHEDULER_ELECTION_SECONDS", "15"))
+# Delay before first runs, so they don't compete with startup database init
+SCHEDULER_START_DELAY_SECONDS = float(os.getenv("SCHEDULER_START_DELAY_SECONDS", "30"))
+
+# Same key in every worker of this app (pg advisory locks take a bigint)
+ADVISORY_LOCK_KEY = zlib.crc32(b"tierney_ohlms_crm.scheduler")
+
+
+# ============================================================================
+# Leader election
+# ============================================================================
+
+class AdvisoryLock:
+    """PostgreSQL session-level advisory lock held on a connection detached from the pool."""
+
+    def __init__(self, engine, key: int = ADVISORY_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self._connection = None
+
+    def try_acquire(self) -> bool:
+        """True if this process holds the lock (checking the held connection is still alive)."""
+        if self._connection is not None:
+            try:
+                cursor = self._connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                return True
+            except Exception as e:
+                logger.warning(f"[SCHEDULER] Lost leader connection: {e}")
+                self.release()
+
+        connection = self.engine.raw_connection()
+        # Detached: doesn't count against the pool, and closing it really closes it (freeing the lock)
+        connection.detach()
+        try:
+            connection.dbapi_connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (self.key,))
+            acquired = bool(cursor.fetchone()[0])
+            cursor.close()
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return acquired
+
+    def release(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+class FileLock:
+    """Exclusive non-blocking lock on a file (flock on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = None
+
+    def try_acquire(self) -> bool:
+        if self._handle is not None:
+            return True
+        handle = open(self.path, "a+")
+        try:
+            try:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+        self._handle = handle
+        return True
+
+    def release(self) -> None:
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            handle.close()  # closing the file drops the lock
+
+
+def leader_lock_for(engine):
+    """AdvisoryLock on PostgreSQL, otherwise a FileLock beside the SQLite database file."""
+    if engine.dialect.name == "postgresql":
+        return AdvisoryLock(engine)
+    database = engine.url.database
+    if not database or database == ":memory:":
+        database = "crm.db"
+    return FileLock(f"{database}.scheduler.lock")
+
+
+# ============================================================================
+# Jobs
+# ============================================================================
+
+class Job:
+    """One registered periodic job and its run statistics."""
+
+    def __init__(self, name: str, func: Callable, interval_seconds: float,
+                 timeout_seconds: Optional[float] = None, leader_only: bool = False,
+                 jitter: float = SCHEDULER_JITTER):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.leader_only = leader_only
+        self.jitter = jitter
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped_overlap = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms: Optional[float] = None
+        self.last_started_at: Optional[str] = None
+        self.last_success_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def next_delay(self) -> float:
+        spread = self.interval_seconds * self.jitter
+        return max(1.0, self.interval_seconds + random.uniform(-spread, spread))
+
+    def record(self, elapsed: float, error: Optional[str] = None, timed_out: bool = False) -> None:
+        ms = elapsed * 1000
+        self.runs += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+        if timed_out:
+            self.timeouts += 1
+        if error is not None:
+            self.failures += 1
+            self.last_error = error
+        else:
+            self.last_success_at = datetime.now().isoformat(timespec="seconds")
+
+    def snapshot(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "timeout_seconds": self.timeout_seconds,
+            "leader_only": self.leader_only,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "skipped_overlap": self.skipped_overlap,
+            "mean_ms": round(self.total_ms / self.runs, 1) if self.runs else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "last_ms": round(self.last_ms, 1) if self.last_ms is not None else None,
+            "last_started_at": self.last_started_at,
+            "last_success_at": self.last_success_at,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """Runs registered Jobs on the event loop; see module docstring."""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._lock = None
+        self._election_task: Optional[asyncio.Task] = None
+        self._started = False
+
+    def register(self, name: str, func: Callable, interval_seconds: float,
+                 timeout_seconds: Optional[float] = None, leader_only: bool = False) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job already registered: {name}")
+        job = Job(name, func, interval_seconds, timeout_seconds, leader_only)
+        self.jobs[name] = job
+        if self._started:
+            job.task = asyncio.ensure_future(self._job_loop(job))
+        return job
+
+    def start(self, engine) -> None:
+        """Start election (if any job is leader_only) and every job loop. Call from the event loop."""
+        if not SCHEDULER_ENABLED or self._started:
+            return
+        self._started = True
+        self._lock = leader_lock_for(engine)
+        self._election_task = asyncio.ensure_future(self._election_loop())
+        for job in self.jobs.values():
+            job.task = asyncio.ensure_future(self._job_loop(job))
+        logger.info(f"[SCHEDULER] Started {len(self.jobs)} job(s): {', '.join(self.jobs)}")
+
+    async def stop(self) -> None:
+        tasks = [job.task for job in self.jobs.values() if job.task] + [self._election_task]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(task for task in tasks if task is not None), return_exceptions=True)
+        if self._lock is not None:
+            await asyncio.to_thread(self._lock.release)
+        self.is_leader = False
+        self._started = False
+
+    async def _election_loop(self) -> None:
+        while True:
+            try:
+                leader = await asyncio.to_thread(self._lock.try_acquire)
+            except Exception as e:
+                logger.warning(f"[SCHEDULER] Leader election failed: {e}")
+                leader = False
+            if leader != self.is_leader:
+                logger.info(f"[SCHEDULER] Process {os.getpid()} {'is now' if leader else 'is no longer'} the leader")
+            self.is_leader = leader
+            await asyncio.sleep(SCHEDULER_ELECTION_SECONDS)
+
+    async def _job_loop(self, job: Job) -> None:
+        await asyncio.sleep(SCHEDULER_START_DELAY_SECONDS + random.uniform(0, job.interval_seconds * job.jitter))
+        while True:
+            if job.leader_only and not self.is_leader:
+                pass
+            elif job.running:
+                # A thread from a timed-out run is still going
+                job.skipped_overlap += 1
+                logger.warning(f"[SCHEDULER] {job.name}: previous run still in progress, skipping")
+            else:
+                await self.run_job(job)
+            await asyncio.sleep(job.next_delay())
+
+    async def run_job(self, job: Job) -> None:
+        """Run one job now, recording its duration and outcome."""
+        job.running = True
+        job.last_started_at = datetime.now().isoformat(timespec="seconds")
+        started = time.perf_counter()
+        if inspect.iscoroutinefunction(job.func):
+            work = asyncio.ensure_future(job.func())
+        else:
+            work = asyncio.ensure_future(asyncio.to_thread(job.func))
+        try:
+            # shield: on timeout a coroutine is cancelled below, a thread keeps job.running set until it returns
+            await asyncio.wait_for(asyncio.shield(work), job.timeout_seconds)
+        except asyncio.TimeoutError:
+            job.record(time.perf_counter() - started, f"timed out after {job.timeout_seconds:g}s", timed_out=True)
+            logger.error(f"[SCHEDULER] {job.name}: timed out after {job.timeout_seconds:g}s")
+            if inspect.iscoroutinefunction(job.func):
+                work.cancel()
+                job.running = False
+            else:
+                work.add_done_callback(lambda _: setattr(job, "running", False))
+            return
+        except asyncio.CancelledError:
+            work.cancel()
+            job.running = False
+            raise
+        except Exception as e:
+            job.record(time.perf_counter() - started, f"{type(e).__name__}: {e}")
+            logger.error(f"[SCHEDULER] {job.name} failed: {e}", exc_info=True)
+        else:
+            elapsed = time.perf_counter() - started
+            job.record(elapsed)
+            logger.info(f"[SCHEDULER] {job.name} finished in {elapsed * 1000:.0f}ms")
+        job.running = False
+
+    def stats(self) -> dict:
+        """Leadership and per-job run statistics, for /api/metrics."""
+        return {
+            "enabled": SCHEDULER_ENABLED,
+            "pid": os.getpid(),
+            "leader": self.is_leader,
+            "jobs": {name: job.snapshot() for name, job in self.jobs.items()},
+        }
+
+
+scheduler = Scheduler()
@@ -11,11 +11,12 @@ CRITICAL: This ensures the application works even when schema is partially migra
 """
 import logging
 from typing import Dict, List, Set, Tuple, Optional
-from sqlalchemy import inspect, text, MetaData
+from sqlalchemy import text, MetaData
 from sqlalchemy.exc import SQLAlchemyError, ProgrammingError
 from psycopg.errors import UndefinedColumn
 from database import engine
 from models import Client, Contact, Service, Task, Note, Timesheet, User
+from schema_validator import load_schema_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,8 @@ EXPECTED_COLUMNS = {
         'owner_email': 'VARCHAR',
         'next_follow_up_date': 'DATE',
         'last_reminder_sent': 'DATE',
-        'created_at': 'TIMESTAMP WITH TIME ZONE'
+        'created_at': 'TIMESTAMP WITH TIME ZONE',
+        'updated_at': 'TIMESTAMP WITH TIME ZONE'
     },
     'contacts': {
         'id': 'INTEGER PRIMARY KEY',
@@ -50,7 +52,8 @@ EXPECTED_COLUMNS = {
         'name': 'VARCHAR NOT NULL',
         'role': 'VARCHAR',
         'email': 'VARCHAR',
-        'phone': 'VARCHAR'
+        'phone': 'VARCHAR',
+        'updated_at': 'TIMESTAMP WITH TIME ZONE'
     },
     'services': {
         'id': 'INTEGER PRIMARY KEY',
@@ -58,7 +61,8 @@ EXPECTED_COLUMNS = {
         'service_type': 'VARCHAR NOT NULL',
         'billing_frequency': 'VARCHAR',
         'monthly_fee': 'DOUBLE PRECISION',
-        'active': 'BOOLEAN'
+        'active': 'BOOLEAN',
+        'updated_at': 'TIMESTAMP WITH TIME ZONE'
     },
     'tasks': {
         'id': 'INTEGER PRIMARY KEY',
@@ -66,13 +70,15 @@ EXPECTED_COLUMNS = {
         'title': 'VARCHAR NOT NULL',
         'due_date': 'DATE',
         'status': 'VARCHAR NOT NULL',
-        'notes': 'TEXT'
+        'notes': 'TEXT',
+        'updated_at': 'TIMESTAMP WITH TIME ZONE'
     },
     'notes': {
         'id': 'INTEGER PRIMARY KEY',
         'client_id': 'INTEGER NOT NULL',
         'content': 'TEXT NOT NULL',
-        'created_at': 'TIMESTAMP WITH TIME ZONE'
+        'created_at': 'TIMESTAMP WITH TIME ZONE',
+        'updated_at': 'TIMESTAMP WITH TIME ZONE'
     },
     'timesheets': {
         'id': 'INTEGER PRIMARY KEY',
@@ -105,18 +111,25 @@ EXPECTED_COLUMNS = {
 COLUMN_DEFAULTS = {
     'clients': {
         'status': "'Prospect'",
-        'created_at': 'CURRENT_TIMESTAMP'
+        'created_at': 'CURRENT_TIMESTAMP',
+        'updated_at': 'CURRENT_TIMESTAMP'
+    },
+    'contacts': {
+        'updated_at': 'CURRENT_TIMESTAMP'
     },
     'services': {
         'service_type': "'Other'",
-        'active': 'TRUE'
+        'active': 'TRUE',
+        'updated_at': 'CURRENT_TIMESTAMP'
     },
     'tasks': {
         'title': "'Untitled Task'",
-        'status': "'Open'"
+        'status': "'Open'",
+        'updated_at': 'CURRENT_TIMESTAMP'
     },
     'notes': {
-        'content': "''"
+        'content': "''",
+        'updated_at': 'CURRENT_TIMESTAMP'
     },
     'timesheets': {
         'staff_member': "'Unknown'",
@@ -135,35 +148,29 @@ COLUMN_DEFAULTS = {
 }
 
 
-def check_column_exists(conn, table_name: str, column_name: str) -> bool:
+def check_column_exists(conn, table_name: str, column_name: str, snapshot: Optional[Dict] = None) -> bool:
     """
-    Check if a column exists in a table using direct SQL query.
+    Check if a column exists in a table.
     
-    This is more reliable than using SQLAlchemy inspector which may have stale cache.
+    Reads from a schema snapshot (see schema_validator.load_schema_snapshot)
+    instead of issuing a catalog query per column. A fresh snapshot is taken
+    if none is passed in.
     """
     try:
-        result = conn.execute(text(f"""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_schema = 'public' 
-            AND table_name = :table_name 
-            AND column_name = :column_name
-        """), {"table_name": table_name, "column_name": column_name})
-        return result.fetchone() is not None
+        if snapshot is None:
+            snapshot = load_schema_snapshot(conn)
+        return column_name in snapshot.get(table_name, {})
     except Exception as e:
         logger.warning(f"Error checking column {table_name}.{column_name}: {e}")
         return False
 
 
-def get_existing_columns(conn, table_name: str) -> Set[str]:
-    """Get all existing columns for a table."""
+def get_existing_columns(conn, table_name: str, snapshot: Optional[Dict] = None) -> Set[str]:
+    """Get all existing columns for a table from a schema snapshot."""
     try:
-        result = conn.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_schema = 'public' AND table_name = :table_name
-        """), {"table_name": table_name})
-        return {row[0] for row in result}
+        if snapshot is None:
+            snapshot = load_schema_snapshot(conn)
+        return set(snapshot.get(table_name, {}).keys())
     except Exception as e:
         logger.error(f"Error getting columns for {table_name}: {e}")
         return set()
@@ -184,14 +191,20 @@ def generate_column_sql(table_name: str, column_name: str) -> str:
     # Add default if column is NOT NULL and we have a default
     if 'NOT NULL' in sql_type and defaults:
         sql_type = sql_type.replace('NOT NULL', f'NOT NULL DEFAULT {defaults}')
+    elif defaults:
+        # Nullable columns with a default (e.g. updated_at) get it too, so existing rows are backfilled
+        sql_type = f"{sql_type} DEFAULT {defaults}"
     
     return f"ALTER TABLE {table_name} ADD COLUMN {column_name} {sql_type}"
 
 
-def migrate_table_comprehensive(conn, table_name: str) -> Tuple[bool, List[str]]:
+def migrate_table_comprehensive(conn, table_name: str, snapshot: Optional[Dict] = None) -> Tuple[bool, List[str]]:
     """
     Comprehensively migrate a table by adding all missing columns.
     
+    Missing columns are computed from a schema snapshot; after the ALTERs run,
+    one fresh snapshot verifies every added column at once.
+    
     Returns:
         (success, list of added columns)
     """
@@ -199,43 +212,46 @@ def migrate_table_comprehensive(conn, table_name: str) -> Tuple[bool, List[str]]
         logger.warning(f"Table {table_name} not in expected columns map")
         return False, []
     
+    if snapshot is None:
+        snapshot = load_schema_snapshot(conn)
+    
     expected_cols = set(EXPECTED_COLUMNS[table_name].keys())
-    existing_cols = get_existing_columns(conn, table_name)
+    existing_cols = get_existing_columns(conn, table_name, snapshot)
     missing_cols = expected_cols - existing_cols
     
     if not missing_cols:
         logger.info(f"[SCHEMA] Table {table_name} is up to date")
         return True, []
     
-    added_cols = []
+    attempted_cols = []
     for col_name in sorted(missing_cols):
         try:
-            # Double-check column doesn't exist (race condition protection)
-            if check_column_exists(conn, table_name, col_name):
-                logger.info(f"[SCHEMA] Column {table_name}.{col_name} already exists (race condition)")
-                continue
-            
             # Generate and execute ALTER TABLE
             sql = generate_column_sql(table_name, col_name)
             conn.execute(text(sql))
             conn.commit()
-            
-            # Verify it was added
-            if check_column_exists(conn, table_name, col_name):
-                logger.info(f"[SCHEMA] Added column {table_name}.{col_name}")
-                added_cols.append(col_name)
-            else:
-                logger.error(f"[SCHEMA] Column {table_name}.{col_name} was not added successfully")
-                return False, added_cols
-                
+            attempted_cols.append(col_name)
         except Exception as e:
             error_msg = str(e).lower()
             if 'duplicate' in error_msg or 'already exists' in error_msg or '42701' in error_msg:
+                # Added concurrently by another worker since the snapshot was taken
                 logger.info(f"[SCHEMA] Column {table_name}.{col_name} already exists (detected via error)")
+                conn.rollback()
             else:
                 logger.error(f"[SCHEMA] Failed to add column {table_name}.{col_name}: {e}")
                 conn.rollback()
-                return False, added_cols
+                return False, attempted_cols
+    
+    # Verify all additions with a single catalog round trip
+    final_cols = get_existing_columns(conn, table_name, load_schema_snapshot(conn))
+    added_cols = []
+    for col_name in attempted_cols:
+        if col_name in final_cols:
+            logger.info(f"[SCHEMA] Added column {table_name}.{col_name}")
+            added_cols.append(col_name)
+        else:
+            logger.error(f"[SCHEMA] Column {table_name}.{col_name} was not added successfully")
+            return False, added_cols
     
     return True, added_cols
 
@@ -257,8 +273,8 @@ def fix_all_schema_drift() -> Tuple[bool, str]:
     
     try:
         with engine.begin() as conn:
-            inspector = inspect(engine)
-            all_tables = inspector.get_table_names()
+            snapshot = load_schema_snapshot(conn)
+            all_tables = set(snapshot.keys())
             
             all_success = True
             total_added = 0
@@ -272,7 +288,7 @@ def fix_all_schema_drift() -> Tuple[bool, str]:
                     report_lines.append("")
                     continue
                 
-                success, added = migrate_table_comprehensive(conn, table_name)
+                success, added = migrate_table_comprehensive(conn, table_name, snapshot)
                 total_added += len(added)
                 
                 if success:
@@ -314,16 +330,18 @@ def validate_schema_complete() -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
     """
     Complete schema validation - returns detailed drift report.
     
+    Runs against a single catalog snapshot (one round trip for all tables).
+    
     Returns:
         (is_valid, drift_report)
         drift_report: {table_name: {missing_in_db: [...], extra_in_db: [...]}}
     """
-    inspector = inspect(engine)
+    snapshot = load_schema_snapshot()
     drift_report = {}
     is_valid = True
     
     for table_name, model_class in TABLE_MODEL_MAP.items():
-        if table_name not in inspector.get_table_names():
+        if table_name not in snapshot:
             drift_report[table_name] = {
                 'missing_in_db': list(EXPECTED_COLUMNS.get(table_name, {}).keys()),
                 'extra_in_db': [],
@@ -333,7 +351,7 @@ def validate_schema_complete() -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
             continue
         
         expected = set(EXPECTED_COLUMNS.get(table_name, {}).keys())
-        existing = get_existing_columns(engine.connect(), table_name)
+        existing = set(snapshot[table_name].keys())
         
         missing = expected - existing
         extra = existing - expected
@@ -347,4 +365,3 @@ def validate_schema_complete() -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
             }
     
     return is_valid, drift_report
-
@@ -5,8 +5,8 @@ This module validates that SQLAlchemy models match the actual database schema.
 It will detect and report any mismatches, and can optionally fix them.
 """
 import logging
-from typing import Dict, List, Tuple, Set
-from sqlalchemy import inspect, text
+from typing import Any, Dict, List, Optional, Tuple, Set
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from database import engine
 from models import (
@@ -50,25 +50,87 @@ def get_model_columns(model_class) -> Dict[str, str]:
     return columns
 
 
-def get_database_columns(table_name: str, inspector) -> Set[str]:
+# Catalog queries used to build a schema snapshot in a single round trip.
+# PostgreSQL: every column of every table in the public schema.
+# SQLite: pragma_table_xinfo() joined against sqlite_master covers all tables at once.
+_POSTGRES_CATALOG_SQL = """
+    SELECT table_name, column_name, data_type, is_nullable, column_default
+    FROM information_schema.columns
+    WHERE table_schema = 'public'
+    ORDER BY table_name, ordinal_position
+"""
+
+_SQLITE_CATALOG_SQL = """
+    SELECT m.name, p.name, p.type,
+           CASE WHEN p."notnull" = 1 THEN 'NO' ELSE 'YES' END,
+           p.dflt_value
+    FROM sqlite_master AS m
+    JOIN pragma_table_xinfo(m.name) AS p
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+    ORDER BY m.name, p.cid
+"""
+
+# Map of table names to model classes
+MODELS = {
+    'clients': Client,
+    'contacts': Contact,
+    'services': Service,
+    'tasks': Task,
+    'notes': Note,
+    'timesheets': Timesheet,
+    'users': User
+}
+
+
+def load_schema_snapshot(conn=None) -> Dict[str, Dict[str, Dict[str, Any]]]:
     """
-    Get actual columns from the database.
+    Build an in-memory model of the live schema with ONE catalog query.
+    
+    All drift detection and fix generation runs against this snapshot, so
+    validation costs a single round trip regardless of how many tables exist.
     
     Returns:
-        Set of column names
+        Dictionary mapping table name -> column name -> column info:
+        {'type': str, 'nullable': bool, 'default': Optional[str]}
     """
-    try:
-        columns = inspector.get_columns(table_name)
-        return {col['name'] for col in columns}
-    except Exception as e:
-        logger.error(f"Error getting columns for table {table_name}: {e}")
-        return set()
+    if conn is None:
+        with engine.connect() as new_conn:
+            return load_schema_snapshot(new_conn)
+    
+    if conn.dialect.name == "sqlite":
+        catalog_sql = _SQLITE_CATALOG_SQL
+    else:
+        catalog_sql = _POSTGRES_CATALOG_SQL
+    
+    snapshot: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for table_name, column_name, data_type, is_nullable, column_default in conn.execute(text(catalog_sql)):
+        snapshot.setdefault(table_name, {})[column_name] = {
+            'type': (data_type or '').upper(),
+            'nullable': is_nullable == 'YES',
+            'default': column_default
+        }
+    return snapshot
 
 
-def validate_schema() -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
+def get_database_columns(table_name: str, snapshot: Dict[str, Dict[str, Dict[str, Any]]]) -> Set[str]:
+    """
+    Get actual columns for a table from a schema snapshot.
+    
+    Returns:
+        Set of column names (empty if the table does not exist)
+    """
+    return set(snapshot.get(table_name, {}).keys())
+
+
+def validate_schema(
+    snapshot: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+) -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
     """
     Validate that all models match the database schema.
     
+    Uses a single catalog snapshot (see load_schema_snapshot); pass one in to
+    reuse an existing snapshot instead of querying the database again.
+    
     Returns:
         Tuple of (is_valid, drift_report)
         drift_report structure:
@@ -80,24 +142,14 @@ def validate_schema() -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
             }
         }
     """
-    inspector = inspect(engine)
+    if snapshot is None:
+        snapshot = load_schema_snapshot()
     drift_report = {}
     is_valid = True
     
-    # Map of model classes to table names
-    models = {
-        'clients': Client,
-        'contacts': Contact,
-        'services': Service,
-        'tasks': Task,
-        'notes': Note,
-        'timesheets': Timesheet,
-        'users': User
-    }
-    
-    for table_name, model_class in models.items():
+    for table_name, model_class in MODELS.items():
         # Check if table exists
-        if table_name not in inspector.get_table_names():
+        if table_name not in snapshot:
             logger.error(f"[SCHEMA] Table '{table_name}' does not exist in database")
             drift_report[table_name] = {
                 'missing_in_db': list(get_model_columns(model_class).keys()),
@@ -112,8 +164,8 @@ def validate_schema() -> Tuple[bool, Dict[str, Dict[str, List[str]]]]:
         model_columns = get_model_columns(model_class)
         model_column_names = set(model_columns.keys())
         
-        # Get actual columns from database
-        db_columns = get_database_columns(table_name, inspector)
+        # Get actual columns from the snapshot
+        db_columns = get_database_columns(table_name, snapshot)
         
         # Find differences
         missing_in_db = model_column_names - db_columns
@@ -187,10 +239,7 @@ def fix_schema_drift(drift_report: Dict) -> bool:
         return True
     
     try:
-        with engine.connect() as conn:
-            conn = conn.execution_options(autocommit=True)
-            inspector = inspect(engine)
-            
+        with engine.begin() as conn:
             all_success = True
             
             for table_name, issues in drift_report.items():
@@ -203,15 +252,7 @@ def fix_schema_drift(drift_report: Dict) -> bool:
                 for col_name in issues['missing_in_db']:
                     try:
                         # Get column definition from model
-                        model_class = {
-                            'clients': Client,
-                            'contacts': Contact,
-                            'services': Service,
-                            'tasks': Task,
-                            'notes': Note,
-                            'timesheets': Timesheet,
-                            'users': User
-                        }[table_name]
+                        model_class = MODELS[table_name]
                         
                         column = model_class.__table__.columns[col_name]
                         
@@ -219,8 +260,9 @@ def fix_schema_drift(drift_report: Dict) -> bool:
                         col_type = str(column.type)
                         sql_type = _convert_sqlalchemy_type(col_type, column.nullable)
                         
-                        # Add column
-                        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {sql_type}"))
+                        # Add column (savepoint so one failure doesn't abort the rest)
+                        with conn.begin_nested():
+                            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {sql_type}"))
                         logger.info(f"[SCHEMA FIX] Added column '{table_name}.{col_name}'")
                         
                     except Exception as e:
@@ -0,0 +1,119 @@
+// Client typeahead for templates/partials/client_picker.html.
+// Typing queries /api/clients/lookup (debounced); choosing a result fills the
+// hidden client_id input. Typed text that was never matched to a client
+// fails form validation instead of submitting an empty client_id.
+(function () {
+    const DEBOUNCE_MS = 150;
+
+    function setup(picker) {
+        const input = picker.querySelector('.client-picker-input');
+        const hidden = picker.querySelector('input[type="hidden"]');
+        const list = picker.querySelector('.client-picker-results');
+        let timer = null;
+        let requestSeq = 0;
+        let active = -1;
+
+        function validate() {
+            const unmatched = input.value.trim() && !hidden.value;
+            input.setCustomValidity(unmatched ? 'Choose a client from the list' : '');
+        }
+
+        function highlight(index) {
+            const items = list.querySelectorAll('li');
+            active = Math.max(-1, Math.min(index, items.length - 1));
+            items.forEach((item, i) => item.classList.toggle('active', i === active));
+        }
+
+        function render(results) {
+            list.innerHTML = '';
+            results.forEach(result => {
+                const item = document.createElement('li');
+                item.dataset.id = result.id;
+                item.textContent = result.legal_name;
+                list.appendChild(item);
+            });
+            if (!results.length && input.value.trim()) {
+                const empty = document.createElement('li');
+                empty.className = 'client-picker-empty';
+                empty.textContent = 'No matching clients';
+                list.appendChild(empty);
+            }
+            list.hidden = !list.children.length;
+            highlight(results.length ? 0 : -1);
+        }
+
+        function search() {
+            const seq = ++requestSeq;
+            fetch('/api/clients/lookup?q=' + encodeURIComponent(input.value), { credentials: 'same-origin' })
+                .then(response => response.ok ? response.json() : { results: [] })
+                .then(data => {
+                    if (seq === requestSeq && document.activeElement === input) {
+                        render(data.results);
+                    }
+                })
+                .catch(() => {});
+        }
+
+        function choose(item) {
+            if (!item || !item.dataset.id) {
+                return;
+            }
+            hidden.value = item.dataset.id;
+            input.value = item.textContent;
+            list.hidden = true;
+            validate();
+            if (picker.hasAttribute('data-submit-on-pick')) {
+                picker.closest('form').submit();
+            }
+        }
+
+        input.addEventListener('input', () => {
+            hidden.value = '';
+            validate();
+            clearTimeout(timer);
+            timer = setTimeout(search, DEBOUNCE_MS);
+        });
+        input.addEventListener('focus', search);
+        input.addEventListener('keydown', event => {
+            if (list.hidden) {
+                return;
+            }
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                highlight(active + (event.key === 'ArrowDown' ? 1 : -1));
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                choose(list.querySelectorAll('li')[active]);
+            } else if (event.key === 'Escape') {
+                list.hidden = true;
+            }
+        });
+        input.addEventListener('blur', () => {
+            setTimeout(() => { list.hidden = true; }, 150);
+            // Clearing a filter picker means "all clients"
+            if (!input.value.trim() && picker.hasAttribute('data-submit-on-pick') && hidden.defaultValue) {
+                hidden.value = '';
+                picker.closest('form').submit();
+            }
+        });
+        list.addEventListener('mousedown', event => {
+            event.preventDefault();
+            choose(event.target.closest('li'));
+        });
+        input.form && input.form.addEventListener('reset', () => {
+            setTimeout(() => { list.hidden = true; validate(); }, 0);
+        });
+        validate();
+    }
+
+    // For scripts that pick a client programmatically (e.g. the timer)
+    window.setClientPicker = function (id, clientId, legalName) {
+        const hidden = document.getElementById(id);
+        const input = document.getElementById(id + '-search');
+        hidden.value = clientId || '';
+        input.value = legalName || '';
+        input.setCustomValidity('');
+    };
+
+    document.querySelectorAll('[data-client-picker]').forEach(setup);
+})();
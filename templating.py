@@ -0,0 +1,99 @@
+"""
+Jinja2 template engine configuration.
+
+The engine runs in one of two modes, selected by the TEMPLATE_MODE
+environment variable:
+- development: auto_reload is on, so edited templates are picked up
+  without a restart (Jinja stats the file on every render)
+- production: auto_reload is off and every template is precompiled at
+  startup into a filesystem bytecode cache, so restarts are warm and a
+  broken template fails the boot instead of the first request that uses it
+
+TEMPLATE_MODE defaults to production when RENDER=true or
+ENVIRONMENT=production, and to development otherwise.
+"""
+import os
+import json
+import time
+import logging
+from typing import List
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, TemplateError
+from assets import asset_url
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = "templates"
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", ".jinja_cache")
+
+
+def get_template_mode() -> str:
+    """Return "production" or "development" based on the environment."""
+    mode = os.getenv("TEMPLATE_MODE", "").strip().lower()
+    if mode in ("production", "development"):
+        return mode
+    if os.getenv("RENDER", "").lower() == "true" or os.getenv("ENVIRONMENT", "").lower() == "production":
+        return "production"
+    return "development"
+
+
+def from_json(value):
+    """Jinja2 filter to parse JSON string."""
+    if not value:
+        return {}
+    try:
+        return json.loads(value)
+    except:
+        return {}
+
+
+def create_templates(mode: str = None) -> Jinja2Templates:
+    """
+    Create the Jinja2Templates instance for the given mode.
+
+    Production mode disables auto_reload and attaches a FileSystemBytecodeCache;
+    call precompile_templates() at startup to fill it.
+    """
+    mode = mode or get_template_mode()
+    env_options = {
+        # We handle escaping in templates manually
+        "autoescape": False,
+        "auto_reload": mode != "production",
+    }
+    if mode == "production":
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        env_options["bytecode_cache"] = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+    templates = Jinja2Templates(directory=TEMPLATE_DIR, **env_options)
+
+    # Custom filters
+    templates.env.filters["from_json"] = from_json
+    templates.env.filters["tojson"] = json.dumps
+    templates.env.globals["asset_url"] = asset_url
+
+    logger.info(f"[TEMPLATES] Template engine mode: {mode}")
+    return templates
+
+
+def precompile_templates(templates: Jinja2Templates) -> List[str]:
+    """
+    Compile every templates/*.html file up front.
+
+    Compiled templates land in the environment's in-memory cache and, when a
+    bytecode cache is configured, on disk for the next process.
+
+    Raises:
+        TemplateError: If any template fails to compile.
+        UnicodeDecodeError: If a template file is not valid UTF-8.
+    """
+    start = time.perf_counter()
+    names = templates.env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        try:
+            templates.env.get_template(name)
+        except (TemplateError, UnicodeDecodeError) as e:
+            logger.error(f"[TEMPLATES] Failed to compile template '{name}': {e}")
+            raise
+    duration_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"[TEMPLATES] Precompiled {len(names)} templates in {duration_ms:.2f}ms")
+    return names
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script that renders the relationship-heavy pages with lazy loading
+turned into an error (CRM_RAISE_ON_LAZY_LOAD=1, see crud._strict_loading).
+
+Seeds a prospect with contacts and a client with contacts, services, tasks,
+notes and timesheets on a temporary database, then renders /prospects,
+/clients, /clients/{id} and its tabs through TestClient. A relationship the
+templates use without a loader option raises instead of silently issuing
+one query per row, so a missing selectinload fails this test.
+
+No server needed:
+    python test_lazy_loading.py
+    python -m pytest test_lazy_loading.py
+"""
+
+import sys
+import logging
+
+from testutil import run_isolated
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENV = {"CRM_RAISE_ON_LAZY_LOAD": "1"}
+
+
+class LazyLoadErrors(logging.Handler):
+    """Collects logged errors caused by raiseload, which routes may catch and log instead of failing."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.errors = []
+
+    def emit(self, record):
+        text = record.getMessage()
+        if record.exc_info:
+            text += logging.Formatter().formatException(record.exc_info)
+        if "lazy='raise'" in text:
+            self.errors.append(record.getMessage())
+
+
+def lazy_loading_scenario():
+    """Runs inside run_isolated (fresh process, temp working directory)."""
+    from datetime import date, timedelta
+    from fastapi.testclient import TestClient
+    import crud
+    import main
+    from database import SessionLocal
+    from models import Client, Contact, Service, Task, Note, Timesheet
+    from testutil import create_app_database, login
+
+    assert crud.RAISE_ON_LAZY_LOAD, "CRM_RAISE_ON_LAZY_LOAD not picked up"
+    create_app_database()
+    errors = LazyLoadErrors()
+    logging.getLogger().addHandler(errors)
+
+    db = SessionLocal()
+    prospect = Client(legal_name="Lazy Prospect LLC", status="Prospect", owner_name="Anna",
+                      next_follow_up_date=date.today() + timedelta(days=7))
+    prospect.contacts = [Contact(name="Pat Prospect", role="Owner", email="pat@example.com", phone="555-0101")]
+    client = Client(legal_name="Lazy Load Co", status="Active", entity_type="LLC")
+    client.contacts = [Contact(name="Casey Controller", role="Controller"),
+                       Contact(name="Bo Bookkeeper", role="Bookkeeper")]
+    client.services = [Service(service_type="Payroll", billing_frequency="Monthly", monthly_fee=450.0)]
+    client.tasks = [Task(title="Collect bank statements", due_date=date.today())]
+    client.notes = [Note(content="Prefers email over phone")]
+    client.timesheets = [Timesheet(staff_member="Sam Staff", entry_date=date.today(), hours=1.5,
+                                   project_task="Quarter close")]
+    db.add_all([prospect, client])
+    db.commit()
+    client_id = client.id
+    db.close()
+
+    http = TestClient(main.app)
+    login(http)
+    pages = [
+        ("/prospects", ["Pat Prospect", "pat@example.com"]),
+        ("/clients", ["Lazy Load Co", "Lazy Prospect LLC"]),
+        (f"/clients/{client_id}", ["Lazy Load Co", "Casey Controller", "Bo Bookkeeper"]),
+        (f"/clients/{client_id}/services", ["Payroll"]),
+        (f"/clients/{client_id}/tasks", ["Collect bank statements"]),
+        (f"/clients/{client_id}/notes", ["Prefers email over phone"]),
+        (f"/clients/{client_id}/timesheets", ["Quarter close"]),
+        ("/timesheets", ["Sam Staff", "Lazy Load Co"]),
+    ]
+    for path, expected in pages:
+        response = http.get(path)
+        assert response.status_code == 200, f"{path}: HTTP {response.status_code}"
+        missing = [text for text in expected if text not in response.text]
+        assert not missing, f"{path}: missing {missing}"
+        print(f"✓ {path} rendered without lazy loads")
+    assert not errors.errors, f"lazy loads raised and were logged: {errors.errors}"
+
+
+def test_no_lazy_loads_on_list_and_detail_pages():
+    """Pages render with raiseload('*') in effect."""
+    output = run_isolated("test_lazy_loading", "lazy_loading_scenario", ENV)
+    for line in output.splitlines():
+        if line.startswith("✓"):
+            logger.info(line)
+
+
+def main():
+    """Run the lazy-loading check."""
+    logger.info("=" * 70)
+    logger.info("Lazy Loading Check (CRM_RAISE_ON_LAZY_LOAD=1)")
+    logger.info("=" * 70)
+    try:
+        test_no_lazy_loads_on_list_and_detail_pages()
+    except AssertionError as e:
+        logger.error(f"✗ Lazy loading check failed: {e}")
+        sys.exit(1)
+    logger.info("=" * 70)
+    logger.info("All pages rendered without lazy loads! ✓")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
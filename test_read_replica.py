@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for read-replica routing (DATABASE_READ_URL).
+
+Runs the app in a temporary directory with ./crm.db as the primary and
+./replica.db as the "replica" (two SQLite files, seeded with different
+clients so each page shows which one it was read from). Checks:
+1. List pages read from the replica once the session is not pinned
+2. A POST pins the session to the primary for READ_PIN_SECONDS, then reads
+   go back to the replica
+3. conditional_get sends no ETag for pages read from the replica (or while
+   pinned), but does for routes that never read the replica
+
+No server needed:
+    python test_read_replica.py
+    python -m pytest test_read_replica.py
+"""
+
+import sys
+import time
+import logging
+
+from testutil import run_isolated
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PIN_SECONDS = 1.0
+
+ENV = {
+    "DATABASE_READ_URL": "sqlite:///./replica.db",
+    "READ_PIN_SECONDS": str(PIN_SECONDS),
+    "WEB_CONCURRENCY": "1",
+}
+
+
+def replica_routing_scenario():
+    """Runs inside run_isolated (fresh process, temp working directory)."""
+    from fastapi.testclient import TestClient
+    import database
+    import main
+    from models import Client
+    from testutil import create_app_database, login
+
+    assert database.has_read_replica(), "DATABASE_READ_URL not picked up"
+    assert database.read_engine is not database.engine
+    create_app_database(database.engine, database.read_engine)
+
+    for factory, name in ((database.SessionLocal, "Primary Only Co"), (database.ReadSessionLocal, "Replica Only Co")):
+        db = factory()
+        db.add(Client(legal_name=name, status="Active"))
+        db.commit()
+        db.close()
+
+    def clients_page():
+        response = client.get("/clients")
+        assert response.status_code == 200, response.status_code
+        return response
+
+    client = TestClient(main.app)
+    login(client)
+
+    # Logging in is a POST, so the session starts pinned
+    response = clients_page()
+    assert "Primary Only Co" in response.text and "Replica Only Co" not in response.text
+    assert "etag" not in response.headers, "ETag sent while pinned to the primary"
+    print("✓ Pinned after login: /clients read from the primary, no ETag")
+
+    time.sleep(PIN_SECONDS + 0.2)
+    response = clients_page()
+    assert "Replica Only Co" in response.text and "Primary Only Co" not in response.text
+    assert "etag" not in response.headers, "ETag sent for a page read from the replica"
+    print("✓ Unpinned: /clients read from the replica, no ETag")
+
+    # The revenue route always reads the primary, so it keeps its ETag
+    response = client.get("/api/dashboard/revenue")
+    assert response.status_code == 200 and "etag" in response.headers, dict(response.headers)
+    print("✓ Primary-only route still sends an ETag")
+
+    response = client.post("/clients/new", data={"legal_name": "New Client Co", "status": "Active"},
+                           follow_redirects=False)
+    assert response.status_code == 303, response.status_code
+    response = clients_page()
+    assert "New Client Co" in response.text and "Primary Only Co" in response.text
+    assert "etag" not in response.headers
+    print("✓ After a POST: own write visible (read from the primary)")
+
+    time.sleep(PIN_SECONDS + 0.2)
+    response = clients_page()
+    assert "Replica Only Co" in response.text and "New Client Co" not in response.text
+    print(f"✓ Pin expired after {PIN_SECONDS:g}s: reads back on the replica")
+
+
+def test_read_replica_routing():
+    """Replica reads, pin-after-write and no ETags from the replica."""
+    output = run_isolated("test_read_replica", "replica_routing_scenario", ENV)
+    for line in output.splitlines():
+        if line.startswith("✓"):
+            logger.info(line)
+
+
+def main():
+    """Run the read-replica routing test."""
+    logger.info("=" * 70)
+    logger.info("Read Replica Routing Test")
+    logger.info("=" * 70)
+    try:
+        test_read_replica_routing()
+    except AssertionError as e:
+        logger.error(f"✗ Read replica test failed: {e}")
+        sys.exit(1)
+    logger.info("=" * 70)
+    logger.info("All read replica tests passed! ✓")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script for the follow-up reminder run (reminders.py).
+
+This script:
+1. Starts a local SMTP sink that accepts every recipient except one
+2. Seeds due, not-yet-due and already-reminded prospects in a temporary
+   SQLite database (./crm.db is never touched)
+3. Runs run_reminders() and checks one digest per owner, and that
+   last_reminder_sent is stamped only for the digests the sink accepted
+4. Runs it again and checks nothing new is sent
+
+No server or external SMTP needed:
+    python test_reminders.py
+    python -m pytest test_reminders.py
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import threading
+import socketserver
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TODAY = date(2026, 3, 16)
+REJECTED_EMAIL = "bounced@tierneyohlms.com"
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server on localhost recording (recipients, message) pairs."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rejected=()):
+        super().__init__(("127.0.0.1", 0), SMTPSinkHandler)
+        self.rejected = {address.lower() for address in rejected}
+        self.messages = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def recipients(self):
+        with self.lock:
+            return sorted(rcpt for rcpts, _ in self.messages for rcpt in rcpts)
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 sink ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].split(":", 1)[0].upper()
+            if verb in ("EHLO", "HELO", "NOOP"):
+                self.reply("250 sink")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip().strip("<>").lower()
+                if address in self.server.rejected:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    body.append(data_line)
+                with self.server.lock:
+                    self.server.messages.append((recipients, b"".join(body)))
+                recipients = []
+                self.reply("250 OK queued")
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+def seed_prospects(db):
+    """Return {owner_email: [client ids]} for the due prospects that were seeded."""
+    from models import Client
+
+    def prospect(name, owner_email, due, status="Prospect", reminded=None):
+        client = Client(legal_name=name, status=status, owner_name=owner_email.split("@")[0].title(),
+                        owner_email=owner_email, next_follow_up_date=due, last_reminder_sent=reminded)
+        db.add(client)
+        return client
+
+    due = {
+        "anna@tierneyohlms.com": [prospect("Acme Holdings", "anna@tierneyohlms.com", TODAY),
+                                  prospect("Birch Bakery", "Anna@TierneyOhlms.com", TODAY - timedelta(days=3))],
+        "ben@tierneyohlms.com": [prospect("Cedar Dental", "ben@tierneyohlms.com", TODAY - timedelta(days=1))],
+        REJECTED_EMAIL: [prospect("Delta Freight", REJECTED_EMAIL, TODAY)],
+    }
+    # Never included: due later, not a prospect, or already reminded today
+    prospect("Elm Landscaping", "anna@tierneyohlms.com", TODAY + timedelta(days=2))
+    prospect("Fir Consulting", "ben@tierneyohlms.com", TODAY - timedelta(days=5), status="Active")
+    prospect("Gale Partners", "ben@tierneyohlms.com", TODAY, reminded=TODAY)
+    db.commit()
+    return {email: [client.id for client in clients] for email, clients in due.items()}
+
+
+def reminded_on(db, client_ids):
+    from models import Client
+    db.expire_all()
+    return {client.id: client.last_reminder_sent
+            for client in db.query(Client).filter(Client.id.in_(client_ids))}
+
+
+def test_reminder_run():
+    """One digest per owner, stamp only accepted digests, second run sends nothing."""
+    from database import Base
+    from reminders import run_reminders, SMTPTransport
+
+    workdir = tempfile.mkdtemp(prefix="crm_reminders_")
+    sink = SMTPSink(rejected=[REJECTED_EMAIL])
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'reminders.db')}")
+    db = sessionmaker(bind=engine)()
+    try:
+        Base.metadata.create_all(engine)
+        due = seed_prospects(db)
+
+        logger.info("Running reminders (first run)...")
+        summary = run_reminders(db, today=TODAY, transport=SMTPTransport("127.0.0.1", sink.port, timeout=5))
+        logger.info(f"  {summary}")
+        assert summary["due_prospects"] == 4, summary
+        assert summary["digests"] == 3, "expected one digest per owner"
+        assert summary["sent"] == 2 and summary["failed"] == 1, summary
+        assert summary["stamped"] == 3, summary
+        assert sink.recipients() == ["anna@tierneyohlms.com", "ben@tierneyohlms.com"], sink.recipients()
+        anna_message = next(body for rcpts, body in sink.messages if rcpts == ["anna@tierneyohlms.com"])
+        assert b"Acme Holdings" in anna_message and b"Birch Bakery" in anna_message
+        logger.info("✓ One digest per owner, rejected owner reported as failed")
+
+        accepted = due["anna@tierneyohlms.com"] + due["ben@tierneyohlms.com"]
+        stamps = reminded_on(db, accepted + due[REJECTED_EMAIL])
+        assert all(stamps[client_id] == TODAY for client_id in accepted), stamps
+        assert stamps[due[REJECTED_EMAIL][0]] is None, stamps
+        logger.info("✓ last_reminder_sent stamped only for accepted digests")
+
+        logger.info("Running reminders (second run, same day)...")
+        summary = run_reminders(db, today=TODAY, transport=SMTPTransport("127.0.0.1", sink.port, timeout=5))
+        logger.info(f"  {summary}")
+        # Only the rejected owner is retried; nothing new reaches the sink
+        assert summary["digests"] == 1 and summary["sent"] == 0, summary
+        assert len(sink.messages) == 2, sink.recipients()
+        logger.info("✓ Second run sent nothing new")
+    finally:
+        db.close()
+        engine.dispose()
+        sink.shutdown()
+        sink.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    """Run the reminder test."""
+    logger.info("=" * 70)
+    logger.info("Follow-up Reminder Test")
+    logger.info("=" * 70)
+    try:
+        test_reminder_run()
+    except AssertionError as e:
+        logger.error(f"✗ Reminder test failed: {e}")
+        sys.exit(1)
+    logger.info("=" * 70)
+    logger.info("All reminder tests passed! ✓")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Helpers for test scripts that need the whole app on a throwaway database.
+
+database.py and main.py pick their engines at import time (./crm.db in the
+working directory, DATABASE_READ_URL, ...), so those tests run in a child
+Python process started in a temporary directory that links to templates/
+and static/. The real crm.db is never touched, and each test gets its own
+settings even when pytest runs several in one process.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ADMIN_EMAIL = "admin@tierneyohlms.com"
+ADMIN_PASSWORD = "ChangeMe123!"
+
+
+def run_isolated(module_name: str, function_name: str, env: dict = None, timeout: float = 180) -> str:
+    """
+    Run module_name.function_name() in a fresh interpreter inside a temp
+    directory, with env added to the environment. Returns its output;
+    raises AssertionError (with the output) if it failed.
+    """
+    workdir = tempfile.mkdtemp(prefix="crm_test_")
+    try:
+        for name in ("templates", "static"):
+            try:
+                os.symlink(os.path.join(REPO_DIR, name), os.path.join(workdir, name))
+            except OSError:
+                shutil.copytree(os.path.join(REPO_DIR, name), os.path.join(workdir, name))
+        child_env = {**os.environ, "SCHEDULER_ENABLED": "0", **(env or {})}
+        child_env.pop("DATABASE_URL", None)
+        child_env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")]))
+        result = subprocess.run(
+            [sys.executable, "-c", f"import {module_name}; {module_name}.{function_name}()"],
+            cwd=workdir, env=child_env, capture_output=True, text=True, timeout=timeout,
+        )
+        output = result.stdout + result.stderr
+        if result.returncode != 0:
+            raise AssertionError(f"{module_name}.{function_name} failed:\n{output[-4000:]}")
+        return output
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def create_app_database(*engines) -> None:
+    """create_all on each engine and bootstrap the admin users (call inside run_isolated)."""
+    import main
+    for engine in engines or (main.engine,):
+        main.Base.metadata.create_all(engine)
+    main.bootstrap_admin_users()
+
+
+def login(client) -> None:
+    response = client.post("/login", data={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD},
+                           follow_redirects=False)
+    assert response.status_code == 303, f"login failed: {response.status_code}"
@@ -0,0 +1,132 @@
+"""
+Post-startup warm-up, so the first users after a deploy (or a free-tier
+spin-up) don't pay for cold caches.
+
+run_warmup() is awaited by initialize_database_background once tables,
+migrations and admin users are done. Steps, in order:
+
+1. pools      - open pool_size connections on the primary and read engines
+2. templates  - compile every template (already done at boot in production)
+3. revenue    - compute the dashboard revenue snapshot (events.py)
+4. lookups    - prime the filter dropdown lookups (lookups.py)
+5. client_index - load the client typeahead index (client_index.py)
+
+The whole phase is capped at WARMUP_BUDGET_SECONDS (default 20): a step
+still running when the budget runs out is abandoned (it finishes in the
+background) and the remaining steps are skipped, so warm-up can only delay
+readiness by the budget. A failed step is logged and the next one runs.
+Progress is kept in warmup_status() for /health/ready and /api/metrics.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WARMUP_BUDGET_SECONDS = float(os.getenv("WARMUP_BUDGET_SECONDS", "20"))
+
+_state = {
+    "status": "pending",  # pending, running, done, budget_exceeded
+    "started_at": None,
+    "finished_at": None,
+    "duration_ms": None,
+    "budget_seconds": WARMUP_BUDGET_SECONDS,
+    "steps": {},
+}
+
+
+def warmup_status() -> dict:
+    return {**_state, "steps": dict(_state["steps"])}
+
+
+def is_warm() -> bool:
+    """True once warm-up has finished or given up on its budget."""
+    return _state["status"] in ("done", "budget_exceeded")
+
+
+def _warm_pools(engines) -> int:
+    from pool_metrics import warm_pool
+    opened = 0
+    for engine in engines:
+        opened += warm_pool(engine)
+    return opened
+
+
+def _warm_templates(templates) -> int:
+    from templating import precompile_templates
+    return len(precompile_templates(templates))
+
+
+def _warm_lookups() -> int:
+    from database import ReadSessionLocal
+    from lookups import client_statuses, client_entity_types, prospect_owners
+    db = ReadSessionLocal()
+    try:
+        return sum(len(lookup(db)) for lookup in (client_statuses, client_entity_types, prospect_owners))
+    finally:
+        db.close()
+
+
+def _warm_client_index() -> int:
+    from client_index import load_client_index
+    return load_client_index()
+
+
+async def _warm_revenue() -> float:
+    from events import dashboard_broadcaster
+    snapshot = await dashboard_broadcaster.refresh()
+    return snapshot["total_revenue"]
+
+
+def default_steps(templates, engines) -> List[Tuple[str, Callable]]:
+    """(name, callable) pairs; coroutine functions are awaited, the rest run in a thread."""
+    return [
+        ("pools", lambda: _warm_pools(engines)),
+        ("templates", lambda: _warm_templates(templates)),
+        ("revenue", _warm_revenue),
+        ("lookups", _warm_lookups),
+        ("client_index", _warm_client_index),
+    ]
+
+
+async def run_warmup(templates, engines, budget_seconds: Optional[float] = None,
+                     steps: Optional[List[Tuple[str, Callable]]] = None) -> dict:
+    """Run the warm-up steps within the time budget. Returns warmup_status()."""
+    budget = WARMUP_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    steps = steps if steps is not None else default_steps(templates, engines)
+    started = time.perf_counter()
+    _state.update(status="running", started_at=datetime.now().isoformat(timespec="seconds"),
+                  budget_seconds=budget, steps={})
+    logger.info(f"[WARMUP] Starting ({len(steps)} steps, budget {budget:g}s)")
+
+    status = "done"
+    for name, step in steps:
+        remaining = budget - (time.perf_counter() - started)
+        if remaining <= 0:
+            _state["steps"][name] = {"status": "skipped"}
+            status = "budget_exceeded"
+            continue
+        step_started = time.perf_counter()
+        work = step() if asyncio.iscoroutinefunction(step) else asyncio.to_thread(step)
+        try:
+            result = await asyncio.wait_for(work, remaining)
+            outcome = {"status": "ok", "result": result}
+        except asyncio.TimeoutError:
+            outcome = {"status": "timeout"}
+            status = "budget_exceeded"
+            logger.warning(f"[WARMUP] {name} did not finish within the {budget:g}s budget")
+        except Exception as e:
+            outcome = {"status": "failed", "error": str(e)}
+            logger.error(f"[WARMUP] {name} failed: {e}", exc_info=True)
+        outcome["duration_ms"] = round((time.perf_counter() - step_started) * 1000, 1)
+        _state["steps"][name] = outcome
+
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    _state.update(status=status, finished_at=datetime.now().isoformat(timespec="seconds"), duration_ms=duration_ms)
+    logger.info(f"[WARMUP] {status} in {duration_ms:.0f}ms: " + ", ".join(
+        f"{name}={step['status']}" for name, step in _state["steps"].items()
+    ))
+    return warmup_status()